@@ -3,6 +3,9 @@ ASGI config for core project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Besides the Django application it serves the live vessel Server-Sent Events
+stream (vessels.stream), which needs a long-lived async connection.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
 """
@@ -13,4 +16,13 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported after Django is set up: the stream uses models and settings
+from vessels.stream import STREAM_PATH, vessel_stream  # noqa: E402
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "http" and scope["path"] == STREAM_PATH:
+        return await vessel_stream(scope, receive, send)
+    return await django_application(scope, receive, send)
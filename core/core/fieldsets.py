@@ -0,0 +1,134 @@
+"""
+Sparse fieldsets for read endpoints.
+
+``?fields=id,name,mmsi`` limits a response to the listed fields and
+``?omit=latest_position`` drops fields from it. Serializers using
+``SparseFieldsetMixin`` remove the other fields on GET requests, so method
+fields that were not asked for are never called. Views using
+``SparseQuerysetMixin`` then load only the model columns those fields read,
+with ``.only()``. Endpoints that encode ``values_list`` rows pass
+``selected_fields`` to ``vessels.encoders.row_encoder`` instead.
+
+A method field reads from ``*``; serializers list the model fields it needs
+in ``Meta.field_sources``. Without an entry every column is loaded.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_PARAM = 'fields'
+OMIT_PARAM = 'omit'
+
+
+def _names(params, name):
+    value = params.get(name)
+    if not value:
+        return None
+    return [part.strip() for part in value.split(',') if part.strip()]
+
+
+def selected_fields(request, available):
+    """
+    Names from ``available`` kept by ``?fields=`` / ``?omit=``, in their
+    original order, or None when neither parameter is given.
+    """
+    wanted = _names(request.query_params, FIELDS_PARAM)
+    omitted = _names(request.query_params, OMIT_PARAM)
+    if wanted is None and omitted is None:
+        return None
+
+    for param, names in ((FIELDS_PARAM, wanted), (OMIT_PARAM, omitted)):
+        unknown = [name for name in names or () if name not in available]
+        if unknown:
+            raise ValidationError({param: f"Unknown field(s): {', '.join(unknown)}."})
+    return [
+        name for name in available
+        if (wanted is None or name in wanted) and name not in (omitted or ())
+    ]
+
+
+class SparseFieldsetMixin:
+    """Serializer mixin honouring ``?fields=`` / ``?omit=`` on GET requests."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method not in SAFE_METHODS:
+            return
+
+        kept = selected_fields(request, list(self.fields))
+        if kept is not None:
+            for name in list(self.fields):
+                if name not in kept:
+                    self.fields.pop(name)
+
+    def model_columns(self):
+        """
+        Model fields read by the remaining serializer fields, or None when
+        that can't be worked out (a method field without ``field_sources``).
+        """
+        model = self.Meta.model
+        sources = getattr(self.Meta, 'field_sources', {})
+        columns = []
+        for name, field in self.fields.items():
+            if field.source == '*':
+                if name not in sources:
+                    return None
+                columns.extend(sources[name])
+                continue
+            try:
+                model_field = model._meta.get_field(field.source_attrs[0])
+            except FieldDoesNotExist:
+                return None
+            if isinstance(field, serializers.PrimaryKeyRelatedField):
+                # Only the key: "vessel_id", not the related row
+                columns.append(model_field.attname)
+            else:
+                # Related attributes ("vessel.name") become "vessel__name"
+                columns.append('__'.join(field.source_attrs))
+        return columns
+
+
+class SparseQuerysetMixin:
+    """
+    View mixin loading only the columns the sparse serializer will read.
+
+    Applied to list and retrieve through ``filter_queryset``; writes always
+    load full rows.
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.request.method not in SAFE_METHODS:
+            return queryset
+        if not (FIELDS_PARAM in self.request.query_params or OMIT_PARAM in self.request.query_params):
+            return queryset
+
+        serializer = self.get_serializer()
+        columns = serializer.model_columns() if isinstance(serializer, SparseFieldsetMixin) else None
+        if columns is None:
+            return queryset
+
+        columns = {queryset.model._meta.pk.name, *columns}
+        columns.update(field.lstrip('-') for field in getattr(self, 'keyset_ordering', ()))
+
+        # Relations the view joins stay joined when a field reads them
+        # ("latest_position", "vessel__name"); others are loaded through
+        # their foreign key. Joins no remaining field reads are dropped.
+        related = queryset.query.select_related
+        related = set(related) if isinstance(related, dict) else set()
+        only, traversed = set(), set()
+        for column in columns:
+            relation, _, rest = column.partition('__')
+            if relation in related:
+                only.update((relation, column))
+                traversed.add(relation)
+            else:
+                only.add(relation)
+
+        if related:
+            queryset = queryset.select_related(None)
+            if traversed:
+                queryset = queryset.select_related(*traversed)
+        return queryset.only(*only)
@@ -0,0 +1,193 @@
+"""
+Per-endpoint request metrics.
+
+``RequestMetricsMiddleware`` measures every request and files it under the
+resolved URL name (``vessel-list``, ``vessel-nearby``...): wall-clock
+latency, number of SQL queries, time spent in the database and response
+size. Queries are counted with ``connection.execute_wrapper``, so this
+works with DEBUG off and costs two ``perf_counter`` calls per query.
+
+Each measure goes into a fixed-bucket histogram, so recording is one
+``bisect`` and memory does not grow with traffic. Histograms are kept per
+process; with several workers each one reports its own share. Streaming
+responses are measured up to the start of the stream and their size is
+not recorded.
+
+With REQUEST_METRICS_SERVER_TIMING set, responses also carry a
+``Server-Timing`` header that browser dev tools show next to the request.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+UNRESOLVED = '<unresolved>'
+
+
+def _geometric(start, factor, count):
+    return tuple(round(start * factor ** i, 3) for i in range(count))
+
+
+# Bucket upper bounds; one overflow bucket follows the last
+LATENCY_BUCKETS = _geometric(1, 1.5, 28)          # 1 ms .. ~55 s
+DB_TIME_BUCKETS = _geometric(0.1, 1.5, 30)        # 0.1 ms .. ~13 s
+QUERY_BUCKETS = (0, 1, 2, 3, 4, 5, 6, 8, 10, 12, 15, 20, 25, 30, 40, 50, 75, 100, 150, 200, 300, 500, 1000)
+SIZE_BUCKETS = _geometric(128, 2, 22)             # 128 B .. 256 MB
+
+
+class Histogram:
+    """Counts of observations per bucket, plus their sum and maximum."""
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile (at most the maximum seen)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return round(min(bound, self.max), 3)
+        return round(self.max, 3)
+
+    def summary(self):
+        if not self.count:
+            return {'count': 0}
+        return {
+            'count': self.count,
+            'mean': round(self.total / self.count, 3),
+            'p50': self.quantile(0.5),
+            'p90': self.quantile(0.9),
+            'p99': self.quantile(0.99),
+            'max': round(self.max, 3),
+            'buckets': {
+                str(bound): count
+                for bound, count in zip((*self.bounds, 'inf'), self.counts) if count
+            },
+        }
+
+
+class EndpointMetrics:
+    """Histograms of one URL name."""
+
+    def __init__(self):
+        self.statuses = {}
+        self.latency_ms = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.db_ms = Histogram(DB_TIME_BUCKETS)
+        self.response_bytes = Histogram(SIZE_BUCKETS)
+
+    def record(self, status, latency_ms, queries, db_ms, size):
+        status = f'{status // 100}xx'
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        self.latency_ms.observe(latency_ms)
+        self.queries.observe(queries)
+        self.db_ms.observe(db_ms)
+        if size is not None:
+            self.response_bytes.observe(size)
+
+    def summary(self):
+        return {
+            'requests': self.latency_ms.count,
+            'statuses': dict(sorted(self.statuses.items())),
+            'latency_ms': self.latency_ms.summary(),
+            'queries': self.queries.summary(),
+            'db_ms': self.db_ms.summary(),
+            'response_bytes': self.response_bytes.summary(),
+        }
+
+
+_endpoints = {}
+_started_at = time.time()
+_lock = threading.Lock()
+
+
+def record(name, status, latency_ms, queries, db_ms, size):
+    with _lock:
+        endpoint = _endpoints.get(name)
+        if endpoint is None:
+            endpoint = _endpoints[name] = EndpointMetrics()
+        endpoint.record(status, latency_ms, queries, db_ms, size)
+
+
+def snapshot():
+    """Summaries of all endpoints, busiest first."""
+    with _lock:
+        endpoints = {name: endpoint.summary() for name, endpoint in _endpoints.items()}
+        started_at = _started_at
+    return {
+        'since': started_at,
+        'endpoints': dict(sorted(endpoints.items(), key=lambda item: -item[1]['requests'])),
+    }
+
+
+def reset():
+    global _started_at
+    with _lock:
+        _endpoints.clear()
+        _started_at = time.time()
+
+
+class QueryTimer:
+    """``execute_wrapper`` counting queries and the time they take."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.count += 1
+
+
+class RequestMetricsMiddleware:
+    """Record latency, queries, DB time and size per URL name."""
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = QueryTimer()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            response = self.get_response(request)
+        latency_ms = (time.perf_counter() - start) * 1000
+        db_ms = timer.seconds * 1000
+
+        match = getattr(request, 'resolver_match', None)
+        name = match.view_name if match else UNRESOLVED
+        size = None if response.streaming else len(response.content)
+        record(name, response.status_code, latency_ms, timer.count, db_ms, size)
+
+        if settings.REQUEST_METRICS_SERVER_TIMING:
+            response['Server-Timing'] = (
+                f'db;dur={db_ms:.1f};desc="{timer.count} queries", '
+                f'total;dur={latency_ms:.1f}'
+            )
+        return response
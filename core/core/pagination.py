@@ -0,0 +1,157 @@
+"""
+Opt-in keyset (cursor) pagination for large listings.
+
+Views keep the default page-number behaviour; a client switches to keyset
+mode with ``?pagination=cursor`` (first page) and then follows the
+``next`` / ``previous`` links, which carry an opaque ``cursor``. Pages are
+fetched with a WHERE on the view's ``keyset_ordering`` (e.g. last_updated,
+id) instead of OFFSET, so deep pages cost the same as the first one as
+long as a matching index exists.
+
+``?count=exact`` adds a COUNT(*); ``?count=estimate`` uses planner
+statistics where the database offers them. By default no total is sent.
+"""
+import base64
+import json
+
+from django.db import connections
+from django.db.models import Max, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def estimate_count(queryset):
+    """Cheap row-count estimate, or None when the database can't provide one."""
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        if not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                    [queryset.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+            if row and row[0] >= 0:
+                return row[0]
+        plan = json.loads(queryset.explain(format='json'))
+        return int(plan[0]['Plan']['Plan Rows'])
+
+    if not queryset.query.where:
+        # Upper bound from the primary key index; ignores gaps from deletes
+        return queryset.aggregate(max_pk=Max('pk'))['max_pk'] or 0
+    return None
+
+
+class KeysetPagination(PageNumberPagination):
+    cursor_query_param = 'cursor'
+    mode_query_param = 'pagination'
+    count_query_param = 'count'
+    cursor_page_size_query_param = 'page_size'
+    max_cursor_page_size = 1000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        self.keyset = self.cursor_query_param in params or params.get(self.mode_query_param) == 'cursor'
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.ordering = list(getattr(view, 'keyset_ordering', ('-pk',)))
+        self.page_size = self._keyset_page_size(params)
+        self.model = queryset.model
+
+        self.count, self.count_is_estimate = None, False
+        if params.get(self.count_query_param) == 'exact':
+            self.count = queryset.count()
+        elif params.get(self.count_query_param) == 'estimate':
+            self.count, self.count_is_estimate = estimate_count(queryset), True
+
+        direction, values = self._decode_cursor(params.get(self.cursor_query_param))
+        if direction == 'previous':
+            ordering = [self._reverse(field) for field in self.ordering]
+            rows = list(queryset.filter(self._after(ordering, values)).order_by(*ordering)[:self.page_size + 1])
+            self.has_previous = len(rows) > self.page_size
+            self.has_next = True
+            rows = rows[:self.page_size][::-1]
+        else:
+            if values is not None:
+                queryset = queryset.filter(self._after(self.ordering, values))
+            rows = list(queryset.order_by(*self.ordering)[:self.page_size + 1])
+            self.has_next = len(rows) > self.page_size
+            self.has_previous = values is not None
+            rows = rows[:self.page_size]
+
+        self.rows = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+
+        return Response({
+            'count': self.count,
+            'count_is_estimate': self.count_is_estimate,
+            'next': self._link('next', self.rows[-1]) if self.has_next and self.rows else None,
+            'previous': self._link('previous', self.rows[0]) if self.has_previous and self.rows else None,
+            'results': data,
+        })
+
+    # ---- helpers ----
+
+    def _keyset_page_size(self, params):
+        try:
+            size = int(params.get(self.cursor_page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            size = self.page_size
+        return max(1, min(size, self.max_cursor_page_size))
+
+    @staticmethod
+    def _field_name(field):
+        return field.lstrip('-')
+
+    @staticmethod
+    def _reverse(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    def _after(self, ordering, values):
+        """Rows strictly after ``values`` in ``ordering`` (lexicographic)."""
+        condition = Q()
+        for index, field in enumerate(ordering):
+            name = self._field_name(field)
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            term = Q(**{f'{name}__{lookup}': values[index]})
+            for prior_field, prior_value in zip(ordering[:index], values[:index]):
+                term &= Q(**{self._field_name(prior_field): prior_value})
+            condition |= term
+        return condition
+
+    def _link(self, direction, row):
+        values = []
+        for field in self.ordering:
+            value = getattr(row, self._field_name(field))
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        token = base64.urlsafe_b64encode(
+            json.dumps({'d': direction[0], 'v': values}, separators=(',', ':')).encode()
+        ).decode()
+
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.mode_query_param)
+        return replace_query_param(url, self.cursor_query_param, token)
+
+    def _decode_cursor(self, token):
+        if not token:
+            return 'next', None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode()))
+            names = [self._field_name(field) for field in self.ordering]
+            if len(payload['v']) != len(names):
+                raise ValueError
+            values = [
+                (self.model._meta.pk if name == 'pk' else self.model._meta.get_field(name)).to_python(value)
+                for name, value in zip(names, payload['v'])
+            ]
+        except Exception:
+            raise NotFound('Invalid cursor.')
+        return ('previous' if payload.get('d') == 'p' else 'next'), values
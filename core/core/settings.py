@@ -43,6 +43,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "core.metrics.RequestMetricsMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.security.SecurityMiddleware",
@@ -65,6 +66,10 @@ CORS_ALLOWED_ORIGINS =[
     "http://127.0.0.1:5173",
     "http://127.0.0.1:3000",
 ]
+CORS_EXPOSE_HEADERS = [
+    "X-Change-Cursor",
+    "ETag",
+]
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
@@ -84,6 +89,90 @@ WSGI_APPLICATION = "core.wsgi.application"
 # AISStream.io Configuration (read from environment only)
 AIS_STREAM_API_KEY = os.getenv("AIS_STREAM_API_KEY", "")
 
+# Vessel map: viewport requests above this many vessels are returned as clusters
+VESSEL_MAP_CLUSTER_THRESHOLD = 500
+
+# Vessel route: default cap on representative points returned per track
+VESSEL_ROUTE_MAX_POINTS = 500
+VESSEL_ROUTE_POINTS_LIMIT = 20000   # largest max_points a client may ask for
+VESSEL_ROUTE_MAX_HOURS = 24 * 366
+TRACK_LEVELS_RESCAN_ROWS = 5000      # positions below the watermark re-checked for late commits
+
+# Batch trails: vessels per request and default points per trail
+VESSEL_TRAILS_MAX_VESSELS = 1000
+VESSEL_TRAILS_MAX_POINTS = 100
+VESSEL_TRAILS_POINTS_LIMIT = 1000     # largest max_points a client may ask for
+VESSEL_TRAILS_MAX_HOURS = 72
+
+# Vector tiles (see vessels/tiles.py)
+VESSEL_TILE_MAX_VESSELS = 2000      # above this a tile carries a density layer instead
+VESSEL_TILE_TRACK_MIN_ZOOM = 6
+VESSEL_TILE_TRACK_HOURS = 1
+VESSEL_TILE_MAX_HOURS = 24            # largest vessel freshness window (?hours=, default 1)
+VESSEL_TILE_CACHE_TTL = 300
+
+# Density heatmaps (see vessels/density.py)
+VESSEL_DENSITY_MAX_RESOLUTION = 1024   # grid cells per side
+VESSEL_DENSITY_CLOSED_AFTER = 300      # seconds after its end a range is cached
+VESSEL_DENSITY_CACHE_TTL = 86400
+
+# Vessel autocomplete index (see vessels/search.py)
+VESSEL_SEARCH_MAX_RESULTS = 50
+VESSEL_SEARCH_REFRESH_INTERVAL = 2.0   # seconds between change_seq checks
+VESSEL_SEARCH_REBUILD_AFTER = 5000     # changed vessels kept in the overlay before a rebuild
+
+# Nearby-vessel queries (see vessels/nearby.py)
+VESSEL_NEARBY_CELL_SIZE = 1.0          # grid cell size in degrees
+VESSEL_NEARBY_MAX_RESULTS = 1000
+VESSEL_NEARBY_MAX_RADIUS_KM = 5000
+VESSEL_NEARBY_MAX_HOURS = 24 * 7
+VESSEL_NEARBY_REFRESH_INTERVAL = 2.0   # seconds between change_seq checks
+
+# Fleet snapshots for time-travel queries (see vessels/snapshots.py)
+VESSEL_SNAPSHOT_INTERVAL = 3600   # seconds between stored snapshots
+VESSEL_SNAPSHOT_LAG = 600         # snapshots trail real time by this many seconds
+
+# Traffic playback (see vessels/playback.py)
+VESSEL_PLAYBACK_MAX_GAP = 1800           # seconds between reports still interpolated
+VESSEL_PLAYBACK_GAP_LIMIT = 86400        # largest max_gap a client may ask for
+VESSEL_PLAYBACK_MAX_INTERVAL = 3600      # seconds between frames, at most
+VESSEL_PLAYBACK_MAX_FRAMES = 5000
+VESSEL_PLAYBACK_MAX_POSITIONS = 2000000  # reports fetched per request
+
+# Bulk position ingestion (see vessels/ingest.py)
+VESSEL_INGEST_MAX_ITEMS = 10000
+VESSEL_INGEST_BATCH_SIZE = 500      # reports stored per transaction
+VESSEL_INGEST_MAX_FUTURE = 300      # seconds a report may be ahead of the server clock
+
+# Per-endpoint request metrics (see core/metrics.py), served at /api/metrics/
+REQUEST_METRICS_ENABLED = True
+REQUEST_METRICS_SERVER_TIMING = DEBUG   # add Server-Timing headers to responses
+
+# Stateless JWT authentication for polled endpoints (see users/authentication.py)
+JWT_USER_STATE_CACHE_TTL = 30   # seconds a disabled or changed user can keep using a token
+
+# Port dashboard congestion counts (see ports/views.py)
+PORT_DASHBOARD_RADIUS_KM = 45.0          # vessels within this distance count as at the port
+PORT_DASHBOARD_MAX_RADIUS_KM = 500.0
+PORT_DASHBOARD_VESSEL_MAX_AGE = 7200     # seconds since a vessel's last position report
+
+# Delta mode of map-view / live-tracking (see vessels/changes.py)
+VESSEL_CHANGE_CURSOR_MAX_AGE = 3600   # seconds a since= cursor stays usable; older change log entries are pruned
+VESSEL_LIVE_MAX_HOURS = 24 * 7        # largest freshness window (?hours=) of map-view / live-tracking
+
+# Conditional GET for fleet endpoints (see vessels/conditional.py)
+WATERMARK_REGION_SIZE = 30          # per-region watermark cell size in degrees
+FLEET_ETAG_TIME_BUCKET = 60         # seconds; freshness windows move with time
+
+# Fleet statistics: vessel writes invalidate the cache at most once per this many seconds
+VESSEL_STATS_CACHE_TTL = 30
+
+# Live vessel stream (SSE over ASGI, see vessels/stream.py)
+VESSEL_STREAM_MAX_RATE = 1.0        # max events per second per client
+VESSEL_STREAM_POLL_INTERVAL = 1.0   # seconds between change-sequence polls
+VESSEL_STREAM_KEEPALIVE = 15.0      # seconds between keepalive comments
+VESSEL_STREAM_GRID_SIZE = 5.0       # subscription grid cell size in degrees
+
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
@@ -95,6 +184,17 @@ DATABASES = {
 }
 
 
+# Cache
+# Local memory is per process; point this at a shared backend (Redis,
+# Memcached) when running several workers.
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -3,7 +3,7 @@ from django.urls import path, include
 from rest_framework_simplejwt.views import TokenRefreshView, TokenObtainPairView
 from users.serializers import CustomTokenObtainPairSerializer
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
-from stats.views import StatsView
+from stats.views import MetricsView, StatsView
 
 
 class CustomTokenView(TokenObtainPairView):
@@ -19,6 +19,7 @@ urlpatterns = [
 
     # Core APIs
     path("api/stats/", StatsView.as_view(), name="stats"),
+    path("api/metrics/", MetricsView.as_view(), name="metrics"),
     path("api/users/", include("users.urls")),
 
     # Documentation
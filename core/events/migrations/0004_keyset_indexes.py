@@ -0,0 +1,20 @@
+# Generated by Django 6.0.1 on 2026-10-19 17:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0003_alter_event_id"),
+        ("vessels", "0011_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                fields=["-timestamp", "-id"], name="events_even_timesta_8efa8d_idx"
+            ),
+        ),
+    ]
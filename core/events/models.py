@@ -21,5 +21,11 @@ class Event(models.Model):
     severity = models.CharField(max_length=10, choices=SEVERITY_LEVELS)
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Keyset pagination order (EventViewSet.keyset_ordering)
+            models.Index(fields=['-timestamp', '-id']),
+        ]
+
     def __str__(self):
         return f"{self.event_type} - {self.vessel.name}"
@@ -1,7 +1,9 @@
 from rest_framework import serializers
+
+from core.fieldsets import SparseFieldsetMixin
 from .models import Event
 
-class EventSerializer(serializers.ModelSerializer):
+class EventSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     vessel_name = serializers.CharField(source='vessel.name', read_only=True)
 
     class Meta:
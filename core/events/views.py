@@ -3,6 +3,8 @@ from rest_framework.permissions import BasePermission, SAFE_METHODS
 from .models import Event
 from .serializers import EventSerializer
 from users.permissions import is_admin_email
+from core.fieldsets import SparseQuerysetMixin
+from core.pagination import KeysetPagination
 
 
 class EventPermission(BasePermission):
@@ -28,7 +30,9 @@ class EventPermission(BasePermission):
         return False
 
 
-class EventViewSet(ModelViewSet):
-    queryset = Event.objects.all()
+class EventViewSet(SparseQuerysetMixin, ModelViewSet):
+    queryset = Event.objects.select_related('vessel')
     serializer_class = EventSerializer
     permission_classes = [EventPermission]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-timestamp', '-id')
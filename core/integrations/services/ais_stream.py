@@ -3,7 +3,8 @@ import websockets
 import json
 from django.conf import settings
 from django.utils import timezone
-from vessels.models import Vessel, VesselPosition
+from vessels.models import Vessel
+from vessels.tracking import record_position
 from asgiref.sync import sync_to_async
 import logging
 
@@ -253,11 +254,15 @@ class AISStreamService:
                 vessel.last_position_update = timezone.now()
                 vessel.data_source = "aisstream"
                 
-                vessel.save()
+                vessel.save(update_fields=[
+                    "name", "vessel_type", "type", "status",
+                    "latitude", "longitude", "speed", "course", "heading",
+                    "nav_status", "last_position_update", "data_source",
+                ])
                 
                 # Save historical position
-                VesselPosition.objects.create(
-                    vessel=vessel,
+                record_position(
+                    vessel,
                     latitude=data.get("latitude"),
                     longitude=data.get("longitude"),
                     speed=data.get("speed"),
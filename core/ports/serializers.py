@@ -1,8 +1,10 @@
 # ports/serializers.py
 from rest_framework import serializers
+
+from core.fieldsets import SparseFieldsetMixin
 from .models import Port
 
-class PortSerializer(serializers.ModelSerializer):
+class PortSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Port
         fields = ["id", "name", "latitude", "longitude", "country"]
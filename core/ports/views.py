@@ -1,6 +1,7 @@
 from datetime import timedelta
 import random
 
+from django.conf import settings
 from django.utils.timezone import now
 from django.core.paginator import Paginator
 from django.db.models import Q
@@ -8,11 +9,13 @@ from django.db.models import Q
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.exceptions import ValidationError
 from rest_framework import generics
 from rest_framework.viewsets import ModelViewSet
 
+from core.fieldsets import SparseQuerysetMixin
 from ports.models import Port
-from vessels.models import Vessel
+from vessels.nearby import nearby_grid
 from ports.serializers import PortSerializer
 from users.permissions import IsAdmin
 
@@ -21,7 +24,7 @@ from users.permissions import IsAdmin
 # PORT CRUD (ADMIN)
 # =========================
 
-class PortViewSet(ModelViewSet):
+class PortViewSet(SparseQuerysetMixin, ModelViewSet):
 
     queryset = Port.objects.all().order_by("name")
     serializer_class = PortSerializer
@@ -32,7 +35,7 @@ class PortViewSet(ModelViewSet):
 # PORT LIST
 # =========================
 
-class PortListView(generics.ListAPIView):
+class PortListView(SparseQuerysetMixin, generics.ListAPIView):
 
     queryset = Port.objects.all().order_by("name")
     serializer_class = PortSerializer
@@ -63,14 +66,27 @@ class DashboardView(APIView):
         paginator = Paginator(qs, 100)
         ports = paginator.get_page(page)
 
-        # Get recent vessels ONCE (performance)
-        recent = now() - timedelta(hours=2)
+        try:
+            radius_km = float(request.GET.get("radius_km", settings.PORT_DASHBOARD_RADIUS_KM))
+        except ValueError:
+            radius_km = None
+        if radius_km is None or not 0 < radius_km <= settings.PORT_DASHBOARD_MAX_RADIUS_KM:
+            raise ValidationError({
+                "radius_km": f"Expected a number of km up to {settings.PORT_DASHBOARD_MAX_RADIUS_KM:g}."
+            })
+
+        recent = now() - timedelta(seconds=settings.PORT_DASHBOARD_VESSEL_MAX_AGE)
+
+        def is_recent(entry):
+            return entry[4] is not None and entry[4] >= recent
 
-        vessels = list(
-            Vessel.objects.filter(
-                updated_at__gte=recent
-            ).values("latitude", "longitude")
-        )
+        # Shared vessel grid, refreshed from change_seq (see vessels/nearby.py)
+        with nearby_grid() as grid:
+            vessel_counts = {
+                port.pk: grid.count_within(float(port.latitude), float(port.longitude), radius_km, is_recent)
+                for port in ports
+                if port.latitude and port.longitude
+            }
 
 
         # Major port keywords (global hubs)
@@ -92,21 +108,10 @@ class DashboardView(APIView):
             lat = float(port.latitude)
             lng = float(port.longitude)
 
-            nearby = 0
-
-
             # ---------------------------
-            # REAL VESSEL COUNT (FAST)
+            # REAL VESSEL COUNT (GRID)
             # ---------------------------
-            for v in vessels:
-
-                if (
-                    v.get("latitude") is not None and
-                    v.get("longitude") is not None and
-                    lat - 0.4 <= v["latitude"] <= lat + 0.4 and
-                    lng - 0.4 <= v["longitude"] <= lng + 0.4
-                ):
-                    nearby += 1
+            nearby = vessel_counts[port.pk]
 
 
             # ---------------------------
@@ -1,15 +1,31 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from core import metrics
+from users.permissions import IsAdmin
 from vessels.models import Vessel
+from vessels.conditional import conditional_fleet
 from events.models import Event
 
 
 class StatsView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @conditional_fleet([Vessel.CHANGE_COUNTER, "events"])
     def get(self, request):
         return Response({
             "total_vessels": Vessel.objects.count(),
             "total_events": Event.objects.count(),
         })
+
+
+class MetricsView(APIView):
+    """Per-endpoint request metrics of this process; DELETE starts them over."""
+    permission_classes = [IsAdmin]
+
+    def get(self, request):
+        return Response(metrics.snapshot())
+
+    def delete(self, request):
+        metrics.reset()
+        return Response(status=204)
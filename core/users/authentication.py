@@ -0,0 +1,102 @@
+"""
+Stateless JWT authentication for high-rate endpoints.
+
+``JWTAuthentication`` loads the ``User`` row on every request. Endpoints
+polled by the map (live tracking, map view, tiles) opt into
+``ClaimsJWTAuthentication`` instead, which builds the request user from the
+claims ``CustomTokenObtainPairSerializer`` signs into the token: id, email,
+effective role and group names. Permission checks (``is_admin_email``,
+``role``, ``in_group``) then run without queries.
+
+To still cut off disabled users quickly, each user's current state (active
+flag and the claims a fresh token would carry) is cached for
+JWT_USER_STATE_CACHE_TTL seconds and compared with the token. Saving a user
+or changing their groups drops the entry in this process; other processes
+see the change once their entry expires. A token whose claims no longer
+match is rejected, so the client has to log in again.
+"""
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import User
+from .permissions import effective_role
+
+CLAIMS = (api_settings.USER_ID_CLAIM, "email", "role")
+
+UserState = namedtuple("UserState", "is_active email role groups")
+
+
+def _state_key(user_id):
+    return f"auth-user-state:{user_id}"
+
+
+def user_state(user_id):
+    """Current ``UserState`` of a user (None when deleted), cached briefly."""
+    key = _state_key(user_id)
+    state = cache.get(key)
+    if state is None:
+        user = User.objects.filter(pk=user_id).only("id", "email", "role", "is_active").first()
+        state = False if user is None else UserState(
+            user.is_active,
+            user.email,
+            effective_role(user),
+            tuple(sorted(user.groups.values_list("name", flat=True))),
+        )
+        cache.set(key, state, settings.JWT_USER_STATE_CACHE_TTL)
+    return state or None
+
+
+def forget_user_state(user_id):
+    cache.delete(_state_key(user_id))
+
+
+class ClaimsUser(TokenUser):
+    """Request user backed by token claims; ``role`` is the effective role."""
+
+    @cached_property
+    def id(self):
+        return int(self.token[api_settings.USER_ID_CLAIM])
+
+    @cached_property
+    def email(self):
+        return self.token["email"]
+
+    @cached_property
+    def role(self):
+        return self.token["role"]
+
+    @cached_property
+    def group_names(self):
+        return frozenset(self.token.get("groups", ()))
+
+
+class ClaimsJWTAuthentication(JWTStatelessUserAuthentication):
+    """JWT authentication without a ``User`` query per request."""
+
+    def get_user(self, validated_token):
+        if any(claim not in validated_token for claim in CLAIMS):
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user = ClaimsUser(validated_token)
+        state = user_state(user.id)
+        if state is None or not state.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if (state.email, state.role, state.groups) != (user.email, user.role, tuple(sorted(user.group_names))):
+            raise AuthenticationFailed(_("Token is out of date, log in again"), code="token_outdated")
+        return user
+
+
+class ClaimsJWTScheme(SimpleJWTScheme):
+    """Same bearer token as JWTAuthentication in the API schema."""
+    target_class = "users.authentication.ClaimsJWTAuthentication"
+    name = "jwtClaimsAuth"
@@ -11,6 +11,21 @@ def is_admin_email(user):
     )
 
 
+def effective_role(user):
+    """Role reported to clients: admin-role users other than the admin account act as operators."""
+    if is_admin_email(user):
+        return "admin"
+    return "operator" if user.role == "admin" else user.role
+
+
+def in_group(user, name):
+    """Group membership; stateless token users carry their groups as a claim."""
+    group_names = getattr(user, "group_names", None)
+    if group_names is not None:
+        return name in group_names
+    return user.groups.filter(name=name).exists()
+
+
 class IsAdmin(BasePermission):
     def has_permission(self, request, view):
         return is_admin_email(request.user)
@@ -21,7 +36,7 @@ class IsOperator(BasePermission):
         return (
             request.user
             and request.user.is_authenticated
-            and request.user.groups.filter(name="Operator").exists()
+            and in_group(request.user, "Operator")
         )
 
 
@@ -30,7 +45,7 @@ class IsAnalyst(BasePermission):
         return (
             request.user
             and request.user.is_authenticated
-            and request.user.groups.filter(name="Analyst").exists()
+            and in_group(request.user, "Analyst")
         )
 
 
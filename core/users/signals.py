@@ -0,0 +1,27 @@
+"""
+Drop cached user state (see authentication.py) when a user changes.
+"""
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import forget_user_state
+from .models import User
+
+
+@receiver([post_save, post_delete], sender=User)
+def user_changed(sender, instance, **kwargs):
+    forget_user_state(instance.pk)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def user_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action.startswith("post_"):
+            forget_user_state(instance.pk)
+    elif action == "pre_clear":
+        # A group is being emptied: its members are only known beforehand
+        for user_id in instance.user_set.values_list("pk", flat=True):
+            forget_user_state(user_id)
+    elif action in ("post_add", "post_remove"):
+        for user_id in pk_set:
+            forget_user_state(user_id)
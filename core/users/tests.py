@@ -1,3 +1,108 @@
-from django.test import TestCase
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
 
-# Create your tests here.
+from core import metrics
+
+from .authentication import forget_user_state
+from .models import User
+from .permissions import ADMIN_EMAIL
+from .serializers import CustomTokenObtainPairSerializer
+
+LIVE_URL = "/api/vessels/live-all/"
+
+
+class ClaimsJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("claims@example.com", "pw", role="analyst")
+        self.client = APIClient()
+
+    def get(self, token):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        return self.client.get(LIVE_URL)
+
+    def token(self):
+        return str(CustomTokenObtainPairSerializer.get_token(self.user).access_token)
+
+    def assertRejected(self, response, code):
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data["detail"].code, code)
+
+    def test_deactivated_user_is_rejected_after_forget(self):
+        token = self.token()
+        self.assertEqual(self.get(token).status_code, 200)
+
+        # A queryset update skips the signals; the cached state still says active
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.get(token).status_code, 200)
+        forget_user_state(self.user.pk)
+        self.assertRejected(self.get(token), "user_inactive")
+
+    def test_group_change_makes_token_stale(self):
+        token = self.token()
+        self.assertEqual(self.get(token).status_code, 200)
+
+        self.user.groups.add(Group.objects.create(name="port-ops"))
+        self.assertRejected(self.get(token), "token_outdated")
+        self.assertEqual(self.get(self.token()).status_code, 200)
+
+    def test_role_change_makes_token_stale(self):
+        token = self.token()
+        self.user.role = "operator"
+        self.user.save()
+        self.assertRejected(self.get(token), "token_outdated")
+        self.assertEqual(self.get(self.token()).status_code, 200)
+
+    def test_token_without_claims_is_rejected(self):
+        for missing in ("email", "role"):
+            with self.subTest(missing=missing):
+                token = AccessToken.for_user(self.user)
+                token["email"] = self.user.email
+                token["role"] = "analyst"
+                del token[missing]
+                self.assertRejected(self.get(str(token)), "token_not_valid")
+
+
+class MetricsEndpointTests(TestCase):
+    URL = "/api/metrics/"
+
+    def setUp(self):
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+        self.admin = User.objects.create_user(ADMIN_EMAIL, "pw", role="admin")
+        self.analyst = User.objects.create_user("metrics@example.com", "pw", role="analyst")
+        self.client = APIClient()
+
+    def test_counts_requests_and_queries_per_url_name(self):
+        self.client.force_authenticate(self.analyst)
+        for _ in range(2):
+            self.assertEqual(self.client.get("/api/vessels/").status_code, 200)
+        self.assertEqual(self.client.get("/api/vessels/not-a-vessel/").status_code, 404)
+
+        self.client.force_authenticate(self.admin)
+        endpoints = self.client.get(self.URL).data["endpoints"]
+        listed = endpoints["vessel-list"]
+        self.assertEqual(listed["requests"], 2)
+        self.assertEqual(listed["statuses"], {"2xx": 2})
+        self.assertEqual(listed["queries"]["count"], 2)
+        self.assertGreaterEqual(listed["queries"]["max"], 1)
+        self.assertGreater(listed["db_ms"]["max"], 0)
+        self.assertEqual(listed["response_bytes"]["count"], 2)
+        self.assertEqual(endpoints["vessel-detail"]["statuses"], {"4xx": 1})
+
+        self.assertEqual(self.client.delete(self.URL).status_code, 204)
+        self.assertNotIn("vessel-list", self.client.get(self.URL).data["endpoints"])
+
+    def test_admin_only(self):
+        self.client.force_authenticate(self.analyst)
+        self.assertEqual(self.client.get(self.URL).status_code, 403)
+        self.assertEqual(self.client.delete(self.URL).status_code, 403)
+
+    @override_settings(REQUEST_METRICS_SERVER_TIMING=True)
+    def test_server_timing_header(self):
+        self.client.force_authenticate(self.analyst)
+        response = self.client.get("/api/vessels/")
+        self.assertRegex(response["Server-Timing"], r'^db;dur=[\d.]+;desc="\d+ queries", total;dur=[\d.]+$')
@@ -12,3 +12,8 @@ class VesselAdmin(admin.ModelAdmin):
         "speed",
         "last_updated",
     )
+    readonly_fields = ("position_count", "first_seen", "latest_position")
+
+    def save_model(self, request, obj, form, change):
+        # Only write what the form changed; the position stats belong to vessels.tracking.
+        obj.save(update_fields=form.changed_data if change else None)
@@ -0,0 +1,99 @@
+"""
+Change cursors for incremental map-view and live-tracking updates.
+
+A cursor is ``<change_seq>.<unix_time>``: the vessel change sequence and the
+server time when it was issued. Clients send it back as ``since=`` and get
+only vessels changed after it, plus the ids of vessels that left their
+result set (aged out of the freshness window, moved out of the viewport,
+lost their position, were deleted).
+
+Only vessels that were in the result set when the cursor was issued are
+reported as removed. For a vessel changed since, that state is the first
+``VesselChange`` entry after the cursor (the log keeps each vessel's state
+before every change, and a tombstone on deletion); an unchanged vessel is
+still where it was. The log is kept for VESSEL_CHANGE_CURSOR_MAX_AGE
+seconds (``prune_vessel_changes`` drops older entries), so older cursors
+are rejected and the client reloads in full.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .geo import in_bbox
+from .models import ChangeCounter, Vessel, VesselChange
+
+
+def current_cursor():
+    """Cursor for the current state; read before querying so nothing is skipped."""
+    seq = ChangeCounter.current(Vessel.CHANGE_COUNTER)
+    return f"{seq}.{int(timezone.now().timestamp())}"
+
+
+def parse_cursor(value):
+    """Parse a cursor into (change_seq, issued_at)."""
+    try:
+        seq, issued = value.split('.')
+        return int(seq), datetime.fromtimestamp(int(issued), tz=dt_timezone.utc)
+    except (ValueError, OverflowError, OSError):
+        raise ValidationError({'since': 'Invalid change cursor.'})
+
+
+def _states_at(seq):
+    """``{vessel_id: (latitude, longitude, last_position_update)}`` at ``seq`` for vessels logged since."""
+    states = {}
+    entries = (
+        VesselChange.objects.filter(seq__gt=seq)
+        .order_by('-seq')
+        .values_list('vessel_id', *VesselChange.STATE_FIELDS)
+    )
+    # Newest first, so the entry right after the cursor wins
+    for vessel_id, *state in entries:
+        states[vessel_id] = state
+    return states
+
+
+def changes_since(queryset, cursor, hours, bbox=None):
+    """
+    Split changes since ``cursor`` into upserts and removals.
+
+    ``queryset`` is the live result set (located vessels in ``bbox``...)
+    without the time filter. Returns (changed queryset, removed vessel ids).
+    """
+    seq, issued_at = parse_cursor(cursor)
+    now = timezone.now()
+    if issued_at < now - timedelta(seconds=settings.VESSEL_CHANGE_CURSOR_MAX_AGE):
+        raise ValidationError({'since': 'Change cursor expired; reload without since.'})
+
+    window = timedelta(hours=hours)
+    live_since = now - window
+    live = queryset.filter(last_position_update__gte=live_since)
+    changed = live.filter(change_seq__gt=seq)
+
+    # Changed since the cursor, shown at the time and no longer in the result set
+    shown_since = issued_at - window
+    shown = {
+        vessel_id
+        for vessel_id, (latitude, longitude, updated) in _states_at(seq).items()
+        if updated is not None and updated >= shown_since
+        and (bbox is None or in_bbox(bbox, latitude, longitude))
+    }
+    left = shown - set(changed.values_list('pk', flat=True))
+
+    # Unchanged vessels that were shown at cursor time and have aged out since
+    aged_out = queryset.filter(
+        change_seq__lte=seq,
+        last_position_update__gte=shown_since,
+        last_position_update__lt=live_since,
+    )
+
+    removed = sorted(left) + list(aged_out.values_list('pk', flat=True))
+    return changed, removed
+
+
+def prune_changes(now=None):
+    """Drop log entries no unexpired cursor can need; returns how many."""
+    cutoff = (now or timezone.now()) - timedelta(seconds=settings.VESSEL_CHANGE_CURSOR_MAX_AGE)
+    deleted, _ = VesselChange.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,80 @@
+"""
+Grid clustering of vessel positions for zoomed-out map views.
+
+Vessels are binned into a square lat/lon grid whose cell size halves with
+every zoom level, so a cluster covers roughly the same screen area at any
+zoom. All binning is vectorized with NumPy so it stays fast at 100k+ vessels.
+"""
+import numpy as np
+
+# Grid cells per 256px map tile edge (about 64px per cluster)
+CELLS_PER_TILE = 4
+MAX_ZOOM = 20
+
+
+def cell_size(zoom):
+    """Grid cell edge in degrees for a web-map zoom level."""
+    zoom = min(max(int(zoom), 0), MAX_ZOOM)
+    return 360.0 / (2 ** zoom) / CELLS_PER_TILE
+
+
+def _dominant(cluster_index, values, n_clusters):
+    """Most frequent value per cluster."""
+    labels, codes = np.unique(values, return_inverse=True)
+    counts = np.bincount(
+        cluster_index * len(labels) + codes,
+        minlength=n_clusters * len(labels),
+    ).reshape(n_clusters, len(labels))
+    return labels[counts.argmax(axis=1)]
+
+
+def cluster_positions(rows, zoom):
+    """
+    Aggregate ``(latitude, longitude, vessel_type, status)`` rows into grid clusters.
+
+    Returns a list of dicts with the vessel count, centroid, bounds and the
+    dominant type and status of each cluster.
+    """
+    if not rows:
+        return []
+
+    lats, lons, types, statuses = zip(*rows)
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    types = np.asarray([t or 'Other' for t in types], dtype=object)
+    statuses = np.asarray([s or 'active' for s in statuses], dtype=object)
+
+    size = cell_size(zoom)
+    n_cols = int(np.ceil(360.0 / size))
+    n_rows = int(np.ceil(180.0 / size))
+    col = np.clip(np.floor((lons + 180.0) / size).astype(np.int64), 0, n_cols - 1)
+    row = np.clip(np.floor((lats + 90.0) / size).astype(np.int64), 0, n_rows - 1)
+
+    cells, index, counts = np.unique(row * n_cols + col, return_inverse=True, return_counts=True)
+    n_clusters = len(cells)
+
+    lat_centroid = np.bincount(index, weights=lats, minlength=n_clusters) / counts
+    lon_centroid = np.bincount(index, weights=lons, minlength=n_clusters) / counts
+
+    # Per-cluster bounds: sort members by cluster, then reduce each run
+    order = np.argsort(index, kind='stable')
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    south = np.minimum.reduceat(lats[order], starts)
+    north = np.maximum.reduceat(lats[order], starts)
+    west = np.minimum.reduceat(lons[order], starts)
+    east = np.maximum.reduceat(lons[order], starts)
+
+    dominant_type = _dominant(index, types, n_clusters)
+    dominant_status = _dominant(index, statuses, n_clusters)
+
+    return [
+        {
+            'count': int(counts[i]),
+            'latitude': round(float(lat_centroid[i]), 5),
+            'longitude': round(float(lon_centroid[i]), 5),
+            'bounds': [float(west[i]), float(south[i]), float(east[i]), float(north[i])],
+            'vessel_type': dominant_type[i],
+            'status': dominant_status[i],
+        }
+        for i in range(n_clusters)
+    ]
@@ -0,0 +1,170 @@
+"""
+Columnar encoding of fleet payloads for map-view and live-tracking.
+
+Instead of one JSON object per vessel, every field becomes a parallel
+array. Coordinates are quantized to integers (degrees * COORD_SCALE),
+low-cardinality strings are dictionary-encoded and timestamps become
+unix seconds. The same payload is offered as compact JSON or packed into
+a binary buffer of little-endian typed arrays (see pack_columns).
+"""
+import json
+import struct
+
+import numpy as np
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .serializers import status_color
+
+# Quantization: 1e-5 degrees is about 1.1 m at the equator
+COORD_SCALE = 100000
+
+MAGIC = b'VSL1'
+INT32_NULL = -2 ** 31
+
+# (field, encoding) in output order; mirrors VesselMapSerializer
+MAP_COLUMNS = (
+    ('id', 'int'),
+    ('name', 'str'),
+    ('mmsi', 'str'),
+    ('imo_number', 'str'),
+    ('latitude', 'coord'),
+    ('longitude', 'coord'),
+    ('speed', 'float'),
+    ('heading', 'int'),
+    ('status', 'dict'),
+    ('vessel_type', 'dict'),
+    ('type', 'dict'),
+    ('destination', 'str'),
+    ('data_source', 'dict'),
+)
+
+# Mirrors VesselLiveSerializer
+LIVE_COLUMNS = (
+    ('id', 'int'),
+    ('name', 'str'),
+    ('imo_number', 'str'),
+    ('mmsi', 'str'),
+    ('latitude', 'coord'),
+    ('longitude', 'coord'),
+    ('speed', 'float'),
+    ('course', 'float'),
+    ('heading', 'int'),
+    ('status', 'dict'),
+    ('vessel_type', 'dict'),
+    ('type', 'dict'),
+    ('flag', 'dict'),
+    ('last_updated', 'time'),
+    ('last_position_update', 'time'),
+    ('data_source', 'dict'),
+)
+
+# Fleet snapshot rows (see vessels/snapshots.py)
+SNAPSHOT_COLUMNS = (
+    ('id', 'int'),
+    ('name', 'str'),
+    ('mmsi', 'str'),
+    ('vessel_type', 'dict'),
+    ('latitude', 'coord'),
+    ('longitude', 'coord'),
+    ('speed', 'float'),
+    ('course', 'float'),
+    ('heading', 'int'),
+    ('timestamp', 'time'),
+)
+
+# Binary dtype and null sentinel per encoding; 'str' columns stay in the header
+BINARY_TYPES = {
+    'int': ('<i4', INT32_NULL),
+    'coord': ('<i4', INT32_NULL),
+    'float': ('<f4', np.nan),
+    'dict': ('<i2', -1),
+    'time': ('<f8', np.nan),
+}
+
+
+def column_names(columns):
+    return [name for name, _ in columns]
+
+
+def _encode(kind, values):
+    if kind == 'coord':
+        return np.rint(np.asarray(values, dtype=np.float64) * COORD_SCALE).astype(np.int64).tolist(), None
+    if kind == 'float':
+        return [None if v is None else round(float(v), 1) for v in values], None
+    if kind == 'time':
+        return [None if v is None else int(v.timestamp()) for v in values], None
+    if kind == 'dict':
+        lookup = {}
+        codes = [lookup.setdefault(v, len(lookup)) for v in values]
+        return codes, list(lookup)
+    return list(values), None
+
+
+def encode_columns(rows, columns):
+    """
+    Encode ``values_list`` rows (in ``column_names(columns)`` order) as a columnar dict.
+
+    Coordinates must be non-null; the fleet endpoints filter those out.
+    """
+    rows = list(rows)
+    transposed = list(zip(*rows)) if rows else [()] * len(columns)
+
+    encoded = {}
+    dictionaries = {}
+    for (name, kind), values in zip(columns, transposed):
+        encoded[name], dictionary = _encode(kind, values)
+        if dictionary is not None:
+            dictionaries[name] = dictionary
+
+    if 'status' in dictionaries:
+        dictionaries['status_color'] = [status_color(s) for s in dictionaries['status']]
+
+    return {
+        'format': 'columnar',
+        'length': len(rows),
+        'scale': COORD_SCALE,
+        'encodings': dict(columns),
+        'columns': encoded,
+        'dictionaries': dictionaries,
+    }
+
+
+def pack_columns(payload):
+    """
+    Pack a columnar payload into bytes.
+
+    Layout: ``VSL1``, uint32 header length, UTF-8 JSON header, then one
+    8-byte aligned little-endian typed array per numeric column. The header
+    holds everything else (string columns, dictionaries, envelope fields)
+    plus ``buffers``: name, dtype, byte offset from the start of the data
+    section and the null sentinel.
+    """
+    header = {key: value for key, value in payload.items() if key != 'columns'}
+    header['strings'] = {}
+    header['buffers'] = []
+
+    chunks = []
+    offset = 0
+    for name, values in payload['columns'].items():
+        kind = payload['encodings'][name]
+        if kind not in BINARY_TYPES:
+            header['strings'][name] = values
+            continue
+
+        dtype, null = BINARY_TYPES[kind]
+        if None in values:
+            values = [null if v is None else v for v in values]
+        data = np.asarray(values, dtype=dtype).tobytes()
+        pad = -len(data) % 8
+        chunks.append(data + b'\0' * pad)
+        header['buffers'].append({
+            'name': name,
+            'dtype': np.dtype(dtype).name,
+            'offset': offset,
+            'null': None if null is np.nan else null,
+        })
+        offset += len(data) + pad
+
+    header_bytes = json.dumps(header, cls=DjangoJSONEncoder, separators=(',', ':')).encode()
+    header_bytes += b' ' * (-(len(header_bytes) + 8) % 8)
+    return MAGIC + struct.pack('<I', len(header_bytes)) + header_bytes + b''.join(chunks)
@@ -0,0 +1,119 @@
+"""
+Conditional GET (ETag / Last-Modified) for fleet endpoints.
+
+Validators are derived from ChangeCounter watermarks plus a coarse time
+bucket (freshness windows such as "active in the last hour" move even when
+nothing is written). A matching If-None-Match or If-Modified-Since is
+answered with 304 after a single lookup on the counter table, before the
+view touches any vessel data.
+"""
+import hashlib
+import math
+import time
+from datetime import datetime, timezone as dt_timezone
+from functools import wraps
+
+from django.conf import settings
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import ChangeCounter
+
+
+def regions_for_bbox(bbox):
+    """Region watermark names overlapping a (west, south, east, north) bbox"""
+    west, south, east, north = bbox
+    size = settings.WATERMARK_REGION_SIZE
+    spans = [(west, east)] if west <= east else [(west, 180.0), (-180.0, east)]
+
+    rows = range(math.floor((south + 90) / size), math.floor((north + 90) / size) + 1)
+    names = []
+    for span_west, span_east in spans:
+        cols = range(math.floor((span_west + 180) / size), math.floor((span_east + 180) / size) + 1)
+        names.extend(f"region:{row}:{col}" for row in rows for col in cols)
+    return names
+
+
+def validators(request, watermarks):
+    """Return (etag, last_modified) for a request under the given watermarks."""
+    bucket_size = settings.FLEET_ETAG_TIME_BUCKET
+    bucket = int(time.time() // bucket_size)
+
+    counters = dict(
+        (name, (value, updated_at))
+        for name, value, updated_at in ChangeCounter.objects.filter(
+            name__in=watermarks
+        ).values_list('name', 'value', 'updated_at')
+    )
+
+    version = '|'.join([
+        ','.join(f"{name}={counters.get(name, (0,))[0]}" for name in sorted(watermarks)),
+        str(bucket),
+    ])
+    bucket_start = datetime.fromtimestamp(bucket * bucket_size, tz=dt_timezone.utc)
+    last_modified = max([bucket_start, *(updated_at for _, updated_at in counters.values())])
+    return request_etag(request, version), last_modified
+
+
+def request_etag(request, version):
+    """ETag of a request's representation at a data ``version``."""
+    renderer = getattr(request, 'accepted_renderer', None)
+    key = '|'.join([
+        request.path,
+        request.META.get('QUERY_STRING', ''),
+        getattr(renderer, 'format', '') or '',
+        version,
+    ])
+    return '"%s"' % hashlib.sha1(key.encode()).hexdigest()
+
+
+def _not_modified(request, etag, last_modified):
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        return etag in parse_etags(if_none_match) or if_none_match.strip() == '*'
+
+    if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    if if_modified_since is not None:
+        return int(last_modified.timestamp()) <= if_modified_since
+    return False
+
+
+def conditional_fleet(watermarks=None, version=None):
+    """
+    Decorate a DRF view method with ETag / Last-Modified handling.
+
+    ``watermarks`` is a list of ChangeCounter names, or a callable taking
+    the request and returning one (e.g. regions of the requested bbox).
+    Views that cache their data under their own key pass ``version``
+    instead: a callable returning ``(version, last_modified)``, so the
+    ETag moves exactly when that key does. It is available to the view as
+    ``self.fleet_version``.
+    """
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            if version is not None:
+                self.fleet_version, last_modified = version()
+                etag = request_etag(request, self.fleet_version)
+            else:
+                names = watermarks(request) if callable(watermarks) else watermarks
+                etag, last_modified = validators(request, names)
+            # Also a cache key for views that cache their rendered output
+            self.fleet_etag = etag
+            headers = {
+                'ETag': etag,
+                'Last-Modified': http_date(last_modified.timestamp()),
+                'Cache-Control': 'no-cache',
+            }
+
+            if _not_modified(request, etag, last_modified):
+                return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+            response = view_method(self, request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                for header, value in headers.items():
+                    response[header] = value
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,109 @@
+"""
+Traffic density grids from position history.
+
+Position reports in a bbox and time range are counted into an equirectangular
+grid with np.histogram2d, one chunk of coordinates at a time, so the full
+history is never held in memory. Grids for time ranges that have already
+ended are cached; open ranges are recomputed on each request.
+"""
+import hashlib
+import struct
+import zlib
+from datetime import timedelta
+from itertools import islice
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .geo import bbox_q
+from .models import VesselPosition
+
+CHUNK_SIZE = 50000
+
+
+def grid_shape(bbox, width):
+    """(width, height) in cells; cells are square in degrees."""
+    west, south, east, north = bbox
+    lon_span = (east - west) % 360 or 360.0
+    height = max(1, round(width * (north - south) / lon_span))
+    return width, min(height, settings.VESSEL_DENSITY_MAX_RESOLUTION)
+
+
+def compute_density(bbox, start, end, width, height, vessel_types=None):
+    """
+    Count position reports per cell.
+
+    Returns a (height, width) uint32 array; row 0 is the northern edge.
+    """
+    west, south, east, north = bbox
+    # An antimeridian-crossing box is counted on a continuous 0..360 offset axis
+    lon_span = (east - west) % 360 or 360.0
+
+    positions = VesselPosition.objects.filter(bbox_q(bbox), timestamp__gte=start, timestamp__lt=end)
+    if vessel_types:
+        positions = positions.filter(vessel__vessel_type__in=vessel_types)
+    rows = positions.values_list('longitude', 'latitude').iterator(chunk_size=CHUNK_SIZE)
+
+    grid = np.zeros((height, width), dtype=np.uint32)
+    while True:
+        chunk = list(islice(rows, CHUNK_SIZE))
+        if not chunk:
+            break
+        coordinates = np.asarray(chunk, dtype=np.float64)
+        offsets = (coordinates[:, 0] - west) % 360
+        counts, _, _ = np.histogram2d(
+            coordinates[:, 1], offsets,
+            bins=(height, width),
+            range=((south, north), (0.0, lon_span)),
+        )
+        grid += counts.astype(np.uint32)
+    return grid[::-1]
+
+
+def density_grid(bbox, start, end, width, height, vessel_types=None):
+    """compute_density, cached when the time range has already ended."""
+    closed = end <= timezone.now() - timedelta(seconds=settings.VESSEL_DENSITY_CLOSED_AFTER)
+    if not closed:
+        return compute_density(bbox, start, end, width, height, vessel_types)
+
+    key = 'vessel-density:' + hashlib.sha1(repr((
+        bbox, start.isoformat(), end.isoformat(), width, height, sorted(vessel_types or []),
+    )).encode()).hexdigest()
+    grid = cache.get(key)
+    if grid is None:
+        grid = compute_density(bbox, start, end, width, height, vessel_types)
+        cache.set(key, grid, settings.VESSEL_DENSITY_CACHE_TTL)
+    return grid
+
+
+def _png_chunk(kind, data):
+    return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+
+def density_png(grid):
+    """
+    Render a grid as an RGBA PNG (log scale, transparent where empty).
+
+    Colours run from translucent yellow for sparse cells to opaque red for
+    the busiest cell.
+    """
+    height, width = grid.shape
+    peak = grid.max()
+    level = np.log1p(grid) / np.log1p(peak) if peak else np.zeros(grid.shape)
+
+    pixels = np.zeros((height, width, 4), dtype=np.uint8)
+    pixels[..., 0] = 255
+    pixels[..., 1] = np.rint(220 * (1 - level))
+    pixels[..., 3] = np.where(grid > 0, np.rint(90 + 165 * level), 0)
+
+    # Each scanline starts with filter type 0 (None)
+    raw = np.concatenate([np.zeros((height, 1), dtype=np.uint8), pixels.reshape(height, -1)], axis=1)
+    header = struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)
+    return (
+        b'\x89PNG\r\n\x1a\n'
+        + _png_chunk(b'IHDR', header)
+        + _png_chunk(b'IDAT', zlib.compress(raw.tobytes(), 6))
+        + _png_chunk(b'IEND', b'')
+    )
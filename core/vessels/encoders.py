@@ -0,0 +1,148 @@
+"""
+Row encoders for read-only vessel endpoints.
+
+Instead of building model instances and running a ModelSerializer per row,
+endpoints fetch ``values_list`` tuples in the serializer's field order and
+build output dicts with an encoder compiled once per serializer. The output
+is identical to the serializer's (see RowEncoderTests). The current
+timezone for datetime fields is looked up once per batch of rows instead of
+once per value, which is where most of the serializer's time goes.
+
+``json_array_chunks`` turns an iterator of rows into a streamed JSON array
+with the same formatting as DRF's JSONRenderer.
+"""
+from functools import lru_cache
+from itertools import islice
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+# Rows encoded per streamed chunk
+STREAM_BATCH = 1000
+
+# Field classes whose to_representation returns database values unchanged
+_PASSTHROUGH_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.FloatField,
+    serializers.IntegerField,
+)
+
+
+def _passthrough(field):
+    if type(field) in _PASSTHROUGH_FIELDS:
+        return True
+    # Choice values are looked up by str(); string keys come back unchanged
+    return type(field) is serializers.ChoiceField and all(isinstance(key, str) for key in field.choices)
+
+
+def _current_timezone():
+    # DateTimeField.default_timezone()
+    return timezone.get_current_timezone() if settings.USE_TZ else None
+
+
+def _fast_datetime(field):
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    return (
+        type(field) is serializers.DateTimeField
+        and isinstance(output_format, str)
+        and output_format.lower() == ISO_8601
+        and not hasattr(field, 'timezone')
+    )
+
+
+def _datetime_converter(field):
+    """DateTimeField.to_representation with the timezone passed in by the caller."""
+    def convert(value, tz):
+        if (value.tzinfo is None) != (tz is None):
+            # naive value with USE_TZ or aware value without it: rare, let DRF decide
+            return field.to_representation(value)
+        if tz is not None:
+            value = value.astimezone(tz)
+        value = value.isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    return convert
+
+
+@lru_cache(maxsize=256)
+def row_encoder(serializer_class, names=None):
+    """
+    Return ``(fields, encode)`` for a read-only ModelSerializer.
+
+    ``fields`` is the ``values_list`` field order; ``encode(rows)`` returns
+    the serializer's output dicts for an iterable of tuples. ``encode`` is generated
+    once per serializer as straight-line code: plain fields are copied,
+    others go through their field's ``to_representation``. Method fields
+    must be described by the serializer's ``row_derived`` mapping of
+    ``name -> (source field, function of that value)``.
+
+    ``names`` (a tuple, e.g. from ``core.fieldsets.selected_fields``) limits
+    the output, and the columns fetched, to those fields.
+    """
+    serializer_fields = serializer_class().fields
+    if names is not None:
+        serializer_fields = {name: serializer_fields[name] for name in names}
+    derived = {
+        name: entry for name, entry in getattr(serializer_class, 'row_derived', {}).items()
+        if name in serializer_fields
+    }
+
+    fields = [name for name in serializer_fields if name not in derived]
+    fields += [source for source, _ in derived.values() if source not in fields]
+    index = {name: position for position, name in enumerate(fields)}
+
+    namespace = {}
+    items = []
+    for name, field in serializer_fields.items():
+        if name in derived:
+            source, function = derived[name]
+            namespace[f'_derive_{name}'] = function
+            expression = f'_derive_{name}(row[{index[source]}])'
+        elif isinstance(field, serializers.SerializerMethodField):
+            raise ValueError(f'{serializer_class.__name__}.{name} needs a row_derived entry.')
+        elif _passthrough(field):
+            expression = f'row[{index[name]}]'
+        elif _fast_datetime(field):
+            namespace[f'_convert_{name}'] = _datetime_converter(field)
+            value = f'row[{index[name]}]'
+            expression = f'(None if {value} is None else _convert_{name}({value}, tz))'
+        else:
+            namespace[f'_convert_{name}'] = field.to_representation
+            value = f'row[{index[name]}]'
+            expression = f'(None if {value} is None else _convert_{name}({value}))'
+        items.append(f'{name!r}: {expression}')
+
+    namespace['_current_timezone'] = _current_timezone
+    code = (
+        'def encode(rows):\n'
+        '    tz = _current_timezone()\n'
+        '    return [{' + ', '.join(items) + '} for row in rows]\n'
+    )
+    exec(compile(code, f'<row encoder for {serializer_class.__name__}>', 'exec'), namespace)
+    return tuple(fields), namespace['encode']
+
+
+def _json_dumps():
+    # Same options DRF's JSONRenderer uses by default
+    return JSONEncoder(
+        ensure_ascii=not api_settings.UNICODE_JSON,
+        allow_nan=not api_settings.STRICT_JSON,
+        separators=(',', ':') if api_settings.COMPACT_JSON else (', ', ': '),
+    ).encode
+
+
+def json_array_chunks(rows, encode, batch_size=STREAM_BATCH):
+    """Yield a JSON array of ``encode(rows)`` in byte chunks of ``batch_size`` rows."""
+    dumps = _json_dumps()
+    rows = iter(rows)
+    separator = b'['
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+        yield separator + ','.join(map(dumps, encode(batch))).encode()
+        separator = b','
+    yield b']' if separator == b',' else b'[]'
@@ -0,0 +1,50 @@
+"""
+Small geographic helpers shared by the vessel endpoints.
+"""
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+
+
+def parse_bbox(value):
+    """
+    Parse a ``west,south,east,north`` query parameter.
+
+    Returns a (west, south, east, north) tuple, or None when not provided.
+    A west edge greater than the east edge means the box crosses the antimeridian.
+    """
+    if not value:
+        return None
+
+    try:
+        west, south, east, north = (float(part) for part in value.split(','))
+    except ValueError:
+        raise ValidationError({'bbox': 'Expected four numbers: west,south,east,north.'})
+
+    if not (-180 <= west <= 180 and -180 <= east <= 180):
+        raise ValidationError({'bbox': 'Longitudes must be between -180 and 180.'})
+    if not (-90 <= south <= north <= 90):
+        raise ValidationError({'bbox': 'Latitudes must satisfy -90 <= south <= north <= 90.'})
+
+    return west, south, east, north
+
+
+def bbox_q(bbox, lat_field='latitude', lon_field='longitude'):
+    """Build a Q filter selecting points inside the bbox."""
+    west, south, east, north = bbox
+    q = Q(**{f'{lat_field}__gte': south, f'{lat_field}__lte': north})
+
+    if west <= east:
+        return q & Q(**{f'{lon_field}__gte': west, f'{lon_field}__lte': east})
+
+    # Antimeridian crossing: two longitude ranges
+    return q & (Q(**{f'{lon_field}__gte': west}) | Q(**{f'{lon_field}__lte': east}))
+
+
+def in_bbox(bbox, latitude, longitude):
+    """Python counterpart of ``bbox_q`` for a single point."""
+    west, south, east, north = bbox
+    if not south <= latitude <= north:
+        return False
+    if west <= east:
+        return west <= longitude <= east
+    return longitude >= west or longitude <= east
@@ -0,0 +1,348 @@
+"""
+Bulk position ingestion.
+
+A request carries many position reports, each naming its vessel by MMSI or
+IMO number and carrying the time it was observed. Reports are validated
+column-wise: numeric fields become NumPy arrays and each range check is one
+vectorized comparison, with failures collected per report. Valid reports
+are stored in batches of VESSEL_INGEST_BATCH_SIZE, one transaction each:
+positions with ``bulk_create``, then one UPDATE per affected vessel (the
+CASE expressions of ``bulk_update`` cost more to build than they save).
+
+Vessel stats follow ``tracking.record_position``: position_count and
+first_seen always move, while latest_position and the vessel's current
+position only change for a report newer than what is stored, so late
+reports just extend the history. A report repeating a stored (vessel,
+timestamp) is answered as a duplicate and not stored again, which makes
+retrying a request safe. The vessels of a batch are locked before that
+check, and a unique constraint on (vessel, timestamp) backs it.
+"""
+import math
+from collections import defaultdict
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import ChangeCounter, Vessel, VesselChange, VesselPosition, region_counter
+
+NUMERIC_FIELDS = ('latitude', 'longitude', 'speed', 'course', 'heading')
+
+# Inclusive valid ranges
+RANGES = {
+    'latitude': (-90.0, 90.0),
+    'longitude': (-180.0, 180.0),
+    'speed': (0.0, 102.2),
+    'course': (0.0, 360.0),
+    'heading': (0.0, 359.0),
+}
+
+# AIS "not available" values, stored as null
+NOT_AVAILABLE = {'speed': 102.3, 'course': 360.0, 'heading': 511.0}
+
+STATUSES = {value for value, _ in Vessel.STATUS_CHOICES}
+
+# Vessel fields written when a report becomes the current position
+CURRENT_FIELDS = (
+    'latitude', 'longitude', 'speed', 'course', 'heading', 'status',
+    'last_position_update', 'data_source', 'change_seq', 'last_updated', 'updated_at',
+)
+
+
+def _imo_digits(value):
+    value = value.replace(' ', '').upper()
+    return value[3:] if value.startswith('IMO') else value
+
+
+def _timestamp(value):
+    """Epoch seconds from an ISO 8601 string (naive is UTC) or a number of seconds."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        if not math.isfinite(value):
+            raise ValueError
+        return float(value)
+    if not isinstance(value, str):
+        raise ValueError
+    parsed = parse_datetime(value.strip())
+    if parsed is None:
+        raise ValueError
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, dt_timezone.utc)
+    return parsed.timestamp()
+
+
+def _columns(items, now):
+    """Raw items as column arrays; malformed values are recorded in ``errors``."""
+    count = len(items)
+    errors = defaultdict(dict)
+    numbers = {name: np.full(count, np.nan) for name in NUMERIC_FIELDS}
+    stamps = np.full(count, now)
+    mmsis, imos, statuses = [None] * count, [None] * count, [None] * count
+
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors[index]['non_field_errors'] = 'Expected an object.'
+            continue
+
+        for name in NUMERIC_FIELDS:
+            value = item.get(name)
+            if value is None or value == '':
+                continue
+            try:
+                if isinstance(value, bool):
+                    raise ValueError
+                number = float(value)
+                if not math.isfinite(number):
+                    raise ValueError
+            except (TypeError, ValueError):
+                errors[index][name] = 'A valid number is required.'
+                continue
+            numbers[name][index] = number
+
+        value = item.get('timestamp')
+        if value is not None:
+            try:
+                stamps[index] = _timestamp(value)
+            except (OverflowError, ValueError):
+                errors[index]['timestamp'] = 'Expected an ISO 8601 datetime or epoch seconds.'
+
+        mmsi, imo = item.get('mmsi'), item.get('imo')
+        if mmsi is not None:
+            mmsis[index] = str(mmsi).strip() or None
+        if imo is not None:
+            imos[index] = _imo_digits(str(imo)) or None
+        if mmsis[index] is None and imos[index] is None:
+            errors[index]['vessel'] = 'Either mmsi or imo is required.'
+
+        value = item.get('status')
+        if value is not None:
+            if isinstance(value, str) and value in STATUSES:
+                statuses[index] = value
+            else:
+                errors[index]['status'] = f'"{value}" is not a valid choice.'
+
+    return numbers, stamps, mmsis, imos, statuses, errors
+
+
+def _flag(errors, mask, field, message):
+    for index in np.flatnonzero(mask).tolist():
+        if 'non_field_errors' not in errors[index]:
+            errors[index].setdefault(field, message)
+
+
+def validate(items, now=None):
+    """
+    Check raw report dicts. Returns ``(numbers, stamps, mmsis, imos,
+    statuses, errors)``: column arrays indexed like ``items`` and
+    ``{index: {field: message}}`` for the reports that failed.
+    """
+    now = (now or timezone.now()).timestamp()
+    numbers, stamps, mmsis, imos, statuses, errors = _columns(items, now)
+
+    for name in ('latitude', 'longitude'):
+        _flag(errors, np.isnan(numbers[name]), name, 'This field is required.')
+    for name, sentinel in NOT_AVAILABLE.items():
+        numbers[name][numbers[name] == sentinel] = np.nan
+    for name, (low, high) in RANGES.items():
+        values = numbers[name]
+        _flag(errors, (values < low) | (values > high), name, f'Must be between {low:g} and {high:g}.')
+    heading = numbers['heading']
+    _flag(errors, heading % 1 > 0, 'heading', 'A valid integer is required.')
+    _flag(errors, stamps > now + settings.VESSEL_INGEST_MAX_FUTURE, 'timestamp', 'Must not be in the future.')
+    _flag(errors, stamps < 0, 'timestamp', 'Must not be before 1970.')
+
+    return numbers, stamps, mmsis, imos, statuses, errors
+
+
+def resolve_vessels(mmsis, imos, errors, chunk_size=1000):
+    """Vessel id per report (None for failed ones); unknown vessels are added to ``errors``."""
+    wanted_mmsis = sorted({mmsi for mmsi in mmsis if mmsi})
+    wanted_imos = sorted({imo for imo in imos if imo})
+
+    by_mmsi, by_imo = {}, {}
+    for start in range(0, len(wanted_mmsis), chunk_size):
+        by_mmsi.update(
+            Vessel.objects.filter(mmsi__in=wanted_mmsis[start:start + chunk_size]).values_list('mmsi', 'id')
+        )
+    for start in range(0, len(wanted_imos), chunk_size):
+        # imo_number is stored both as "9234567" and "IMO9234567"
+        numbers = [form for imo in wanted_imos[start:start + chunk_size] for form in (imo, f'IMO{imo}')]
+        for imo_number, vessel_id in Vessel.objects.filter(imo_number__in=numbers).values_list('imo_number', 'id'):
+            by_imo[_imo_digits(imo_number)] = vessel_id
+
+    vessel_ids = [None] * len(mmsis)
+    for index, (mmsi, imo) in enumerate(zip(mmsis, imos)):
+        if index in errors:
+            continue
+        from_mmsi = by_mmsi.get(mmsi) if mmsi else None
+        from_imo = by_imo.get(imo) if imo else None
+        if from_mmsi and from_imo and from_mmsi != from_imo:
+            errors[index]['vessel'] = 'mmsi and imo belong to different vessels.'
+        elif from_mmsi or from_imo:
+            vessel_ids[index] = from_mmsi or from_imo
+        else:
+            errors[index]['vessel'] = 'No vessel with this mmsi or imo.'
+    return vessel_ids
+
+
+def _store_batch(reports, data_source):
+    """
+    Store one batch of valid reports (dicts with ``index``, ``vessel_id``
+    and position fields). Returns ``{index: result}``.
+    """
+    results = {}
+    with transaction.atomic():
+        # Locked first, in id order: concurrent batches and record_position()
+        # calls for the same vessels then check for duplicates and update the
+        # stats one after the other
+        locked = list(
+            Vessel.objects.select_for_update(of=('self',)).select_related('latest_position')
+            .filter(pk__in={report['vessel_id'] for report in reports})
+            .order_by('pk')
+            .only(
+                'id', *Vessel.POSITION_STATS_FIELDS, 'latest_position__timestamp',
+                *(name for name in CURRENT_FIELDS if name not in ('last_updated', 'updated_at')),
+            )
+        )
+
+        def stored_positions():
+            return {
+                (vessel_id, stamp): pk
+                for pk, vessel_id, stamp in VesselPosition.objects.filter(
+                    vessel_id__in={report['vessel_id'] for report in reports},
+                    timestamp__in={report['timestamp'] for report in reports},
+                ).values_list('id', 'vessel_id', 'timestamp')
+            }
+
+        stored = stored_positions()
+        new, repeated = [], []
+        seen = set()
+        for report in reports:
+            key = (report['vessel_id'], report['timestamp'])
+            (repeated if key in stored or key in seen else new).append(report)
+            seen.add(key)
+
+        # The unique (vessel, timestamp) constraint backs the check above for
+        # writers that don't take the vessel lock; rows skipped on conflict
+        # get no pk, so ids are read back
+        VesselPosition.objects.bulk_create([
+            VesselPosition(
+                vessel_id=report['vessel_id'],
+                latitude=report['latitude'],
+                longitude=report['longitude'],
+                speed=report['speed'],
+                course=report['course'],
+                heading=report['heading'],
+                timestamp=report['timestamp'],
+                data_source=data_source,
+            )
+            for report in new
+        ], ignore_conflicts=True)
+        if new:
+            stored = stored_positions()
+
+        by_vessel = defaultdict(list)
+        for report in new:
+            report['position'] = stored[(report['vessel_id'], report['timestamp'])]
+            by_vessel[report['vessel_id']].append(report)
+            results[report['index']] = {
+                'index': report['index'], 'status': 'created',
+                'vessel': report['vessel_id'], 'position': report['position'],
+            }
+        for report in repeated:
+            results[report['index']] = {
+                'index': report['index'], 'status': 'duplicate',
+                'vessel': report['vessel_id'], 'position': stored[(report['vessel_id'], report['timestamp'])],
+            }
+        if not by_vessel:
+            return results
+
+        vessels = [vessel for vessel in locked if vessel.pk in by_vessel]
+
+        now = timezone.now()
+        moved, regions, previous = [], set(), {}
+        for vessel in vessels:
+            history = sorted(by_vessel[vessel.pk], key=lambda report: (report['timestamp'], report['position']))
+            oldest, newest = history[0], history[-1]
+
+            vessel.position_count += len(history)
+            if vessel.first_seen is None or oldest['timestamp'] < vessel.first_seen:
+                vessel.first_seen = oldest['timestamp']
+            latest = vessel.latest_position
+            # Out-of-order reports must not replace a newer latest position
+            if latest is None or latest.timestamp <= newest['timestamp']:
+                vessel.latest_position_id = newest['position']
+
+            if vessel.last_position_update is not None and vessel.last_position_update > newest['timestamp']:
+                continue
+            regions.add(region_counter(vessel.latitude, vessel.longitude))
+            previous[vessel.pk] = tuple(getattr(vessel, name) for name in VesselChange.STATE_FIELDS)
+            vessel.latitude, vessel.longitude = newest['latitude'], newest['longitude']
+            for name in ('speed', 'course', 'heading', 'status'):
+                if newest[name] is not None:
+                    setattr(vessel, name, newest[name])
+            vessel.last_position_update = newest['timestamp']
+            vessel.data_source = data_source
+            vessel.last_updated = vessel.updated_at = now
+            regions.add(region_counter(vessel.latitude, vessel.longitude))
+            moved.append(vessel)
+
+        if moved:
+            # One block of sequence numbers, committed with the rows
+            last = ChangeCounter.reserve(Vessel.CHANGE_COUNTER, len(moved))
+            for seq, vessel in enumerate(moved, start=last - len(moved) + 1):
+                vessel.change_seq = seq
+            ChangeCounter.mark(regions - {None}, last)
+            VesselChange.log([
+                VesselChange.before(vessel.pk, vessel.change_seq, previous[vessel.pk]) for vessel in moved
+            ])
+
+        # One UPDATE per vessel: bulk_update()'s CASE expressions cost far
+        # more to build than they save in round trips
+        moved = {vessel.pk for vessel in moved}
+        for vessel in vessels:
+            values = {
+                'position_count': vessel.position_count,
+                'first_seen': vessel.first_seen,
+                'latest_position': vessel.latest_position_id,
+            }
+            if vessel.pk in moved:
+                values.update((name, getattr(vessel, name)) for name in CURRENT_FIELDS)
+            Vessel.objects.filter(pk=vessel.pk).update(**values)
+    return results
+
+
+def ingest_positions(items, data_source='api', now=None):
+    """
+    Validate and store position reports. Returns one result per item, in
+    order: ``{'index', 'status': 'created' | 'duplicate', 'vessel',
+    'position'}`` or ``{'index', 'status': 'error', 'errors'}``.
+    """
+    numbers, stamps, mmsis, imos, statuses, errors = validate(items, now)
+    vessel_ids = resolve_vessels(mmsis, imos, errors)
+
+    reports = []
+    for index, vessel_id in enumerate(vessel_ids):
+        if index in errors:
+            continue
+        course, heading, speed = numbers['course'][index], numbers['heading'][index], numbers['speed'][index]
+        reports.append({
+            'index': index,
+            'vessel_id': vessel_id,
+            'timestamp': datetime.fromtimestamp(stamps[index], tz=dt_timezone.utc),
+            'latitude': float(numbers['latitude'][index]),
+            'longitude': float(numbers['longitude'][index]),
+            'speed': None if np.isnan(speed) else float(speed),
+            'course': None if np.isnan(course) else Decimal(f'{course:.2f}'),
+            'heading': None if np.isnan(heading) else int(heading),
+            'status': statuses[index],
+        })
+
+    results = {index: {'index': index, 'status': 'error', 'errors': fields} for index, fields in errors.items()}
+    batch_size = settings.VESSEL_INGEST_BATCH_SIZE
+    for start in range(0, len(reports), batch_size):
+        results.update(_store_batch(reports[start:start + batch_size], data_source))
+    return [results[index] for index in range(len(items))]
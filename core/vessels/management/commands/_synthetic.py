@@ -0,0 +1,40 @@
+"""
+Synthetic fleets for the benchmark commands.
+"""
+import random
+from datetime import timedelta
+
+from django.utils import timezone
+
+from vessels.models import Vessel
+
+
+def synthetic_vessels(count, seed=42, prefix=''):
+    """
+    Unsaved vessels with realistic field distributions (no database needed).
+
+    Use a ``prefix`` to keep MMSI/IMO unique when bulk-inserting next to real data.
+    """
+    rnd = random.Random(seed)
+    types = [choice for choice, _ in Vessel.VESSEL_TYPES]
+    statuses = ['underway', 'anchored', 'moored', 'active', 'inactive']
+    now = timezone.now()
+    return [
+        Vessel(
+            id=i + 1,
+            name=f"VESSEL {i:06d}",
+            mmsi=f"{prefix}{200000000 + i}",
+            imo_number=f"{prefix}IMO{9000000 + i}",
+            latitude=rnd.uniform(-60, 70),
+            longitude=rnd.uniform(-180, 180),
+            speed=round(rnd.uniform(0, 25), 1),
+            heading=rnd.randrange(360),
+            status=rnd.choice(statuses),
+            vessel_type=rnd.choice(types),
+            type=rnd.choice(types).lower(),
+            destination=rnd.choice(['SINGAPORE', 'ROTTERDAM', 'SHANGHAI', None]),
+            data_source='aisstream',
+            last_position_update=now - timedelta(seconds=rnd.randrange(48 * 3600)),
+        )
+        for i in range(count)
+    ]
@@ -0,0 +1,68 @@
+"""
+Compare map-view payload formats: per-vessel JSON vs columnar JSON vs binary
+Command: python manage.py benchmark_map_payload --count 10000 100000
+"""
+import gzip
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from vessels.columnar import MAP_COLUMNS, column_names, encode_columns, pack_columns
+from vessels.renderers import ColumnarJSONRenderer
+from vessels.serializers import VesselMapSerializer
+
+from ._synthetic import synthetic_vessels
+
+
+class Command(BaseCommand):
+    help = "Benchmark map-view payload size and serialize time for each wire format"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--count',
+            type=int,
+            nargs='+',
+            default=[10000, 100000],
+            help='Fleet sizes to benchmark (default: 10000 100000)',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help='Runs per format; the best time is reported (default: 3)',
+        )
+
+    def _best(self, func, repeat):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return result, best
+
+    def handle(self, *args, **options):
+        names = column_names(MAP_COLUMNS)
+
+        for count in options['count']:
+            vessels = synthetic_vessels(count)
+            # What values_list() would return for the columnar path
+            rows = [tuple(getattr(v, name) for name in names) for v in vessels]
+
+            formats = [
+                ('json (VesselMapSerializer)',
+                 lambda: JSONRenderer().render(VesselMapSerializer(vessels, many=True).data)),
+                ('columnar json',
+                 lambda: ColumnarJSONRenderer().render(encode_columns(rows, MAP_COLUMNS))),
+                ('columnar binary',
+                 lambda: pack_columns(encode_columns(rows, MAP_COLUMNS))),
+            ]
+
+            self.stdout.write(self.style.SUCCESS(f'\n📦 {count} vessels'))
+            self.stdout.write(f"  {'format':<28}{'bytes':>12}{'gzip bytes':>12}{'ms':>10}")
+            for label, func in formats:
+                body, seconds = self._best(func, options['repeat'])
+                self.stdout.write(
+                    f'  {label:<28}{len(body):>12,}{len(gzip.compress(body)):>12,}{seconds * 1000:>10.1f}'
+                )
@@ -0,0 +1,78 @@
+"""
+Benchmark the fleet serializers against the compiled row encoders
+Command: python manage.py benchmark_row_encoder --count 10000 100000
+
+Synthetic vessels are inserted inside a transaction that is rolled back.
+Each scenario includes the query and JSON rendering, as in the endpoints.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from vessels.encoders import row_encoder
+from vessels.models import Vessel
+from vessels.serializers import VesselLiveSerializer, VesselMapSerializer
+
+from ._synthetic import synthetic_vessels
+
+
+class Command(BaseCommand):
+    help = "Benchmark VesselLiveSerializer / VesselMapSerializer against the values_list row encoders"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--count',
+            type=int,
+            nargs='+',
+            default=[10000, 100000],
+            help='Fleet sizes to benchmark (default: 10000 100000)',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help='Runs per scenario; the best time is reported (default: 3)',
+        )
+
+    def _best(self, func, repeat):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return result, best
+
+    def handle(self, *args, **options):
+        renderer = JSONRenderer()
+
+        for count in options['count']:
+            with transaction.atomic():
+                vessels = synthetic_vessels(count, prefix='BENCH')
+                for vessel in vessels:
+                    vessel.id = None
+                Vessel.objects.bulk_create(vessels, batch_size=2000)
+                queryset = Vessel.objects.filter(mmsi__startswith='BENCH')
+
+                self.stdout.write(self.style.SUCCESS(f'\n⚡ {count} vessels'))
+                self.stdout.write(f"  {'serializer':<24}{'DRF ms':>10}{'encoder ms':>12}{'speedup':>10}")
+                for serializer_class in (VesselLiveSerializer, VesselMapSerializer):
+                    fields, encode = row_encoder(serializer_class)
+                    drf_body, drf_seconds = self._best(
+                        lambda: renderer.render(serializer_class(queryset, many=True).data),
+                        options['repeat'],
+                    )
+                    fast_body, fast_seconds = self._best(
+                        lambda: renderer.render(encode(queryset.values_list(*fields))),
+                        options['repeat'],
+                    )
+                    self.stdout.write(
+                        f'  {serializer_class.__name__:<24}{drf_seconds * 1000:>10.1f}'
+                        f'{fast_seconds * 1000:>12.1f}{drf_seconds / fast_seconds:>9.1f}x'
+                    )
+                    if drf_body != fast_body:
+                        self.stdout.write(self.style.ERROR('  Output differs from the DRF serializer!'))
+
+                transaction.set_rollback(True)
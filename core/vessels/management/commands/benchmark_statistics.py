@@ -0,0 +1,88 @@
+"""
+Benchmark the statistics endpoint: legacy per-bucket COUNTs vs single-pass aggregate
+Command: python manage.py benchmark_statistics --count 100000
+
+Synthetic vessels are inserted inside a transaction that is rolled back.
+"""
+import time
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from ports.models import Port
+from vessels.models import Vessel
+from vessels.statistics import STATUSES, VESSEL_TYPES, fleet_statistics
+
+from ._synthetic import synthetic_vessels
+
+
+def legacy_statistics():
+    """The previous implementation: one COUNT per window, status and type"""
+    now = timezone.now()
+    return {
+        'total_vessels': Vessel.objects.count(),
+        'total_ports': Port.objects.count(),
+        'active_1h': Vessel.objects.filter(last_position_update__gte=now - timedelta(hours=1)).count(),
+        'active_24h': Vessel.objects.filter(last_position_update__gte=now - timedelta(hours=24)).count(),
+        'by_status': {s: c for s in STATUSES if (c := Vessel.objects.filter(status=s).count())},
+        'by_type': {t: c for t in VESSEL_TYPES if (c := Vessel.objects.filter(vessel_type=t).count())},
+    }
+
+
+class Command(BaseCommand):
+    help = "Benchmark cold and warm statistics requests against the legacy query pattern"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--count',
+            type=int,
+            default=100000,
+            help='Synthetic vessels to insert (default: 100000)',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Runs per scenario; the best time is reported (default: 5)',
+        )
+
+    def _measure(self, label, func, repeat, before=None):
+        best = None
+        for _ in range(repeat):
+            if before:
+                before()
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                result = func()
+                elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        self.stdout.write(f'  {label:<32}{len(queries):>8}{best * 1000:>12.2f}')
+        return result
+
+    def handle(self, *args, **options):
+        count = options['count']
+        repeat = options['repeat']
+
+        with transaction.atomic():
+            self.stdout.write(f'Inserting {count} synthetic vessels (rolled back afterwards)...')
+            vessels = synthetic_vessels(count, prefix='BENCH')
+            for vessel in vessels:
+                vessel.id = None
+            Vessel.objects.bulk_create(vessels, batch_size=2000)
+
+            self.stdout.write(self.style.SUCCESS(f'\n📊 statistics at {Vessel.objects.count()} vessels'))
+            self.stdout.write(f"  {'scenario':<32}{'queries':>8}{'ms':>12}")
+            legacy = self._measure('legacy (per-bucket COUNTs)', legacy_statistics, repeat)
+            single = self._measure('single-pass aggregate (cold)', fleet_statistics, repeat, before=cache.clear)
+            self._measure('cached (warm)', fleet_statistics, repeat)
+
+            # Time-window counts drift between runs; compare the rest
+            stable = ('total_vessels', 'total_ports', 'by_status', 'by_type')
+            if any(single[key] != legacy[key] for key in stable):
+                self.stdout.write(self.style.ERROR('  Results differ from the legacy implementation!'))
+
+            transaction.set_rollback(True)
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from vessels.snapshots import update_snapshots
+
+
+class Command(BaseCommand):
+    help = "Take the fleet snapshots due since the last one (see vessels/snapshots.py)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep running and take each snapshot when it is due.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=60.0,
+            help="Seconds to sleep between runs with --loop (default: 60).",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            snapshots = update_snapshots()
+            for snapshot in snapshots:
+                self.stdout.write(self.style.SUCCESS(f"Took {snapshot}."))
+            if not snapshots and not options["loop"]:
+                self.stdout.write("No snapshot due.")
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
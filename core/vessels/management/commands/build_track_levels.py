@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from vessels.track_levels import update_levels
+
+
+class Command(BaseCommand):
+    help = "Build precomputed route levels of detail for days with new positions."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10000,
+            help="New positions handled per batch (default: 10000).",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep running and pick up new positions as they arrive.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=60.0,
+            help="Seconds to sleep between runs with --loop (default: 60).",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options["batch_size"])
+
+        while True:
+            positions = days = 0
+            while True:
+                batch_positions, batch_days = update_levels(batch_size)
+                positions += batch_positions
+                days += batch_days
+                if not batch_positions:
+                    break
+
+            if days or not options["loop"]:
+                self.stdout.write(
+                    self.style.SUCCESS(f"Built track levels for {days} vessel-days ({positions} new positions).")
+                )
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
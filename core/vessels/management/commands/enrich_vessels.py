@@ -122,7 +122,7 @@ class Command(BaseCommand):
             updated = True
         
         if updated:
-            vessel.save()
+            vessel.save(update_fields=Vessel.attribute_fields())
         
         return updated
 
@@ -6,7 +6,10 @@ import csv
 import os
 from django.core.management.base import BaseCommand
 from vessels.models import Vessel
+from vessels.tracking import record_position
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from datetime import timezone as dt_timezone
 
 
 class Command(BaseCommand):
@@ -25,6 +28,17 @@ class Command(BaseCommand):
             help='Clear existing vessels before import',
         )
 
+    @staticmethod
+    def parse_timestamp(value):
+        """Source report time (ISO 8601, naive is UTC), or None."""
+        try:
+            parsed = parse_datetime(value.strip()) if value else None
+        except ValueError:
+            return None
+        if parsed is not None and timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed, dt_timezone.utc)
+        return parsed
+
     def handle(self, *args, **options):
         file_path = options['file']
         if not os.path.exists(file_path):
@@ -126,15 +140,44 @@ class Command(BaseCommand):
                         except (ValueError, TypeError):
                             pass
                     
+                    # Report time from the file when it has one
+                    reported_at = self.parse_timestamp(row.get('timestamp') or row.get('last_position_update'))
+
                     # Set data source
                     vessel_data['data_source'] = 'csv_import'
-                    vessel_data['last_position_update'] = timezone.now()
-                    
+                    vessel_data['last_position_update'] = reported_at or timezone.now()
+
+                    previous = Vessel.objects.filter(mmsi=mmsi).values(
+                        'latitude', 'longitude', 'last_position_update'
+                    ).first()
+
                     # Get or create vessel
                     vessel, created = Vessel.objects.update_or_create(
                         mmsi=mmsi,
                         defaults=vessel_data
                     )
+
+                    # Imported coordinates become part of the position history,
+                    # once per new report: re-importing the same file adds nothing
+                    has_position = 'latitude' in vessel_data and 'longitude' in vessel_data
+                    moved = previous is None or (
+                        (previous['latitude'], previous['longitude'])
+                        != (vessel_data.get('latitude'), vessel_data.get('longitude'))
+                    )
+                    new_report = reported_at is not None and (
+                        previous is None or previous['last_position_update'] != reported_at
+                    )
+                    if has_position and (moved or new_report):
+                        record_position(
+                            vessel,
+                            latitude=vessel.latitude,
+                            longitude=vessel.longitude,
+                            speed=vessel.speed,
+                            course=vessel.course,
+                            heading=vessel.heading,
+                            timestamp=vessel_data['last_position_update'],
+                            data_source='csv_import',
+                        )
                     
                     if created:
                         created_count += 1
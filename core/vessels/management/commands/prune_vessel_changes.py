@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from vessels.changes import prune_changes
+
+
+class Command(BaseCommand):
+    help = "Drop vessel change log entries older than any usable since= cursor (see vessels/changes.py)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep running and prune periodically.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=600.0,
+            help="Seconds to sleep between runs with --loop (default: 600).",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            deleted = prune_changes()
+            self.stdout.write(self.style.SUCCESS(f"Pruned {deleted} change log entries."))
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from vessels.models import Vessel
+from vessels.tracking import refresh_position_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute position_count, first_seen and latest_position from position history."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Vessels recomputed per batch (default: 1000).",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = max(1, options["chunk_size"])
+
+        self.stdout.write(self.style.SUCCESS("Repairing vessel position stats..."))
+
+        repaired = 0
+        last_id = 0
+        while True:
+            ids = list(
+                Vessel.objects.filter(pk__gt=last_id)
+                .order_by("pk")
+                .values_list("pk", flat=True)[:chunk_size]
+            )
+            if not ids:
+                break
+
+            repaired += refresh_position_stats(ids)
+            last_id = ids[-1]
+            self.stdout.write(f"  Repaired {repaired} vessels (up to id {last_id})")
+
+        self.stdout.write(self.style.SUCCESS(f"Done. Repaired {repaired} vessels."))
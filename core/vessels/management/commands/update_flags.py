@@ -25,7 +25,7 @@ class Command(BaseCommand):
 
             vessel.country = country
             vessel.flag = flag
-            vessel.save()
+            vessel.save(update_fields=['country', 'flag'])
 
             self.stdout.write(
                 f"Updated {vessel.name}: {country} {flag}"
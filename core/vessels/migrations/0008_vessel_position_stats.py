@@ -0,0 +1,80 @@
+# Generated by Django 6.0.1 on 2026-10-19 16:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Min, OuterRef, Subquery
+
+
+def backfill_position_stats(apps, schema_editor):
+    Vessel = apps.get_model("vessels", "Vessel")
+    VesselPosition = apps.get_model("vessels", "VesselPosition")
+
+    latest = (
+        VesselPosition.objects.filter(vessel=OuterRef("pk"))
+        .order_by("-timestamp", "-id")
+        .values("pk")[:1]
+    )
+    vessels = (
+        Vessel.objects.filter(positions__isnull=False)
+        .annotate(
+            count=Count("positions"),
+            first=Min("positions__timestamp"),
+            latest_id=Subquery(latest),
+        )
+        .only("id")
+    )
+
+    batch = []
+    for vessel in vessels.iterator(chunk_size=1000):
+        vessel.position_count = vessel.count
+        vessel.first_seen = vessel.first
+        vessel.latest_position_id = vessel.latest_id
+        batch.append(vessel)
+        if len(batch) >= 1000:
+            Vessel.objects.bulk_update(
+                batch, ["position_count", "first_seen", "latest_position"]
+            )
+            batch = []
+    if batch:
+        Vessel.objects.bulk_update(
+            batch, ["position_count", "first_seen", "latest_position"]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("vessels", "0007_alter_vesselposition_latitude_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="vessel",
+            name="first_seen",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="Timestamp of the earliest recorded position",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="vessel",
+            name="latest_position",
+            field=models.ForeignKey(
+                blank=True,
+                help_text="Most recent recorded position",
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="vessels.vesselposition",
+            ),
+        ),
+        migrations.AddField(
+            model_name="vessel",
+            name="position_count",
+            field=models.PositiveIntegerField(
+                default=0, help_text="Number of recorded VesselPosition rows"
+            ),
+        ),
+        migrations.RunPython(backfill_position_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0.1 on 2026-10-19 16:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("vessels", "0008_vessel_position_stats"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChangeCounter",
+            fields=[
+                (
+                    "name",
+                    models.CharField(max_length=50, primary_key=True, serialize=False),
+                ),
+                ("value", models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="vessel",
+            name="change_seq",
+            field=models.BigIntegerField(db_index=True, default=0, editable=False),
+        ),
+    ]
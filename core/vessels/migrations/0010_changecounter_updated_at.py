@@ -0,0 +1,19 @@
+# Generated by Django 6.0.1 on 2026-10-19 16:56
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("vessels", "0009_vessel_change_seq"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="changecounter",
+            name="updated_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 6.0.1 on 2026-10-19 17:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("vessels", "0010_changecounter_updated_at"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="vesselposition",
+            name="vessels_ves_vessel__2ffb7b_idx",
+        ),
+        migrations.AddIndex(
+            model_name="vessel",
+            index=models.Index(
+                fields=["-last_updated", "-id"], name="vessels_ves_last_up_ce8b68_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="vesselposition",
+            index=models.Index(
+                fields=["vessel", "-timestamp", "-id"],
+                name="vessels_ves_vessel__5544b5_idx",
+            ),
+        ),
+    ]
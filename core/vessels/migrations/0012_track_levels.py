@@ -0,0 +1,57 @@
+# Generated by Django 6.0.1 on 2026-10-19 17:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("vessels", "0011_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TrackLevel",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("level", models.PositiveSmallIntegerField()),
+                (
+                    "tolerance",
+                    models.FloatField(help_text="Simplification tolerance in metres"),
+                ),
+                ("position_ids", models.JSONField(default=list)),
+                (
+                    "source_count",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Raw positions simplified"
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "vessel",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="track_levels",
+                        to="vessels.vessel",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("vessel", "level", "day"), name="unique_track_level_day"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 6.0.1 on 2026-10-19 17:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("vessels", "0012_track_levels"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FleetSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("taken_at", models.DateTimeField(unique=True)),
+                ("vessel_count", models.PositiveIntegerField(default=0)),
+                ("data", models.BinaryField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "ordering": ["-taken_at"],
+            },
+        ),
+    ]
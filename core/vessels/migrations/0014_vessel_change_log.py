@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:08
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vessels', '0013_fleet_snapshots'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VesselChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seq', models.BigIntegerField(db_index=True)),
+                ('vessel_id', models.BigIntegerField()),
+                ('latitude', models.FloatField()),
+                ('longitude', models.FloatField()),
+                ('last_position_update', models.DateTimeField(null=True)),
+                ('deleted', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:18
+
+from django.db import migrations
+from django.db.models import Count, F, Min
+
+
+def drop_duplicate_positions(apps, schema_editor):
+    """Keep the first of each (vessel, timestamp) group; the vessel stats follow."""
+    Vessel = apps.get_model("vessels", "Vessel")
+    VesselPosition = apps.get_model("vessels", "VesselPosition")
+
+    groups = (
+        VesselPosition.objects.order_by()
+        .values("vessel_id", "timestamp")
+        .annotate(count=Count("id"), keep=Min("id"))
+        .filter(count__gt=1)
+    )
+    for group in groups.iterator(chunk_size=1000):
+        extra = list(
+            VesselPosition.objects.filter(vessel_id=group["vessel_id"], timestamp=group["timestamp"])
+            .exclude(pk=group["keep"])
+            .values_list("id", flat=True)
+        )
+        Vessel.objects.filter(latest_position_id__in=extra).update(latest_position_id=group["keep"])
+        Vessel.objects.filter(pk=group["vessel_id"]).update(position_count=F("position_count") - len(extra))
+        VesselPosition.objects.filter(pk__in=extra).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vessels', '0014_vessel_change_log'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_positions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # Separate from 0015 so the deletes are committed before the table is
+    # altered (PostgreSQL rejects ALTER TABLE with pending trigger events)
+    dependencies = [
+        ('vessels', '0015_drop_duplicate_positions'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='vesselposition',
+            constraint=models.UniqueConstraint(fields=('vessel', 'timestamp'), name='unique_vessel_position_time'),
+        ),
+    ]
@@ -1,6 +1,72 @@
-from django.db import models
+import math
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import F
 from django.utils import timezone
 
+
+def region_counter(latitude, longitude):
+    """Name of the per-region watermark counter covering a position"""
+    if latitude is None or longitude is None:
+        return None
+    size = settings.WATERMARK_REGION_SIZE
+    return f"region:{math.floor((latitude + 90) / size)}:{math.floor((longitude + 180) / size)}"
+
+
+class ChangeCounter(models.Model):
+    """
+    Named monotonic counters used to sequence changes.
+
+    'vessels' sequences vessel rows (Vessel.change_seq); other counters are
+    watermarks ('ports', 'events', 'region:<row>:<col>') that let read
+    endpoints detect "nothing changed" without touching the data tables.
+    """
+    name = models.CharField(max_length=50, primary_key=True)
+    value = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.name}={self.value}"
+
+    @classmethod
+    def next(cls, name):
+        """Increment and return the counter; the UPDATE lock serializes writers."""
+        with transaction.atomic():
+            counter = cls.objects.filter(name=name)
+            if not counter.update(value=F('value') + 1, updated_at=timezone.now()):
+                cls.objects.get_or_create(name=name)
+                counter.update(value=F('value') + 1, updated_at=timezone.now())
+            return counter.values_list('value', flat=True).get()
+
+    @classmethod
+    def reserve(cls, name, count):
+        """Advance the counter by ``count``; returns the last value of the reserved block."""
+        with transaction.atomic():
+            counter = cls.objects.filter(name=name)
+            if not counter.update(value=F('value') + count, updated_at=timezone.now()):
+                cls.objects.get_or_create(name=name)
+                counter.update(value=F('value') + count, updated_at=timezone.now())
+            return counter.values_list('value', flat=True).get()
+
+    @classmethod
+    def mark(cls, names, value):
+        """Set watermark counters to ``value`` (a 'vessels' sequence number)."""
+        names = set(names)
+        if not names:
+            return
+        now = timezone.now()
+        if cls.objects.filter(name__in=names).update(value=value, updated_at=now) < len(names):
+            cls.objects.bulk_create(
+                [cls(name=name, value=value, updated_at=now) for name in names],
+                ignore_conflicts=True,
+            )
+
+    @classmethod
+    def current(cls, name):
+        return cls.objects.filter(name=name).values_list('value', flat=True).first() or 0
+
+
 class Vessel(models.Model):
     # ========== YOUR EXISTING FIELDS (PRESERVED) ==========
     VESSEL_TYPES = [
@@ -72,17 +138,64 @@ class Vessel(models.Model):
     country = models.CharField(max_length=100, blank=True, null=True)
     flag = models.CharField(max_length=10, blank=True, null=True)
 
+    # ========== POSITION HISTORY STATS (maintained by vessels.tracking) ==========
+    position_count = models.PositiveIntegerField(default=0, help_text="Number of recorded VesselPosition rows")
+    first_seen = models.DateTimeField(null=True, blank=True, help_text="Timestamp of the earliest recorded position")
+    latest_position = models.ForeignKey(
+        'VesselPosition',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        help_text="Most recent recorded position",
+    )
+
+    # Written with targeted UPDATEs only, never by a full save()
+    POSITION_STATS_FIELDS = ('position_count', 'first_seen', 'latest_position')
+
+    # Bumped from the 'vessels' ChangeCounter on every save, for delta feeds
+    change_seq = models.BigIntegerField(default=0, db_index=True, editable=False)
+    CHANGE_COUNTER = 'vessels'
+
     class Meta:
         ordering = ['-last_updated']
         indexes = [
             models.Index(fields=['imo_number']),
             models.Index(fields=['mmsi']),
             models.Index(fields=['-last_position_update']),
+            # Keyset pagination order (VesselViewSet.keyset_ordering)
+            models.Index(fields=['-last_updated', '-id']),
         ]
 
     def __str__(self):
         return f"{self.name} (MMSI: {self.mmsi})"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded region so a move also bumps the region it left
+        instance._loaded_region = region_counter(
+            instance.__dict__.get('latitude'), instance.__dict__.get('longitude')
+        )
+        # ... and the state a save replaces, for the change log
+        if all(name in instance.__dict__ for name in VesselChange.STATE_FIELDS):
+            instance._loaded_state = tuple(instance.__dict__[name] for name in VesselChange.STATE_FIELDS)
+        return instance
+
+    @classmethod
+    def attribute_fields(cls):
+        """Field names for save(update_fields=...) that leave the position stats alone."""
+        return [
+            field.name for field in cls._meta.concrete_fields
+            if not field.primary_key and field.name not in cls.POSITION_STATS_FIELDS
+        ]
+
+    def _previous_state(self):
+        state = getattr(self, '_loaded_state', None)
+        if state is None:
+            state = Vessel.objects.filter(pk=self.pk).values_list(*VesselChange.STATE_FIELDS).first()
+        return state
+
     def save(self, *args, **kwargs):
         # Auto-generate imo_number from MMSI if not provided
         if not self.imo_number and self.mmsi:
@@ -102,8 +215,65 @@ class Vessel(models.Model):
         if self.latitude or self.longitude:
             if not self.last_position_update:
                 self.last_position_update = timezone.now()
-        
-        super().save(*args, **kwargs)
+
+        # Every save bumps change_seq and the modification times, including a
+        # targeted save(update_fields=[...]).
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'change_seq', 'last_updated', 'updated_at'}
+
+        # Commit the sequence number together with the row so a reader never
+        # sees a counter value whose vessel change is not yet visible.
+        with transaction.atomic():
+            previous = None if self._state.adding else self._previous_state()
+            self.change_seq = ChangeCounter.next(self.CHANGE_COUNTER)
+            super().save(*args, **kwargs)
+
+            region = region_counter(self.latitude, self.longitude)
+            regions = {region, getattr(self, '_loaded_region', None)} - {None}
+            ChangeCounter.mark(regions, self.change_seq)
+            if previous is not None:
+                VesselChange.log([VesselChange.before(self.pk, self.change_seq, previous)])
+            self._loaded_region = region
+            self._loaded_state = tuple(getattr(self, name) for name in VesselChange.STATE_FIELDS)
+
+
+class VesselChange(models.Model):
+    """
+    State of a vessel just before the change numbered ``seq``, or before
+    its deletion. The first entry after a cursor tells where the vessel was
+    when the cursor was issued (see vessels/changes.py). Vessels without a
+    position are not logged: they were in no result set.
+    """
+    STATE_FIELDS = ('latitude', 'longitude', 'last_position_update')
+
+    seq = models.BigIntegerField(db_index=True)
+    # Not a foreign key: entries outlive deleted vessels as tombstones
+    vessel_id = models.BigIntegerField()
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+    last_position_update = models.DateTimeField(null=True)
+    deleted = models.BooleanField(default=False)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return f"{self.vessel_id}@{self.seq}{' (deleted)' if self.deleted else ''}"
+
+    @classmethod
+    def before(cls, vessel_id, seq, state, deleted=False):
+        """Entry for a ``STATE_FIELDS`` tuple, or None when it had no position."""
+        latitude, longitude, last_position_update = state
+        if latitude is None or longitude is None:
+            return None
+        return cls(
+            seq=seq, vessel_id=vessel_id, latitude=latitude, longitude=longitude,
+            last_position_update=last_position_update, deleted=deleted,
+        )
+
+    @classmethod
+    def log(cls, entries):
+        entries = [entry for entry in entries if entry is not None]
+        if entries:
+            cls.objects.bulk_create(entries)
 
 
 class VesselPosition(models.Model):
@@ -122,9 +292,53 @@ class VesselPosition(models.Model):
         verbose_name = 'Vessel Position'
         verbose_name_plural = 'Vessel Positions'
         indexes = [
-            models.Index(fields=['vessel', '-timestamp']),
+            models.Index(fields=['vessel', '-timestamp', '-id']),
             models.Index(fields=['-timestamp']),
         ]
+        constraints = [
+            # One report per vessel and instant, so a retried report is never stored twice
+            models.UniqueConstraint(fields=['vessel', 'timestamp'], name='unique_vessel_position_time'),
+        ]
+
+    def __str__(self):
+        return f"{self.vessel.name} at {self.timestamp.strftime('%Y-%m-%d %H:%M:%S')}"
+
+class TrackLevel(models.Model):
+    """
+    One precomputed level of detail of a vessel's track for one UTC day.
+
+    ``position_ids`` are the VesselPosition rows kept when the day's track is
+    simplified at ``tolerance`` metres. Built by vessels/track_levels.py.
+    """
+    vessel = models.ForeignKey(Vessel, on_delete=models.CASCADE, related_name='track_levels')
+    day = models.DateField()
+    level = models.PositiveSmallIntegerField()
+    tolerance = models.FloatField(help_text="Simplification tolerance in metres")
+    position_ids = models.JSONField(default=list)
+    source_count = models.PositiveIntegerField(default=0, help_text="Raw positions simplified")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['vessel', 'level', 'day'], name='unique_track_level_day'),
+        ]
+
+    def __str__(self):
+        return f"{self.vessel_id} {self.day} L{self.level}"
+
+
+class FleetSnapshot(models.Model):
+    """
+    Last known position of every vessel at ``taken_at``, stored as
+    compressed NumPy arrays. Built by vessels/snapshots.py.
+    """
+    taken_at = models.DateTimeField(unique=True)
+    vessel_count = models.PositiveIntegerField(default=0)
+    data = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-taken_at']
 
     def __str__(self):
-        return f"{self.vessel.name} at {self.timestamp.strftime('%Y-%m-%d %H:%M:%S')}"
\ No newline at end of file
+        return f"Fleet snapshot {self.taken_at:%Y-%m-%d %H:%M} ({self.vessel_count} vessels)"
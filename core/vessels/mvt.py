@@ -0,0 +1,215 @@
+"""
+Minimal Mapbox Vector Tile (MVT 2.1) encoder.
+
+Only what the vessel tiles need: point and line features with scalar
+properties, written as protobuf by hand so no protobuf dependency is
+required. Coordinates are projected to Web Mercator tile space, clipped to
+the tile extent plus a buffer and quantized to integers.
+"""
+import math
+import struct
+
+import numpy as np
+
+EXTENT = 4096
+BUFFER = 64
+MAX_LATITUDE = 85.0511287798
+
+POINT = 1
+LINESTRING = 2
+
+_MOVE_TO = 1
+_LINE_TO = 2
+
+
+def tile_bounds(z, x, y):
+    """(west, south, east, north) of an XYZ tile in degrees."""
+    n = 2 ** z
+
+    def lat(row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return x / n * 360.0 - 180.0, lat(y + 1), (x + 1) / n * 360.0 - 180.0, lat(y)
+
+
+def buffered_bounds(z, x, y, buffer=BUFFER, extent=EXTENT):
+    """Tile bounds grown by ``buffer`` pixels, for querying features near the edge."""
+    west, south, east, north = tile_bounds(z, x, y)
+    pad_x = (east - west) * buffer / extent
+    pad_y = (north - south) * buffer / extent
+    return (
+        max(west - pad_x, -180.0),
+        max(south - pad_y, -MAX_LATITUDE),
+        min(east + pad_x, 180.0),
+        min(north + pad_y, MAX_LATITUDE),
+    )
+
+
+def project(lons, lats, z, x, y, extent=EXTENT):
+    """Project degrees to (unrounded) tile pixel coordinates."""
+    n = 2 ** z
+    lons = np.asarray(lons, dtype=np.float64)
+    lats = np.radians(np.clip(np.asarray(lats, dtype=np.float64), -MAX_LATITUDE, MAX_LATITUDE))
+    px = ((lons + 180.0) / 360.0 * n - x) * extent
+    py = ((1.0 - np.log(np.tan(lats) + 1.0 / np.cos(lats)) / math.pi) / 2.0 * n - y) * extent
+    return px, py
+
+
+def clip_line(px, py, buffer=BUFFER, extent=EXTENT):
+    """
+    Clip a projected polyline to the buffered tile box (Liang-Barsky).
+
+    Returns a list of parts, each a list of integer (x, y) vertices with
+    consecutive duplicates removed.
+    """
+    low, high = -buffer, extent + buffer
+    parts = []
+    current = []
+
+    def add(point):
+        point = (int(round(point[0])), int(round(point[1])))
+        if not current or current[-1] != point:
+            current.append(point)
+
+    def flush():
+        if len(current) > 1:
+            parts.append(list(current))
+        current.clear()
+
+    for i in range(len(px) - 1):
+        x0, y0, x1, y1 = px[i], py[i], px[i + 1], py[i + 1]
+        dx, dy = x1 - x0, y1 - y0
+        t0, t1 = 0.0, 1.0
+        for p, q in ((-dx, x0 - low), (dx, high - x0), (-dy, y0 - low), (dy, high - y0)):
+            if p == 0:
+                if q < 0:
+                    t0, t1 = 1.0, 0.0   # parallel to and outside this edge
+                continue
+            if p < 0:
+                t0 = max(t0, q / p)
+            else:
+                t1 = min(t1, q / p)
+
+        if t0 > t1:
+            flush()
+            continue
+        if t0 > 0:
+            flush()     # segment enters the box: start a new part
+        if not current:
+            add((x0 + t0 * dx, y0 + t0 * dy))
+        add((x0 + t1 * dx, y0 + t1 * dy))
+        if t1 < 1:
+            flush()     # segment leaves the box
+
+    flush()
+    return parts
+
+
+# ---- protobuf ----
+
+def _varint(value):
+    out = bytearray()
+    while value > 0x7f:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _zigzag(value):
+    return (value << 1) ^ (value >> 63)
+
+
+def _field(number, payload):
+    """Length-delimited field."""
+    return _varint(number << 3 | 2) + _varint(len(payload)) + payload
+
+
+def _uint_field(number, value):
+    return _varint(number << 3) + _varint(value)
+
+
+def _packed(number, values):
+    return _field(number, b''.join(_varint(v) for v in values))
+
+
+def _encode_value(value):
+    if isinstance(value, bool):
+        return _uint_field(7, int(value))
+    if isinstance(value, int):
+        return _uint_field(6, _zigzag(value))
+    if isinstance(value, float):
+        return _varint(3 << 3 | 1) + struct.pack('<d', value)
+    return _field(1, str(value).encode())
+
+
+def _command(command, count):
+    return (command & 0x7) | (count << 3)
+
+
+def point_geometry(points):
+    """Geometry commands for one or more integer (x, y) points."""
+    commands = [_command(_MOVE_TO, len(points))]
+    cx = cy = 0
+    for x, y in points:
+        commands += [_zigzag(x - cx), _zigzag(y - cy)]
+        cx, cy = x, y
+    return commands
+
+
+def line_geometry(parts):
+    """Geometry commands for a (multi) linestring given as lists of vertices."""
+    commands = []
+    cx = cy = 0
+    for part in parts:
+        (x, y), rest = part[0], part[1:]
+        commands += [_command(_MOVE_TO, 1), _zigzag(x - cx), _zigzag(y - cy)]
+        cx, cy = x, y
+        commands.append(_command(_LINE_TO, len(rest)))
+        for x, y in rest:
+            commands += [_zigzag(x - cx), _zigzag(y - cy)]
+            cx, cy = x, y
+    return commands
+
+
+class Layer:
+    """One named tile layer; properties share deduplicated key/value tables."""
+
+    def __init__(self, name, extent=EXTENT):
+        self.name = name
+        self.extent = extent
+        self.features = []
+        self.keys = {}
+        self.values = {}
+
+    def __len__(self):
+        return len(self.features)
+
+    def add_feature(self, geom_type, geometry, properties=None, feature_id=None):
+        tags = []
+        for key, value in (properties or {}).items():
+            if value is None:
+                continue
+            tags.append(self.keys.setdefault(key, len(self.keys)))
+            tags.append(self.values.setdefault((type(value), value), len(self.values)))
+
+        feature = b''
+        if feature_id is not None:
+            feature += _uint_field(1, feature_id)
+        if tags:
+            feature += _packed(2, tags)
+        feature += _uint_field(3, geom_type) + _packed(4, geometry)
+        self.features.append(feature)
+
+    def encode(self):
+        payload = _uint_field(15, 2) + _field(1, self.name.encode())
+        payload += b''.join(_field(2, feature) for feature in self.features)
+        payload += b''.join(_field(3, key.encode()) for key in self.keys)
+        payload += b''.join(_field(4, _encode_value(value)) for _, value in self.values)
+        payload += _uint_field(5, self.extent)
+        return payload
+
+
+def encode_tile(layers):
+    """Serialize non-empty layers into a vector tile."""
+    return b''.join(_field(3, layer.encode()) for layer in layers if len(layer))
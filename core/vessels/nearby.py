@@ -0,0 +1,199 @@
+"""
+Nearest-vessel and radius queries over current positions.
+
+Located vessels are bucketed into a per-process grid of
+VESSEL_NEARBY_CELL_SIZE degree cells. A radius query only measures the
+vessels in cells overlapping the circle's bounding box (great-circle
+distance, vectorized); a k-nearest query runs radius queries with a
+doubling radius until k vessels are inside, at which point nothing
+outside can be closer.
+
+As with the search index, the grid is built once and then refreshed from
+``Vessel.change_seq``: vessels changed since the last refresh are re-read
+and moved between cells. Deleted vessels are dropped when results are
+loaded from the database. The grid is mutated in place, so every use goes
+through ``nearby_grid()``, which holds the process-wide lock for the
+refresh and the query alike.
+"""
+import math
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+import numpy as np
+from django.conf import settings
+
+from .models import ChangeCounter, Vessel
+
+EARTH_RADIUS_KM = 6371.0088
+HALF_CIRCUMFERENCE_KM = math.pi * EARTH_RADIUS_KM
+
+INDEX_FIELDS = ('id', 'latitude', 'longitude', 'vessel_type', 'status', 'last_position_update')
+
+
+def distances_km(lat, lon, lats, lons):
+    """Great-circle (haversine) distances from one point to arrays of points."""
+    lat1, lon1 = math.radians(lat), math.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def bearings(lat, lon, lats, lons):
+    """Initial great-circle bearings in degrees (0 = north, clockwise)."""
+    lat1, lon1 = math.radians(lat), math.radians(lon)
+    lat2, dlon = np.radians(lats), np.radians(lons) - lon1
+    x = np.sin(dlon) * np.cos(lat2)
+    y = math.cos(lat1) * np.sin(lat2) - math.sin(lat1) * np.cos(lat2) * np.cos(dlon)
+    return np.degrees(np.arctan2(x, y)) % 360.0
+
+
+class VesselGrid:
+    """Current vessel positions bucketed by lat/lon grid cell."""
+
+    def __init__(self, rows, seq, cell_size):
+        self.seq = seq
+        self.cell_size = cell_size
+        self.columns = math.ceil(360.0 / cell_size)
+        self.cells = defaultdict(set)
+        self.vessels = {}   # id -> (lat, lon, vessel_type, status, last_position_update)
+        self.update(rows)
+
+    def __len__(self):
+        return len(self.vessels)
+
+    def _cell(self, lat, lon):
+        return (
+            math.floor((lat + 90.0) / self.cell_size),
+            math.floor((lon + 180.0) / self.cell_size) % self.columns,
+        )
+
+    def _discard(self, vessel_id):
+        entry = self.vessels.pop(vessel_id, None)
+        if entry is not None:
+            cell = self._cell(entry[0], entry[1])
+            bucket = self.cells[cell]
+            bucket.discard(vessel_id)
+            if not bucket:
+                del self.cells[cell]
+
+    def update(self, rows):
+        """Apply vessels ``INDEX_FIELDS`` rows; vessels without a position leave the grid."""
+        for vessel_id, lat, lon, vessel_type, status, updated in rows:
+            self._discard(vessel_id)
+            if lat is None or lon is None:
+                continue
+            self.vessels[vessel_id] = (lat, lon, vessel_type, status, updated)
+            self.cells[self._cell(lat, lon)].add(vessel_id)
+
+    def remove(self, vessel_ids):
+        for vessel_id in vessel_ids:
+            self._discard(vessel_id)
+
+    def _cells_within(self, lat, lon, radius_km):
+        """Cells overlapping the bounding box of a circle, or None for all of them."""
+        angle = math.degrees(radius_km / EARTH_RADIUS_KM)
+        south, north = lat - angle, lat + angle
+        if south <= -90.0 or north >= 90.0:
+            return None     # the circle covers a pole: every longitude
+        half_width = math.degrees(math.asin(min(1.0, math.sin(math.radians(angle)) / math.cos(math.radians(lat)))))
+        if half_width >= 180.0 or 2 * half_width / self.cell_size >= self.columns - 1:
+            return None
+
+        row_min, col_min = self._cell(south, lon - half_width)
+        row_max, _ = self._cell(north, lon)
+        span = math.floor((lon + half_width + 180.0) / self.cell_size) - math.floor((lon - half_width + 180.0) / self.cell_size)
+        count = (row_max - row_min + 1) * (span + 1)
+        if count > len(self.cells):
+            return None     # cheaper to walk the occupied cells
+        return [
+            (row, (col_min + offset) % self.columns)
+            for row in range(row_min, row_max + 1)
+            for offset in range(span + 1)
+        ]
+
+    def _measure(self, lat, lon, radius_km, accept):
+        """Candidate ids around a point and their distances."""
+        cells = self._cells_within(lat, lon, radius_km)
+        buckets = self.cells.values() if cells is None else (self.cells.get(cell, ()) for cell in cells)
+        ids = [
+            vessel_id for bucket in buckets for vessel_id in bucket
+            if accept is None or accept(self.vessels[vessel_id])
+        ]
+        if not ids:
+            return ids, np.empty(0)
+        positions = np.array([self.vessels[vessel_id][:2] for vessel_id in ids], dtype=np.float64)
+        return ids, distances_km(lat, lon, positions[:, 0], positions[:, 1])
+
+    def within(self, lat, lon, radius_km, accept=None):
+        """``[(distance_km, vessel_id)]`` inside the radius, nearest first."""
+        ids, distances = self._measure(lat, lon, radius_km, accept)
+        inside = np.flatnonzero(distances <= radius_km)
+        inside = inside[np.argsort(distances[inside], kind='stable')]
+        return [(float(distances[i]), ids[i]) for i in inside.tolist()]
+
+    def count_within(self, lat, lon, radius_km, accept=None):
+        """Number of vessels inside the radius."""
+        _, distances = self._measure(lat, lon, radius_km, accept)
+        return int(np.count_nonzero(distances <= radius_km))
+
+    def nearest(self, lat, lon, k, accept=None, max_radius_km=HALF_CIRCUMFERENCE_KM):
+        """The ``k`` nearest vessels as ``[(distance_km, vessel_id)]``."""
+        # Half the circumference already covers the globe (also catches inf / NaN)
+        if not max_radius_km < HALF_CIRCUMFERENCE_KM:
+            max_radius_km = HALF_CIRCUMFERENCE_KM
+        radius = min(self.cell_size * 111.2, max_radius_km)
+        while True:
+            found = self.within(lat, lon, radius, accept)
+            # Everything closer than ``radius`` is in ``found``
+            if len(found) >= k or radius >= max_radius_km:
+                return found[:k]
+            radius = min(radius * 2, max_radius_km)
+
+
+_grid = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def _load(since=None):
+    vessels = Vessel.objects.all() if since is None else Vessel.objects.filter(change_seq__gt=since)
+    return list(vessels.values_list(*INDEX_FIELDS))
+
+
+def _refresh():
+    """Build or refresh the process-wide grid; the caller holds ``_lock``."""
+    global _grid, _checked_at
+    now = time.monotonic()
+    if _grid is not None and now - _checked_at < settings.VESSEL_NEARBY_REFRESH_INTERVAL:
+        return _grid
+    _checked_at = now
+
+    seq = ChangeCounter.current(Vessel.CHANGE_COUNTER)
+    # A counter behind the grid means the database was replaced
+    if _grid is None or seq < _grid.seq:
+        _grid = VesselGrid(_load(), seq, settings.VESSEL_NEARBY_CELL_SIZE)
+    elif seq > _grid.seq:
+        _grid.update(_load(since=_grid.seq))
+        _grid.seq = seq
+    return _grid
+
+
+@contextmanager
+def nearby_grid():
+    """
+    The process-wide grid, built on first use and refreshed from
+    ``change_seq`` at most every VESSEL_NEARBY_REFRESH_INTERVAL seconds.
+    Held under the lock for the whole ``with`` block; keep database reads
+    outside it.
+    """
+    with _lock:
+        yield _refresh()
+
+
+def reset_grid():
+    """Drop the process-wide grid (tests, management commands)."""
+    global _grid, _checked_at
+    with _lock:
+        _grid, _checked_at = None, 0.0
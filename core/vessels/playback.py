@@ -0,0 +1,188 @@
+"""
+Traffic playback: vessel positions at evenly spaced frame times.
+
+Positions reported inside a bbox during a time window are fetched once
+into arrays sorted by (vessel, time). For every (vessel, frame) pair the
+surrounding reports are found with a single ``np.searchsorted`` on a
+vessel-offset time axis, and the position is interpolated along the great
+circle between them. Pairs whose surrounding reports are more than
+``max_gap`` seconds apart are left out, so vessels vanish during long
+reporting gaps instead of sliding across land.
+
+Frames are computed in blocks and streamed as NDJSON: a header line with
+the vessels, then one line per frame with parallel ``ids`` / ``lat`` /
+``lon`` arrays.
+"""
+import json
+from datetime import datetime, timezone as dt_timezone
+from itertools import islice
+
+import numpy as np
+
+from .geo import bbox_q
+from .models import Vessel, VesselPosition
+
+CHUNK_SIZE = 50000
+
+# Frames interpolated per NumPy block
+FRAME_BLOCK = 64
+
+# Decimal places of output coordinates (~1 m)
+COORD_DECIMALS = 5
+
+_dumps = json.JSONEncoder(separators=(',', ':')).encode
+
+
+class TooManyPositions(Exception):
+    pass
+
+
+def load_tracks(bbox, start, end, max_gap, max_positions):
+    """
+    ``(vessel_ids, seconds, lats, lons)`` arrays sorted by vessel and time,
+    for positions in ``bbox`` between ``start - max_gap`` and ``end + max_gap``
+    (the margin lets the first and last frames interpolate).
+    """
+    window_start = start.timestamp() - max_gap
+    window_end = end.timestamp() + max_gap
+    rows = (
+        VesselPosition.objects.filter(
+            bbox_q(bbox),
+            timestamp__gte=datetime.fromtimestamp(window_start, tz=dt_timezone.utc),
+            timestamp__lte=datetime.fromtimestamp(window_end, tz=dt_timezone.utc),
+        )
+        .order_by()
+        .values_list('vessel_id', 'timestamp', 'latitude', 'longitude')
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+
+    parts = []
+    count = 0
+    while True:
+        chunk = list(islice(rows, CHUNK_SIZE))
+        if not chunk:
+            break
+        count += len(chunk)
+        if count > max_positions:
+            raise TooManyPositions(max_positions)
+        vessel_ids, stamps, lats, lons = zip(*chunk)
+        parts.append((
+            np.array(vessel_ids, dtype=np.int64),
+            np.array([stamp.timestamp() for stamp in stamps], dtype=np.float64),
+            np.array(lats, dtype=np.float64),
+            np.array(lons, dtype=np.float64),
+        ))
+
+    if not parts:
+        empty = np.empty(0)
+        return empty.astype(np.int64), empty, empty, empty
+    vessel_ids, seconds, lats, lons = (np.concatenate(column) for column in zip(*parts))
+    order = np.lexsort((seconds, vessel_ids))
+    return vessel_ids[order], seconds[order], lats[order], lons[order]
+
+
+def _unit_vectors(lats, lons):
+    lat, lon = np.radians(lats), np.radians(lons)
+    return np.stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)], axis=-1)
+
+
+def slerp(lat0, lon0, lat1, lon1, fraction):
+    """Great-circle interpolation between arrays of points; returns (lats, lons)."""
+    p0, p1 = _unit_vectors(lat0, lon0), _unit_vectors(lat1, lon1)
+    omega = np.arccos(np.clip(np.einsum('ij,ij->i', p0, p1), -1.0, 1.0))
+    sin_omega = np.sin(omega)
+    # Nearly identical points: plain linear blend (the normalization below fixes the length)
+    close = sin_omega < 1e-9
+    safe = np.where(close, 1.0, sin_omega)
+    w0 = np.where(close, 1.0 - fraction, np.sin((1.0 - fraction) * omega) / safe)
+    w1 = np.where(close, fraction, np.sin(fraction * omega) / safe)
+    p = w0[:, None] * p0 + w1[:, None] * p1
+    p /= np.linalg.norm(p, axis=1, keepdims=True)
+    return np.degrees(np.arcsin(np.clip(p[:, 2], -1.0, 1.0))), np.degrees(np.arctan2(p[:, 1], p[:, 0]))
+
+
+def interpolate_frames(vessel_ids, seconds, lats, lons, frame_times, max_gap):
+    """
+    Yield ``(frame_time, ids, lats, lons)`` for each frame time, with
+    positions interpolated between the reports around it.
+    """
+    if not len(vessel_ids):
+        for frame_time in frame_times:
+            yield frame_time, np.empty(0, dtype=np.int64), np.empty(0), np.empty(0)
+        return
+
+    # One axis for all tracks: each vessel's times shifted past the previous vessel's
+    vessels, first = np.unique(vessel_ids, return_index=True)
+    segment = np.searchsorted(vessels, vessel_ids)
+    base = seconds.min()
+    span = seconds.max() - base + max_gap + 1.0
+    frame_times = np.asarray(frame_times, dtype=np.float64)
+    axis = (seconds - base) + segment * span
+
+    for block_start in range(0, len(frame_times), FRAME_BLOCK):
+        block = frame_times[block_start:block_start + FRAME_BLOCK]
+        # (vessels x frames) queries, flattened frame-major
+        queries = ((block - base)[:, None] + (np.arange(len(vessels)) * span)[None, :]).ravel()
+        query_vessel = np.tile(np.arange(len(vessels)), len(block))
+
+        after = np.searchsorted(axis, queries, side='left')
+        before = np.searchsorted(axis, queries, side='right') - 1
+        clipped_after = np.minimum(after, len(axis) - 1)
+        clipped_before = np.maximum(before, 0)
+
+        exact = (before >= 0) & (segment[clipped_before] == query_vessel) & (axis[clipped_before] == queries)
+        between = (
+            (before >= 0) & (after < len(axis))
+            & (segment[clipped_before] == query_vessel) & (segment[clipped_after] == query_vessel)
+            & (axis[clipped_after] - axis[clipped_before] <= max_gap)
+        )
+        valid = exact | between
+        i0 = clipped_before[valid]
+        i1 = np.where(exact[valid], i0, clipped_after[valid])
+        gap = axis[i1] - axis[i0]
+        fraction = np.where(gap > 0, (queries[valid] - axis[i0]) / np.where(gap > 0, gap, 1.0), 0.0)
+        out_lats, out_lons = slerp(lats[i0], lons[i0], lats[i1], lons[i1], fraction)
+
+        frame_of = np.repeat(np.arange(len(block)), len(vessels))[valid]
+        bounds = np.searchsorted(frame_of, np.arange(len(block) + 1))
+        out_ids = vessels[query_vessel[valid]]
+        for index, frame_time in enumerate(block.tolist()):
+            part = slice(bounds[index], bounds[index + 1])
+            yield frame_time, out_ids[part], out_lats[part], out_lons[part]
+
+
+def playback_chunks(bbox, start, end, interval, max_gap, max_positions):
+    """
+    NDJSON byte chunks: a header line, then one line per frame.
+
+    Raises TooManyPositions before anything is yielded when the window
+    holds more than ``max_positions`` reports.
+    """
+    tracks = load_tracks(bbox, start, end, max_gap, max_positions)
+    frame_times = np.arange(start.timestamp(), end.timestamp() + 1e-6, interval)
+
+    vessel_ids = np.unique(tracks[0]).tolist()
+    vessels = {
+        vessel_id: {'name': name, 'mmsi': mmsi, 'vessel_type': vessel_type}
+        for vessel_id, name, mmsi, vessel_type in Vessel.objects.filter(pk__in=vessel_ids)
+        .values_list('id', 'name', 'mmsi', 'vessel_type')
+    } if vessel_ids else {}
+
+    def chunks():
+        yield (_dumps({
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'interval': interval,
+            'max_gap': max_gap,
+            'frames': len(frame_times),
+            'vessels': {str(vessel_id): info for vessel_id, info in vessels.items()},
+        }) + '\n').encode()
+        for frame_time, ids, lats, lons in interpolate_frames(*tracks, frame_times, max_gap):
+            yield (_dumps({
+                't': int(frame_time),
+                'ids': ids.tolist(),
+                'lat': np.round(lats, COORD_DECIMALS).tolist(),
+                'lon': np.round(lons, COORD_DECIMALS).tolist(),
+            }) + '\n').encode()
+
+    return chunks()
@@ -0,0 +1,89 @@
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+from .columnar import pack_columns
+
+
+def json_fallback(data, renderer_context):
+    """Render non-binary data (errors) from a binary renderer as JSON."""
+    response = (renderer_context or {}).get('response')
+    if response is not None:
+        response['Content-Type'] = 'application/json'
+    return JSONRenderer().render(data)
+
+
+class ColumnarJSONRenderer(JSONRenderer):
+    """Compact JSON for columnar fleet payloads (?format=columnar)"""
+    media_type = 'application/vnd.vessels.columnar+json'
+    format = 'columnar'
+    compact = True
+
+
+class ColumnarBinaryRenderer(BaseRenderer):
+    """Packed typed-array buffer for columnar fleet payloads (?format=columnar-bin)"""
+    media_type = 'application/vnd.vessels.columnar'
+    format = 'columnar-bin'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, dict) and data.get('format') == 'columnar':
+            return pack_columns(data)
+        # Errors (validation, auth) are not columnar; send them as JSON
+        return json_fallback(data, renderer_context)
+
+
+COLUMNAR_FORMATS = (ColumnarJSONRenderer.format, ColumnarBinaryRenderer.format)
+
+
+class PolylineRenderer(JSONRenderer):
+    """Route with an encoded polyline instead of position objects (?format=polyline)"""
+    media_type = 'application/vnd.vessels.polyline+json'
+    format = 'polyline'
+    compact = True
+
+
+class GeoJSONRenderer(JSONRenderer):
+    """
+    Route as a GeoJSON LineString (?format=geojson).
+
+    Successful route responses are streamed by the view; this renders the
+    non-streamed ones (errors) as plain JSON.
+    """
+    media_type = 'application/geo+json'
+    format = 'geojson'
+
+
+class NDJSONRenderer(JSONRenderer):
+    """Route as newline-delimited JSON positions (?format=ndjson); streamed by the view"""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    compact = True
+
+
+STREAMING_ROUTE_FORMATS = (GeoJSONRenderer.format, NDJSONRenderer.format)
+
+
+class VectorTileRenderer(BaseRenderer):
+    """Mapbox Vector Tile bytes built by vessels/tiles.py"""
+    media_type = 'application/vnd.mapbox-vector-tile'
+    format = 'mvt'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, bytes):
+            return data
+        return json_fallback(data, renderer_context)
+
+
+class PNGRenderer(BaseRenderer):
+    """PNG images built by the view (e.g. density heatmaps, ?format=png)"""
+    media_type = 'image/png'
+    format = 'png'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, bytes):
+            return data
+        return json_fallback(data, renderer_context)
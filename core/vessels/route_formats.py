@@ -0,0 +1,113 @@
+"""
+Compact and streaming output formats for vessel routes.
+
+* polyline: Google encoded polyline of the coordinates, optionally with
+  parallel ``times`` (seconds since ``start_time``) and ``speeds``
+  (deci-knots, -1 for unknown) delta-encoded the same way.
+* geojson: one LineString Feature, streamed coordinate by coordinate.
+* ndjson: one position object per line, same fields as
+  VesselPositionSerializer, streamed.
+
+The streaming encoders take any iterable of ROUTE_FIELDS rows (typically a
+chunked ``values_list().iterator()``) and yield byte chunks, so memory does
+not grow with track length.
+"""
+import json
+
+import numpy as np
+
+from .encoders import row_encoder
+from .serializers import VesselPositionSerializer
+from .track_levels import ROUTE_FIELDS
+
+POLYLINE_PRECISION = 5
+# Rows joined into one chunk of streamed output
+STREAM_BATCH = 1000
+
+_dumps = json.JSONEncoder(separators=(',', ':')).encode
+
+
+def _encode_signed(numbers):
+    """Zigzag + 5-bit varint encoding of signed integers, as in encoded polylines."""
+    numbers = np.asarray(numbers, dtype=np.int64)
+    zigzag = np.where(numbers < 0, ~(numbers << 1), numbers << 1)
+
+    chars = []
+    for value in zigzag.tolist():
+        while value >= 0x20:
+            chars.append(chr((0x20 | (value & 0x1f)) + 63))
+            value >>= 5
+        chars.append(chr(value + 63))
+    return ''.join(chars)
+
+
+def encode_deltas(values):
+    """Encode an integer series as successive differences."""
+    return _encode_signed(np.diff(np.asarray(values, dtype=np.int64), prepend=0))
+
+
+def encode_polyline(lats, lons, precision=POLYLINE_PRECISION):
+    """Google encoded polyline for coordinate arrays."""
+    factor = 10 ** precision
+    lats = np.rint(np.asarray(lats, dtype=np.float64) * factor).astype(np.int64)
+    lons = np.rint(np.asarray(lons, dtype=np.float64) * factor).astype(np.int64)
+    # Each point is its latitude delta followed by its longitude delta
+    deltas = np.empty(len(lats) * 2, dtype=np.int64)
+    deltas[0::2] = np.diff(lats, prepend=0)
+    deltas[1::2] = np.diff(lons, prepend=0)
+    return _encode_signed(deltas)
+
+
+def polyline_payload(rows, precision=POLYLINE_PRECISION, extras=(), fields=ROUTE_FIELDS):
+    """
+    Polyline fields for a list of rows in ``fields`` order.
+
+    ``fields`` must include latitude and longitude, plus timestamp / speed
+    for the matching ``extras``.
+    """
+    columns = dict(zip(fields, zip(*rows))) if rows else {name: () for name in fields}
+    payload = {
+        'precision': precision,
+        'polyline': encode_polyline(columns['latitude'], columns['longitude'], precision),
+    }
+    if 'time' in extras:
+        seconds = [int(t.timestamp()) for t in columns['timestamp']]
+        payload['start_time'] = columns['timestamp'][0] if rows else None
+        payload['times'] = encode_deltas([s - seconds[0] for s in seconds])
+    if 'speed' in extras:
+        payload['speeds'] = encode_deltas([-1 if s is None else round(s * 10) for s in columns['speed']])
+    return payload
+
+
+def _batched(rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= STREAM_BATCH:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def ndjson_chunks(rows):
+    """Yield NDJSON bytes, one VesselPositionSerializer-shaped object per row."""
+    # VesselPositionSerializer's fields are ROUTE_FIELDS, in the same order
+    _, encode = row_encoder(VesselPositionSerializer)
+
+    for batch in _batched(rows):
+        yield ('\n'.join(map(_dumps, encode(batch))) + '\n').encode()
+
+
+def geojson_chunks(rows, properties):
+    """Yield a GeoJSON LineString Feature whose coordinates are streamed."""
+    latitude, longitude = ROUTE_FIELDS.index('latitude'), ROUTE_FIELDS.index('longitude')
+
+    yield ('{"type":"Feature","properties":%s,"geometry":{"type":"LineString","coordinates":['
+           % json.dumps(properties, separators=(',', ':'), default=str)).encode()
+    first = True
+    for batch in _batched(rows):
+        coordinates = ','.join(f'[{row[longitude]},{row[latitude]}]' for row in batch)
+        yield (coordinates if first else ',' + coordinates).encode()
+        first = False
+    yield b']}}'
@@ -0,0 +1,331 @@
+"""
+In-memory trigram index for vessel autocomplete.
+
+Each vessel is indexed as one document: the words of its name plus its
+MMSI, IMO and callsign. Trigrams are taken per word, pg_trgm style (two
+leading spaces, one trailing), and stored as a CSR posting table of row
+numbers, so a query costs one ``np.bincount`` over the postings of its
+trigrams, whatever the fleet size. Identifiers are also kept in a sorted
+table, so exact and prefix matches on an MMSI, IMO or callsign are found
+by binary search even when all their trigrams are common.
+
+The index is built once per process and then kept current from
+``Vessel.change_seq``: vessels changed since the last refresh are re-read
+(identifiers only) and, when their text changed, moved to a small overlay
+that is searched by brute force while their base row is masked out. The
+overlay is folded back with a rebuild once it grows past
+VESSEL_SEARCH_REBUILD_AFTER. Deleted vessels are dropped when results are
+loaded from the database.
+
+The index is mutated in place, so every use goes through ``search_index()``,
+which holds the process-wide lock for the refresh and the query alike.
+"""
+import re
+import threading
+import time
+import unicodedata
+from contextlib import contextmanager
+
+import numpy as np
+from django.conf import settings
+
+from .models import ChangeCounter, Vessel
+
+INDEX_FIELDS = ('id', 'name', 'mmsi', 'imo_number', 'callsign')
+
+# Candidates ranked in Python after trigram counting
+CANDIDATES = 200
+
+# Trigrams in more than 1/COMMON_TRIGRAM_SHARE of the fleet are skipped when counting
+COMMON_TRIGRAM_SHARE = 10
+
+# Rows read from the postings of a common trigram when the query has nothing rarer
+COMMON_TRIGRAM_ROWS = CANDIDATES * 20
+
+# Trigram alphabet: space, A-Z, 0-9 and one code for anything else
+_ALPHABET = 38
+_CODES = np.full(256, 37, dtype=np.int32)
+_CODES[ord(' ')] = 0
+_CODES[ord('A'):ord('Z') + 1] = np.arange(1, 27)
+_CODES[ord('0'):ord('9') + 1] = np.arange(27, 37)
+
+_WORD = re.compile(r'[A-Z0-9#]+')
+_IMO_PREFIX = re.compile(r'^IMO(?=\d)')
+_IMO_WORD = re.compile(r'^IMO ?(?=\d)')
+
+
+# Letters NFKD does not decompose
+_TRANSLITERATE = str.maketrans({
+    'Æ': 'AE', 'æ': 'ae', 'Ø': 'O', 'ø': 'o', 'Œ': 'OE', 'œ': 'oe', 'ß': 'ss',
+    'Ł': 'L', 'ł': 'l', 'Đ': 'D', 'đ': 'd', 'Þ': 'TH', 'þ': 'th', 'ı': 'i',
+})
+
+
+def normalize(text):
+    """Upper-case ASCII words: accents stripped, punctuation as spaces."""
+    if not text:
+        return ''
+    if not text.isascii():
+        text = unicodedata.normalize('NFKD', text.translate(_TRANSLITERATE))
+        text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+        # Letters outside A-Z (Cyrillic, Greek...) all index as '#'
+        text = ''.join('#' if not ch.isascii() and ch.isalnum() else ch for ch in text)
+    return ' '.join(_WORD.findall(text.upper()))
+
+
+def identifier(value):
+    """Identifiers compare without spaces, punctuation or an ``IMO`` prefix."""
+    if not value or value.isdigit():
+        return value or ''
+    if value.isascii() and value.isalnum():
+        value = value.upper()
+        return value[3:] if value.startswith('IMO') and value[3:4].isdigit() else value
+    return _IMO_PREFIX.sub('', normalize(value).replace(' ', ''))
+
+
+def document(name, mmsi, imo, callsign):
+    """Stored text of one vessel: ``NAME WORDS|MMSI|IMO|CALLSIGN``."""
+    return '|'.join((normalize(name), identifier(mmsi), identifier(imo), identifier(callsign)))
+
+
+def _padded(doc):
+    name, *identifiers = doc.split('|')
+    words = name.split() + [value for value in identifiers if value]
+    return ''.join(f'  {word} ' for word in words)
+
+
+def _codes(padded):
+    values = _CODES[np.frombuffer(padded.encode('ascii'), dtype=np.uint8)]
+    return values[:-2] * _ALPHABET * _ALPHABET + values[1:-1] * _ALPHABET + values[2:]
+
+
+def trigrams(doc, prefix=False):
+    """
+    Trigram codes of a document. With ``prefix`` the last word is treated
+    as still being typed: its closing trigram is left out.
+    """
+    padded = _padded(doc)
+    if prefix and padded:
+        padded = padded[:-1]
+    if len(padded) < 3:
+        return np.empty(0, dtype=np.int64)
+    return np.unique(_codes(padded))
+
+
+def _trigram_set(text):
+    padded = ''.join(f'  {word} ' for word in text.split())
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def score(doc, query, query_trigrams):
+    """
+    Rank of a document for a normalized query, between 0 and 1.
+    ``query_trigrams`` is ``_trigram_set(query)``.
+    """
+    name, *identifiers = doc.split('|')
+    compact = _IMO_PREFIX.sub('', query.replace(' ', ''))
+    if name == query or compact in identifiers:
+        return 1.0
+    if name.startswith(query):
+        return 0.9
+    if any(value.startswith(compact) for value in identifiers if value):
+        return 0.85
+    if f' {query}' in f' {name}':
+        return 0.8
+    if query in name or any(compact in value for value in identifiers if value):
+        return 0.7
+    # Close spelling: trigram similarity with the name
+    name_trigrams = _trigram_set(name)
+    shared = len(name_trigrams & query_trigrams)
+    return 0.6 * shared / (len(name_trigrams) + len(query_trigrams) - shared or 1)
+
+
+class SearchIndex:
+    """Trigram postings over a snapshot of the fleet plus an overlay of later changes."""
+
+    def __init__(self, rows, seq):
+        rows = sorted(rows)
+        self.seq = seq
+        self.ids = np.array([row[0] for row in rows], dtype=np.int64)
+        self.docs = [document(*row[1:]) for row in rows]
+        self.name_lengths = np.array([min(doc.index('|'), 1023) for doc in self.docs], dtype=np.int64)
+        self.stale = np.zeros(len(rows), dtype=bool)
+        self.overlay = {}   # id -> (doc, trigrams)
+        self._build_postings()
+        self._build_identifiers()
+
+    def _build_postings(self):
+        padded = [_padded(doc) for doc in self.docs]
+        lengths = np.array([len(text) for text in padded], dtype=np.int64)
+        text = ''.join(padded)
+        if len(text) < 3:
+            self.offsets = np.zeros(_ALPHABET ** 3 + 1, dtype=np.int64)
+            self.postings = np.empty(0, dtype=np.int32)
+            return
+
+        owner = np.repeat(np.arange(len(padded), dtype=np.int32), lengths)
+        codes = _codes(text)
+        # Trigrams spanning two documents are dropped
+        same = owner[:-2] == owner[2:]
+        pairs = np.sort(codes[same].astype(np.int64) * len(padded) + owner[:-2][same])
+        pairs = pairs[np.concatenate(([True], pairs[1:] != pairs[:-1]))]
+        codes, rows = np.divmod(pairs, len(padded))
+        self.offsets = np.concatenate(([0], np.cumsum(np.bincount(codes, minlength=_ALPHABET ** 3))))
+        self.postings = rows.astype(np.int32)
+
+    def _build_identifiers(self):
+        values, owners = [], []
+        for row, doc in enumerate(self.docs):
+            for value in doc.split('|')[1:]:
+                if value:
+                    values.append(value.encode('ascii'))
+                    owners.append(row)
+        values = np.array(values) if values else np.empty(0, dtype='S1')
+        order = np.argsort(values, kind='stable')
+        self.identifiers = values[order]
+        self.identifier_rows = np.array(owners, dtype=np.int64)[order]
+
+    def __len__(self):
+        return len(self.ids) - int(self.stale.sum()) + len(self.overlay)
+
+    def _row(self, vessel_id):
+        row = int(np.searchsorted(self.ids, vessel_id))
+        return row if row < len(self.ids) and self.ids[row] == vessel_id else None
+
+    def doc(self, vessel_id):
+        if vessel_id in self.overlay:
+            return self.overlay[vessel_id][0]
+        row = self._row(vessel_id)
+        return None if row is None or self.stale[row] else self.docs[row]
+
+    def update(self, rows):
+        """Apply changed vessels ``(id, name, mmsi, imo, callsign)``."""
+        for vessel_id, *fields in rows:
+            doc = document(*fields)
+            if self.doc(vessel_id) == doc:
+                continue    # position-only change
+            row = self._row(vessel_id)
+            if row is not None:
+                self.stale[row] = True
+            self.overlay[vessel_id] = (doc, trigrams(doc))
+
+    def remove(self, vessel_ids):
+        for vessel_id in vessel_ids:
+            self.overlay.pop(vessel_id, None)
+            row = self._row(vessel_id)
+            if row is not None:
+                self.stale[row] = True
+
+    def _count(self, query_trigrams):
+        """Live rows sharing trigrams with the query, and how many each shares."""
+        postings = sorted(
+            (self.postings[self.offsets[code]:self.offsets[code + 1]] for code in query_trigrams),
+            key=len,
+        )
+        # Trigrams found in a large share of the fleet (common digit runs,
+        # "  S") barely narrow the candidates; count them only when nothing
+        # rarer was given.
+        common = len(self.ids) // COMMON_TRIGRAM_SHARE
+        rare = [rows for rows in postings if len(rows) <= common]
+        # Only common trigrams ("  M", "  9"): every row of the rarest one
+        # counts the same, so a slice of it is as good as all of it.
+        postings = rare or [postings[0][:COMMON_TRIGRAM_ROWS]]
+
+        matches = np.concatenate(postings)
+        if len(matches) < len(self.ids) // 8:
+            rows, counts = np.unique(matches, return_counts=True)
+        else:
+            counts = np.bincount(matches, minlength=len(self.ids))
+            rows = np.flatnonzero(counts)
+            counts = counts[rows]
+        live = ~self.stale[rows]
+        return rows[live], counts[live]
+
+    def _identifier_matches(self, compact):
+        """Live rows with an identifier starting with ``compact``, exact matches first."""
+        key = compact.encode('ascii')
+        width = self.identifiers.dtype.itemsize
+        if len(key) > width:
+            return self.identifier_rows[:0]
+        # Keys in the table's own dtype: a wider one would cast the whole table
+        lower, upper = np.array([key, key + b'\x7f'], dtype=f'S{width}')
+        start = int(np.searchsorted(self.identifiers, lower))
+        stop = int(np.searchsorted(self.identifiers, upper, side='right'))
+        rows = self.identifier_rows[start:min(stop, start + CANDIDATES)]
+        return rows[~self.stale[rows]]
+
+    def search(self, query, limit):
+        """Top ``limit`` vessel ids for a query, as ``[(id, score)]``."""
+        query = normalize(query)
+        # "IMO 9234567" searches the number, which is indexed without a prefix
+        query_trigrams = trigrams(_IMO_WORD.sub('', query), prefix=True)
+        if not len(query_trigrams):
+            return []
+
+        candidates = []
+        if len(self.ids):
+            rows, counts = self._count(query_trigrams)
+            if len(rows) > CANDIDATES:
+                # Most shared trigrams first, shorter names breaking ties
+                ranked = counts * 1024 - self.name_lengths[rows]
+                rows = rows[np.argpartition(-ranked, CANDIDATES)[:CANDIDATES]]
+            compact = _IMO_PREFIX.sub('', query.replace(' ', ''))
+            if compact:
+                rows = np.union1d(rows, self._identifier_matches(compact))
+            candidates = [(int(self.ids[row]), self.docs[row]) for row in rows.tolist()]
+
+        for vessel_id, (doc, doc_trigrams) in self.overlay.items():
+            if len(np.intersect1d(doc_trigrams, query_trigrams, assume_unique=True)):
+                candidates.append((vessel_id, doc))
+
+        query_set = _trigram_set(query)
+        scored = [(score(doc, query, query_set), doc.split('|')[0], vessel_id) for vessel_id, doc in candidates]
+        scored.sort(key=lambda item: (-item[0], len(item[1]), item[1], item[2]))
+        return [(vessel_id, round(value, 3)) for value, _, vessel_id in scored[:limit]]
+
+
+_index = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def _load(since=None):
+    vessels = Vessel.objects.all() if since is None else Vessel.objects.filter(change_seq__gt=since)
+    return list(vessels.values_list(*INDEX_FIELDS))
+
+
+def _refresh():
+    """Build or refresh the process-wide index; the caller holds ``_lock``."""
+    global _index, _checked_at
+    now = time.monotonic()
+    if _index is not None and now - _checked_at < settings.VESSEL_SEARCH_REFRESH_INTERVAL:
+        return _index
+    _checked_at = now
+
+    seq = ChangeCounter.current(Vessel.CHANGE_COUNTER)
+    # A counter behind the index means the database was replaced
+    if _index is None or seq < _index.seq or len(_index.overlay) > settings.VESSEL_SEARCH_REBUILD_AFTER:
+        _index = SearchIndex(_load(), seq)
+    elif seq > _index.seq:
+        _index.update(_load(since=_index.seq))
+        _index.seq = seq
+    return _index
+
+
+@contextmanager
+def search_index():
+    """
+    The process-wide index, built on first use and refreshed from
+    ``change_seq`` at most every VESSEL_SEARCH_REFRESH_INTERVAL seconds.
+    Held under the lock for the whole ``with`` block; keep database reads
+    outside it.
+    """
+    with _lock:
+        yield _refresh()
+
+
+def reset_index():
+    """Drop the process-wide index (tests, management commands)."""
+    global _index, _checked_at
+    with _lock:
+        _index, _checked_at = None, 0.0
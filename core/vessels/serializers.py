@@ -1,6 +1,27 @@
 from rest_framework import serializers
+
+from core.fieldsets import SparseFieldsetMixin
 from .models import Vessel, VesselPosition
 
+# Map marker colors by vessel status
+STATUS_COLORS = {
+    'underway': '#3b82f6',
+    'Moving': '#3b82f6',
+    'active': '#10b981',
+    'anchored': '#f59e0b',
+    'Anchored': '#f59e0b',
+    'moored': '#6366f1',
+    'Docked': '#6366f1',
+    'aground': '#ef4444',
+    'inactive': '#64748b',
+}
+DEFAULT_STATUS_COLOR = '#64748b'
+
+
+def status_color(status):
+    return STATUS_COLORS.get(status, DEFAULT_STATUS_COLOR)
+
+
 class VesselPositionSerializer(serializers.ModelSerializer):
     """Serializer for historical vessel positions"""
     class Meta:
@@ -8,26 +29,22 @@ class VesselPositionSerializer(serializers.ModelSerializer):
         fields = ['id', 'latitude', 'longitude', 'speed', 'course', 'heading', 'timestamp', 'data_source']
 
 
-class VesselSerializer(serializers.ModelSerializer):
+class VesselSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Full vessel serializer with latest position"""
     latest_position = serializers.SerializerMethodField()
-    position_count = serializers.SerializerMethodField()
     
     class Meta:
         model = Vessel
         fields = '__all__'
-        read_only_fields = ['created_at', 'updated_at']
+        read_only_fields = ['created_at', 'updated_at', 'position_count', 'first_seen']
+        field_sources = {'latest_position': ['latest_position']}
     
     def get_latest_position(self, obj):
         """Get the most recent position"""
-        latest = obj.positions.first()
+        latest = obj.latest_position
         if latest:
             return VesselPositionSerializer(latest).data
         return None
-    
-    def get_position_count(self, obj):
-        """Count of historical positions"""
-        return obj.positions.count()
 
     def validate(self, attrs):
         # Keep identifiers immutable after creation.
@@ -38,6 +55,13 @@ class VesselSerializer(serializers.ModelSerializer):
                 raise serializers.ValidationError({'imo_number': 'IMO number cannot be changed after creation.'})
         return attrs
 
+    def update(self, instance, validated_data):
+        # Save only the submitted fields; the position stats belong to vessels.tracking.
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save(update_fields=list(validated_data))
+        return instance
+
 class VesselLiveSerializer(serializers.ModelSerializer):
     """Lightweight serializer for live map"""
     class Meta:
@@ -87,18 +111,22 @@ class VesselMapSerializer(serializers.ModelSerializer):
     
     def get_status_color(self, obj):
         """Return color for map marker based on status"""
-        colors = {
-            'underway': '#3b82f6',
-            'Moving': '#3b82f6',
-            'active': '#10b981',
-            'anchored': '#f59e0b',
-            'Anchored': '#f59e0b',
-            'moored': '#6366f1',
-            'Docked': '#6366f1',
-            'aground': '#ef4444',
-            'inactive': '#64748b',
-        }
-        return colors.get(obj.status, '#64748b')
+        return status_color(obj.status)
+
+
+# For vessels.encoders.row_encoder: method fields computed from one row value.
+# Set outside the class body, where ``status_color`` names the method field.
+VesselMapSerializer.row_derived = {'status_color': ('status', status_color)}
+
+
+class VesselSearchSerializer(serializers.ModelSerializer):
+    """Autocomplete result"""
+    class Meta:
+        model = Vessel
+        fields = [
+            "id", "name", "mmsi", "imo_number", "callsign", "vessel_type", "flag",
+            "status", "latitude", "longitude",
+        ]
 
 
 class VesselPositionUpdateSerializer(serializers.Serializer):
@@ -128,7 +156,7 @@ class VesselRouteSerializer(serializers.ModelSerializer):
         return VesselPositionSerializer(positions, many=True).data
 
 
-class VesselDetailSerializer(serializers.ModelSerializer):
+class VesselDetailSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Detailed vessel info with statistics"""
     latest_position = serializers.SerializerMethodField()
     position_history_count = serializers.SerializerMethodField()
@@ -137,15 +165,20 @@ class VesselDetailSerializer(serializers.ModelSerializer):
     class Meta:
         model = Vessel
         fields = '__all__'
+        field_sources = {
+            'latest_position': ['latest_position'],
+            'position_history_count': ['position_count'],
+            'last_update_ago': ['last_position_update'],
+        }
     
     def get_latest_position(self, obj):
-        latest = obj.positions.first()
+        latest = obj.latest_position
         if latest:
             return VesselPositionSerializer(latest).data
         return None
     
     def get_position_history_count(self, obj):
-        return obj.positions.count()
+        return obj.position_count
     
     def get_last_update_ago(self, obj):
         if obj.last_position_update:
@@ -0,0 +1,33 @@
+"""
+Watermark bumps for deletes and for models without their own change hooks.
+
+Vessel saves bump their watermarks in Vessel.save(); everything else that
+changes what the fleet endpoints return is caught here.
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import ChangeCounter, Vessel, VesselChange, region_counter
+
+
+@receiver(post_delete, sender=Vessel)
+def vessel_deleted(sender, instance, **kwargs):
+    with transaction.atomic():
+        seq = ChangeCounter.next(Vessel.CHANGE_COUNTER)
+        region = region_counter(instance.latitude, instance.longitude)
+        if region:
+            ChangeCounter.mark([region], seq)
+        # Tombstone, so delta feeds can report the vessel as removed
+        state = tuple(getattr(instance, name) for name in VesselChange.STATE_FIELDS)
+        VesselChange.log([VesselChange.before(instance.pk, seq, state, deleted=True)])
+
+
+@receiver([post_save, post_delete], sender='ports.Port')
+def port_changed(sender, **kwargs):
+    ChangeCounter.next('ports')
+
+
+@receiver([post_save, post_delete], sender='events.Event')
+def event_changed(sender, **kwargs):
+    ChangeCounter.next('events')
@@ -0,0 +1,189 @@
+"""
+Route simplification for vessel tracks.
+
+A track is reduced in up to three passes over NumPy arrays of the fetched
+points:
+
+* time buckets: keep the first fix in every ``bucket`` seconds;
+* Douglas-Peucker: drop points within ``tolerance`` metres of the line
+  between their neighbours that survive;
+* Visvalingam-Whyatt: if more than ``max_points`` remain, repeatedly drop
+  the point forming the smallest triangle with its neighbours.
+
+The first and last point and the start and end of every stop (a run of
+fixes below STOP_SPEED knots) are always kept, so the summary still shows
+where and for how long a vessel stopped. Sharp turns survive naturally:
+they are far from the chord (Douglas-Peucker) and form large triangles
+(Visvalingam).
+"""
+import heapq
+
+import numpy as np
+
+EARTH_RADIUS_M = 6371008.8
+# Fixes slower than this (knots) count as stopped
+STOP_SPEED = 0.5
+
+
+def project(lats, lons):
+    """
+    Project coordinates to local planar metres (equirectangular).
+
+    Longitudes are unwrapped first so a track crossing the antimeridian
+    stays continuous.
+    """
+    lats = np.radians(np.asarray(lats, dtype=np.float64))
+    lons = np.unwrap(np.radians(np.asarray(lons, dtype=np.float64)))
+    x = lons * np.cos(lats.mean() if len(lats) else 0.0) * EARTH_RADIUS_M
+    y = lats * EARTH_RADIUS_M
+    return x, y
+
+
+def _segment_distance(x, y, start, end):
+    """Distance (m) of points start+1..end-1 from the segment start-end."""
+    px, py = x[start + 1:end], y[start + 1:end]
+    dx, dy = x[end] - x[start], y[end] - y[start]
+    length_sq = dx * dx + dy * dy
+    if length_sq == 0.0:
+        return np.hypot(px - x[start], py - y[start])
+    t = np.clip(((px - x[start]) * dx + (py - y[start]) * dy) / length_sq, 0.0, 1.0)
+    return np.hypot(px - (x[start] + t * dx), py - (y[start] + t * dy))
+
+
+def douglas_peucker(x, y, tolerance):
+    """Boolean mask of points kept by Douglas-Peucker at ``tolerance`` metres."""
+    n = len(x)
+    keep = np.zeros(n, dtype=bool)
+    if n == 0:
+        return keep
+    keep[[0, n - 1]] = True
+
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        distances = _segment_distance(x, y, start, end)
+        index = int(distances.argmax())
+        if distances[index] > tolerance:
+            split = start + 1 + index
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+    return keep
+
+
+def _triangle_area(x, y, a, b, c):
+    return abs((x[b] - x[a]) * (y[c] - y[a]) - (x[c] - x[a]) * (y[b] - y[a])) / 2.0
+
+
+def visvalingam(x, y, max_points, fixed=None):
+    """
+    Boolean mask of at most ``max_points`` points kept by Visvalingam-Whyatt.
+
+    Points in ``fixed`` are never removed (unless they alone exceed
+    ``max_points``, in which case only the endpoints are fixed). Equal
+    areas (e.g. a straight leg) are broken by the shorter chord between
+    the neighbours, which spreads the survivors evenly along the line.
+    """
+    n = len(x)
+    keep = np.ones(n, dtype=bool)
+    max_points = max(int(max_points), 2)
+    if n <= max_points:
+        return keep
+
+    fixed = np.zeros(n, dtype=bool) if fixed is None else fixed.copy()
+    fixed[[0, n - 1]] = True
+    if fixed.sum() > max_points:
+        fixed[:] = False
+        fixed[[0, n - 1]] = True
+
+    previous = np.arange(-1, n - 1)
+    following = np.arange(1, n + 1)
+
+    # Initial effective areas in one vectorized pass
+    areas = np.full(n, np.inf)
+    areas[1:-1] = np.abs(
+        (x[1:-1] - x[:-2]) * (y[2:] - y[:-2]) - (x[2:] - x[:-2]) * (y[1:-1] - y[:-2])
+    ) / 2.0
+    chords = np.zeros(n)
+    chords[1:-1] = np.hypot(x[2:] - x[:-2], y[2:] - y[:-2])
+    heap = [(areas[i], chords[i], i) for i in np.flatnonzero(~fixed)]
+    heapq.heapify(heap)
+
+    remaining = n
+    while remaining > max_points and heap:
+        area, chord, index = heapq.heappop(heap)
+        if not keep[index] or area != areas[index] or chord != chords[index]:
+            continue  # stale entry
+        keep[index] = False
+        remaining -= 1
+
+        before, after = previous[index], following[index]
+        following[before], previous[after] = after, before
+        for neighbour in (before, after):
+            if fixed[neighbour]:
+                continue
+            # Never let a neighbour's area drop below the one just removed,
+            # so removal order stays monotonic.
+            a, c = previous[neighbour], following[neighbour]
+            areas[neighbour] = max(_triangle_area(x, y, a, neighbour, c), area)
+            chords[neighbour] = np.hypot(x[c] - x[a], y[c] - y[a])
+            heapq.heappush(heap, (areas[neighbour], chords[neighbour], neighbour))
+    return keep
+
+
+def time_buckets(seconds, bucket):
+    """Mask keeping the first fix of every ``bucket``-second window."""
+    slots = np.floor_divide(np.asarray(seconds, dtype=np.float64), bucket)
+    keep = np.ones(len(slots), dtype=bool)
+    keep[1:] = slots[1:] != slots[:-1]
+    return keep
+
+
+def stop_boundaries(speeds):
+    """Mask marking the first and last fix of every stop."""
+    speeds = np.asarray([np.nan if s is None else s for s in speeds], dtype=np.float64)
+    stopped = speeds < STOP_SPEED
+    edges = np.zeros(len(stopped), dtype=bool)
+    if not len(stopped):
+        return edges
+    edges[1:] |= stopped[1:] & ~stopped[:-1]    # stop begins
+    edges[:-1] |= stopped[:-1] & ~stopped[1:]   # stop ends
+    edges[[0, -1]] |= stopped[[0, -1]]
+    return edges
+
+
+def simplify_track(lats, lons, seconds, speeds, tolerance=None, bucket=None, max_points=None):
+    """
+    Indices of the representative points of a time-ordered track.
+
+    ``tolerance`` is in metres, ``bucket`` in seconds; each pass is skipped
+    when its parameter is None.
+    """
+    n = len(lats)
+    if n <= 2:
+        return np.arange(n)
+
+    x, y = project(lats, lons)
+    fixed = stop_boundaries(speeds)
+    fixed[[0, n - 1]] = True
+
+    keep = np.ones(n, dtype=bool)
+    if bucket:
+        keep = time_buckets(seconds, bucket) | fixed
+
+    if tolerance is not None:
+        index = np.flatnonzero(keep)
+        kept = douglas_peucker(x[index], y[index], tolerance)
+        keep[:] = False
+        keep[index[kept]] = True
+        keep |= fixed
+
+    if max_points is not None and keep.sum() > max_points:
+        index = np.flatnonzero(keep)
+        kept = visvalingam(x[index], y[index], max_points, fixed[index])
+        keep[:] = False
+        keep[index[kept]] = True
+
+    return np.flatnonzero(keep)
@@ -0,0 +1,152 @@
+"""
+Fleet state at a past instant.
+
+``FleetSnapshot`` rows hold, every VESSEL_SNAPSHOT_INTERVAL seconds, the
+last known position of every vessel as compressed NumPy arrays. The state
+at time T is the latest snapshot at or before T plus the newest position
+per vessel reported between that snapshot and T (the ``-timestamp`` index
+keeps this delta to one interval of history).
+
+Each snapshot is built from the previous one plus its own delta, so only
+the first snapshot scans the whole history. Snapshots are taken
+VESSEL_SNAPSHOT_LAG seconds behind real time so that late position
+reports are already stored; reports older than that lag arriving after
+their snapshot was built are not reflected in it.
+"""
+import io
+from datetime import datetime, timedelta, timezone as dt_timezone
+from functools import lru_cache
+from itertools import islice
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from .models import FleetSnapshot, VesselPosition
+
+# (array name, VesselPosition field); numeric so they fit in one npz
+POSITION_FIELDS = (
+    ('vessel_id', 'vessel_id'),
+    ('position_id', 'id'),
+    ('timestamp', 'timestamp'),
+    ('latitude', 'latitude'),
+    ('longitude', 'longitude'),
+    ('speed', 'speed'),
+    ('course', 'course'),
+    ('heading', 'heading'),
+)
+
+CHUNK_SIZE = 50000
+
+
+def _empty():
+    return {name: np.empty(0, dtype=np.int64 if name in ('vessel_id', 'position_id') else np.float64)
+            for name, _ in POSITION_FIELDS}
+
+
+def _arrays(rows):
+    """Column arrays from ``POSITION_FIELDS`` rows; None becomes NaN."""
+    if not rows:
+        return _empty()
+    columns = list(zip(*rows))
+    arrays = {}
+    for (name, _), values in zip(POSITION_FIELDS, columns):
+        if name in ('vessel_id', 'position_id'):
+            arrays[name] = np.array(values, dtype=np.int64)
+        elif name == 'timestamp':
+            arrays[name] = np.array([value.timestamp() for value in values], dtype=np.float64)
+        else:
+            arrays[name] = np.array([np.nan if value is None else float(value) for value in values], dtype=np.float64)
+    return arrays
+
+
+def _latest_per_vessel(arrays):
+    """Keep the newest row per vessel (by timestamp, then position id)."""
+    if not len(arrays['vessel_id']):
+        return arrays
+    order = np.lexsort((arrays['position_id'], arrays['timestamp'], arrays['vessel_id']))
+    vessel_ids = arrays['vessel_id'][order]
+    last = np.append(vessel_ids[1:] != vessel_ids[:-1], True)
+    keep = order[last]
+    return {name: values[keep] for name, values in arrays.items()}
+
+
+def positions_between(start, end):
+    """Newest position per vessel with ``start < timestamp <= end`` (no lower bound if start is None)."""
+    positions = VesselPosition.objects.filter(timestamp__lte=end)
+    if start is not None:
+        positions = positions.filter(timestamp__gt=start)
+    rows = positions.order_by().values_list(*(field for _, field in POSITION_FIELDS)).iterator(chunk_size=CHUNK_SIZE)
+
+    parts = []
+    while True:
+        chunk = list(islice(rows, CHUNK_SIZE))
+        if not chunk:
+            break
+        # Reduce each chunk as it comes so the window is never held in full
+        parts.append(_latest_per_vessel(_arrays(chunk)))
+    if not parts:
+        return _empty()
+    return _latest_per_vessel({name: np.concatenate([part[name] for part in parts]) for name, _ in POSITION_FIELDS})
+
+
+def merge(base, delta):
+    """Fleet state ``base`` updated with newer rows from ``delta``."""
+    return _latest_per_vessel({name: np.concatenate([base[name], delta[name]]) for name, _ in POSITION_FIELDS})
+
+
+def dump(arrays):
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, **arrays)
+    return buffer.getvalue()
+
+
+@lru_cache(maxsize=4)
+def load(snapshot_id, taken_at):
+    """Arrays of a stored snapshot; recently used ones stay decompressed."""
+    data = FleetSnapshot.objects.values_list('data', flat=True).get(pk=snapshot_id)
+    with np.load(io.BytesIO(bytes(data))) as archive:
+        return {name: archive[name] for name, _ in POSITION_FIELDS}
+
+
+def fleet_at(at):
+    """
+    ``(arrays, snapshot)``: the last known position of every vessel at
+    ``at``, and the snapshot it was built from (None when none precedes it).
+    """
+    snapshot = FleetSnapshot.objects.filter(taken_at__lte=at).order_by('-taken_at').only('id', 'taken_at').first()
+    if snapshot is None:
+        return positions_between(None, at), None
+    return merge(load(snapshot.pk, snapshot.taken_at), positions_between(snapshot.taken_at, at)), snapshot
+
+
+def _floor(moment, interval):
+    epoch = int(moment.timestamp()) // interval * interval
+    return datetime.fromtimestamp(epoch, tz=dt_timezone.utc)
+
+
+def update_snapshots(now=None, limit=None):
+    """
+    Take the snapshots due up to now - VESSEL_SNAPSHOT_LAG, each from the
+    previous one. Returns the snapshots created.
+    """
+    interval = settings.VESSEL_SNAPSHOT_INTERVAL
+    due = _floor((now or timezone.now()) - timedelta(seconds=settings.VESSEL_SNAPSHOT_LAG), interval)
+
+    previous = FleetSnapshot.objects.order_by('-taken_at').only('id', 'taken_at').first()
+    if previous is None:
+        arrays = positions_between(None, due)
+        return [FleetSnapshot.objects.create(taken_at=due, vessel_count=len(arrays['vessel_id']), data=dump(arrays))]
+
+    created = []
+    arrays = None
+    taken_at = previous.taken_at
+    while taken_at + timedelta(seconds=interval) <= due and (limit is None or len(created) < limit):
+        if arrays is None:
+            arrays = load(previous.pk, previous.taken_at)
+        start, taken_at = taken_at, taken_at + timedelta(seconds=interval)
+        arrays = merge(arrays, positions_between(start, taken_at))
+        created.append(FleetSnapshot.objects.create(
+            taken_at=taken_at, vessel_count=len(arrays['vessel_id']), data=dump(arrays),
+        ))
+    return created
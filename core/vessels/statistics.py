@@ -0,0 +1,104 @@
+"""
+Fleet statistics for the dashboard.
+
+All vessel counts come from one conditional-aggregation query. The result
+is cached under ``cache_version()``, which the statistics view also uses
+as its ETag: the 'ports' watermark, a coarse vessel watermark and the
+current FLEET_ETAG_TIME_BUCKET (the active_1h / active_24h windows move
+with time).
+
+The coarse vessel watermark is the VESSEL_STATS_CACHE_TTL bucket of the
+last vessel write rather than the 'vessels' sequence itself. Under live
+AIS ingest every position report bumps that sequence, so keying on it
+would make the cache miss on every request. The bucket still moves on the
+first write after a quiet spell, and at most once per TTL under steady
+ingest.
+"""
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from ports.models import Port
+from .models import ChangeCounter, Vessel
+
+STATUSES = ['underway', 'anchored', 'moored', 'active', 'inactive', 'Moving', 'Anchored', 'Docked']
+VESSEL_TYPES = ['Cargo', 'Tanker', 'Passenger', 'Fishing', 'Sailing', 'Tug', 'Other']
+
+
+def compute_statistics():
+    """Compute the statistics payload with a single pass over the vessel table."""
+    now = timezone.now()
+
+    aggregates = {
+        'total': Count('id'),
+        'active_1h': Count('id', filter=Q(last_position_update__gte=now - timedelta(hours=1))),
+        'active_24h': Count('id', filter=Q(last_position_update__gte=now - timedelta(hours=24))),
+    }
+    for index, vessel_status in enumerate(STATUSES):
+        aggregates[f'status_{index}'] = Count('id', filter=Q(status=vessel_status))
+    for index, vtype in enumerate(VESSEL_TYPES):
+        aggregates[f'type_{index}'] = Count('id', filter=Q(vessel_type=vtype))
+
+    counts = Vessel.objects.aggregate(**aggregates)
+
+    return {
+        'total_vessels': counts['total'],
+        'total_ports': Port.objects.count(),
+        'active_1h': counts['active_1h'],
+        'active_24h': counts['active_24h'],
+        'by_status': {
+            vessel_status: counts[f'status_{index}']
+            for index, vessel_status in enumerate(STATUSES)
+            if counts[f'status_{index}'] > 0
+        },
+        'by_type': {
+            vtype: counts[f'type_{index}']
+            for index, vtype in enumerate(VESSEL_TYPES)
+            if counts[f'type_{index}'] > 0
+        },
+        'last_updated': now,
+    }
+
+
+def _bucket_start(bucket, size):
+    return datetime.fromtimestamp(bucket * size, tz=dt_timezone.utc)
+
+
+def cache_version():
+    """``(version, last_modified)`` of the current statistics; see the module docstring."""
+    counters = dict(
+        (name, (value, updated_at))
+        for name, value, updated_at in ChangeCounter.objects.filter(
+            name__in=[Vessel.CHANGE_COUNTER, 'ports']
+        ).values_list('name', 'value', 'updated_at')
+    )
+    ports, ports_updated_at = counters.get('ports', (0, None))
+    _, vessels_updated_at = counters.get(Vessel.CHANGE_COUNTER, (0, None))
+
+    ttl = settings.VESSEL_STATS_CACHE_TTL
+    vessel_bucket = int(vessels_updated_at.timestamp() // ttl) if vessels_updated_at else 0
+    time_size = settings.FLEET_ETAG_TIME_BUCKET
+    time_bucket = int(time.time() // time_size)
+
+    last_modified = max(
+        moment for moment in (
+            ports_updated_at,
+            vessels_updated_at and _bucket_start(vessel_bucket, ttl),
+            _bucket_start(time_bucket, time_size),
+        ) if moment
+    )
+    return f"{ports}:{vessel_bucket}:{time_bucket}", last_modified
+
+
+def fleet_statistics(version=None):
+    """Cached statistics for ``version`` (default: ``cache_version()``)."""
+    key = f"vessel-statistics:{version or cache_version()[0]}"
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute_statistics()
+        cache.set(key, stats, settings.VESSEL_STATS_CACHE_TTL)
+    return stats
@@ -0,0 +1,328 @@
+"""
+Server-Sent Events push channel for live vessel positions.
+
+Served directly by the ASGI application (see core/asgi.py) at
+``/api/stream/vessels/``. A client connects with its viewport and filters::
+
+    GET /api/stream/vessels/?token=<access>&bbox=w,s,e,n&vessel_type=Cargo&max_rate=1
+
+and receives ``positions`` events carrying the latest state of every
+matching vessel that changed, coalesced per vessel and sent at most
+``max_rate`` times per second.
+
+One poller per process reads the vessel change sequence and fans changes
+out through a spatial grid of subscriptions, so each change is only tested
+against the clients whose viewport touches its grid cell.
+"""
+import asyncio
+import json
+import logging
+import math
+from collections import defaultdict
+from urllib.parse import parse_qs, urlsplit
+
+from asgiref.sync import sync_to_async
+from corsheaders.conf import conf as cors_conf
+from corsheaders.middleware import CorsMiddleware
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.exceptions import ValidationError
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+from .geo import parse_bbox
+from .models import ChangeCounter, Vessel
+from .serializers import status_color
+
+logger = logging.getLogger(__name__)
+
+STREAM_PATH = '/api/stream/vessels/'
+
+STREAM_FIELDS = (
+    'id', 'name', 'mmsi', 'latitude', 'longitude', 'speed', 'heading',
+    'status', 'vessel_type', 'last_position_update', 'change_seq',
+)
+
+# Subscriptions spanning more cells than this are matched as unbounded
+MAX_SUBSCRIPTION_CELLS = 1000
+# Changes read per poll; the rest are picked up on the next tick
+POLL_BATCH_SIZE = 5000
+
+
+class Subscription:
+    """One connected client: viewport, filters and its coalesced pending updates"""
+
+    def __init__(self, bbox=None, vessel_types=None, statuses=None, max_rate=1.0):
+        self.bbox = bbox
+        self.vessel_types = set(vessel_types) if vessel_types else None
+        self.statuses = set(statuses) if statuses else None
+        self.min_interval = 1.0 / max_rate
+        self.pending = {}
+        self.ready = asyncio.Event()
+
+    def matches(self, row):
+        if self.vessel_types and row['vessel_type'] not in self.vessel_types:
+            return False
+        if self.statuses and row['status'] not in self.statuses:
+            return False
+        if self.bbox:
+            west, south, east, north = self.bbox
+            if not south <= row['latitude'] <= north:
+                return False
+            if west <= east:
+                return west <= row['longitude'] <= east
+            return row['longitude'] >= west or row['longitude'] <= east
+        return True
+
+    def push(self, row):
+        # Coalesce: only the newest state per vessel is kept until the next flush
+        self.pending[row['id']] = row
+        self.ready.set()
+
+    def drain(self):
+        rows = list(self.pending.values())
+        self.pending.clear()
+        self.ready.clear()
+        return rows
+
+
+class SubscriptionGrid:
+    """Buckets subscriptions by the lat/lon grid cells their viewport covers"""
+
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.cells = defaultdict(set)
+        self.unbounded = set()
+        self._cells_by_sub = {}
+
+    def _cell(self, lat, lon):
+        return (
+            math.floor((lat + 90.0) / self.cell_size),
+            math.floor((lon + 180.0) / self.cell_size),
+        )
+
+    def _cells_for_bbox(self, bbox):
+        west, south, east, north = bbox
+        spans = [(west, east)] if west <= east else [(west, 180.0), (-180.0, east)]
+        row_min, _ = self._cell(south, 0)
+        row_max, _ = self._cell(north, 0)
+
+        cells = []
+        for span_west, span_east in spans:
+            _, col_min = self._cell(0, span_west)
+            _, col_max = self._cell(0, span_east)
+            for row in range(row_min, row_max + 1):
+                for col in range(col_min, col_max + 1):
+                    cells.append((row, col))
+                    if len(cells) > MAX_SUBSCRIPTION_CELLS:
+                        return None
+        return cells
+
+    def add(self, sub):
+        cells = self._cells_for_bbox(sub.bbox) if sub.bbox else None
+        if cells is None:
+            self.unbounded.add(sub)
+        else:
+            for cell in cells:
+                self.cells[cell].add(sub)
+        self._cells_by_sub[sub] = cells
+
+    def remove(self, sub):
+        cells = self._cells_by_sub.pop(sub, None)
+        if cells is None:
+            self.unbounded.discard(sub)
+            return
+        for cell in cells:
+            bucket = self.cells.get(cell)
+            if bucket is not None:
+                bucket.discard(sub)
+                if not bucket:
+                    del self.cells[cell]
+
+    def candidates(self, lat, lon):
+        return self.cells.get(self._cell(lat, lon), set()) | self.unbounded
+
+
+class LiveVesselHub:
+    """Per-process fan-out of vessel changes to stream subscriptions"""
+
+    def __init__(self):
+        self.grid = SubscriptionGrid(settings.VESSEL_STREAM_GRID_SIZE)
+        self.subscriptions = set()
+        self.last_seq = None
+        self._task = None
+
+    async def subscribe(self, sub):
+        if self.last_seq is None:
+            self.last_seq = await sync_to_async(ChangeCounter.current)(Vessel.CHANGE_COUNTER)
+        self.subscriptions.add(sub)
+        self.grid.add(sub)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._poll())
+
+    def unsubscribe(self, sub):
+        self.subscriptions.discard(sub)
+        self.grid.remove(sub)
+        if not self.subscriptions:
+            if self._task is not None:
+                self._task.cancel()
+            self._task = None
+            self.last_seq = None
+
+    def publish(self, rows):
+        for row in rows:
+            for sub in self.grid.candidates(row['latitude'], row['longitude']):
+                if sub.matches(row):
+                    sub.push(row)
+
+    def _fetch_changes(self):
+        return list(
+            Vessel.objects.filter(
+                change_seq__gt=self.last_seq,
+                latitude__isnull=False,
+                longitude__isnull=False,
+            ).order_by('change_seq').values(*STREAM_FIELDS)[:POLL_BATCH_SIZE]
+        )
+
+    async def _poll(self):
+        while True:
+            await asyncio.sleep(settings.VESSEL_STREAM_POLL_INTERVAL)
+            try:
+                rows = await sync_to_async(self._fetch_changes)()
+            except Exception as e:
+                logger.error(f"Vessel stream poll failed: {str(e)}")
+                continue
+            if rows:
+                self.last_seq = rows[-1]['change_seq']
+                self.publish(rows)
+
+
+hub = LiveVesselHub()
+
+
+@sync_to_async
+def _authenticate(raw_token):
+    auth = JWTAuthentication()
+    try:
+        return auth.get_user(auth.get_validated_token(raw_token))
+    except (InvalidToken, AuthenticationFailed):
+        return None
+
+
+def _encode_event(rows):
+    vessels = []
+    for row in rows:
+        vessel = {key: row[key] for key in STREAM_FIELDS if key != 'change_seq'}
+        vessel['status_color'] = status_color(row['status'])
+        vessels.append(vessel)
+    data = json.dumps(vessels, cls=DjangoJSONEncoder, separators=(',', ':'))
+    return f"event: positions\ndata: {data}\n\n".encode()
+
+
+async def _send_error(send, status, detail):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json')],
+    })
+    await send({'type': 'http.response.body', 'body': json.dumps({'detail': detail}).encode()})
+
+
+# Only its allowed-origin check is used; the stream bypasses Django's middleware
+_cors = CorsMiddleware(lambda request: None)
+
+
+def _cors_headers(origin):
+    """CORS response headers for an Origin, as django-cors-headers would send them."""
+    if not origin:
+        return []
+    try:
+        value = origin.decode('latin-1')
+        url = urlsplit(value)
+    except ValueError:
+        return []
+    if not cors_conf.CORS_ALLOW_ALL_ORIGINS and not _cors.origin_found_in_white_lists(value, url):
+        return []
+
+    headers = [(
+        b'access-control-allow-origin',
+        b'*' if cors_conf.CORS_ALLOW_ALL_ORIGINS and not cors_conf.CORS_ALLOW_CREDENTIALS else origin,
+    )]
+    if cors_conf.CORS_ALLOW_CREDENTIALS:
+        headers.append((b'access-control-allow-credentials', b'true'))
+    headers.append((b'vary', b'origin'))
+    return headers
+
+
+async def _wait_for_disconnect(receive):
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return
+
+
+async def vessel_stream(scope, receive, send):
+    """ASGI application serving the live vessel event stream"""
+    params = parse_qs(scope.get('query_string', b'').decode())
+
+    def param(name):
+        return params.get(name, [None])[0]
+
+    def param_list(name):
+        return [v for value in params.get(name, []) for v in value.split(',') if v]
+
+    user = await _authenticate(param('token') or '')
+    if user is None or not user.is_active:
+        await _send_error(send, 401, 'Authentication credentials were not provided or are invalid.')
+        return
+
+    try:
+        bbox = parse_bbox(param('bbox'))
+        max_rate = float(param('max_rate') or settings.VESSEL_STREAM_MAX_RATE)
+        if not math.isfinite(max_rate):
+            raise ValueError
+    except (ValidationError, ValueError):
+        await _send_error(send, 400, 'Invalid bbox or max_rate.')
+        return
+    max_rate = min(max(max_rate, 0.01), settings.VESSEL_STREAM_MAX_RATE)
+
+    sub = Subscription(
+        bbox=bbox,
+        vessel_types=param_list('vessel_type'),
+        statuses=param_list('status'),
+        max_rate=max_rate,
+    )
+
+    headers = [
+        (b'content-type', b'text/event-stream'),
+        (b'cache-control', b'no-cache'),
+        (b'x-accel-buffering', b'no'),
+    ]
+    headers.extend(_cors_headers(dict(scope.get('headers', [])).get(b'origin')))
+
+    await send({'type': 'http.response.start', 'status': 200, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': b': connected\n\n', 'more_body': True})
+
+    await hub.subscribe(sub)
+    disconnected = asyncio.create_task(_wait_for_disconnect(receive))
+    try:
+        while not disconnected.done():
+            ready = asyncio.create_task(sub.ready.wait())
+            done, _ = await asyncio.wait(
+                {ready, disconnected},
+                timeout=settings.VESSEL_STREAM_KEEPALIVE,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            ready.cancel()
+            if disconnected in done:
+                break
+            if ready not in done:
+                await send({'type': 'http.response.body', 'body': b': keepalive\n\n', 'more_body': True})
+                continue
+
+            await send({'type': 'http.response.body', 'body': _encode_event(sub.drain()), 'more_body': True})
+            # Rate limit; updates arriving meanwhile are coalesced into the next event
+            await asyncio.sleep(sub.min_interval)
+    finally:
+        hub.unsubscribe(sub)
+        disconnected.cancel()
@@ -1,3 +1,1031 @@
-from django.test import TestCase
+import asyncio
+import json
+import math
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from asgiref.sync import sync_to_async
+from asgiref.testing import ApplicationCommunicator
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.asgi import application
+from ports.models import Port
+from users.models import User
+from . import snapshots, statistics, track_levels
+from .encoders import json_array_chunks, row_encoder
+from .models import ChangeCounter, FleetSnapshot, TrackLevel, Vessel, VesselPosition
+from .nearby import VesselGrid, distances_km, reset_grid
+from .search import SearchIndex, reset_index
+from .serializers import VesselLiveSerializer, VesselMapSerializer, VesselSerializer
+from .stream import STREAM_PATH, Subscription, SubscriptionGrid
+from .tiles import build_tile
+from .tracking import record_position
+
+
+class SubscriptionGridTests(TestCase):
+    def test_candidates_only_from_touched_cells(self):
+        grid = SubscriptionGrid(cell_size=5.0)
+        north_sea = Subscription(bbox=(0.0, 50.0, 8.0, 58.0))
+        dateline = Subscription(bbox=(175.0, -5.0, -175.0, 5.0))
+        world = Subscription()
+        for sub in (north_sea, dateline, world):
+            grid.add(sub)
+
+        self.assertEqual(grid.candidates(54.0, 4.0), {north_sea, world})
+        self.assertEqual(grid.candidates(0.0, -178.0), {dateline, world})
+        self.assertEqual(grid.candidates(-30.0, 60.0), {world})
+
+        grid.remove(north_sea)
+        self.assertEqual(grid.candidates(54.0, 4.0), {world})
+
+    def test_filters_and_coalescing(self):
+        sub = Subscription(bbox=(0.0, 50.0, 8.0, 58.0), vessel_types=['Cargo'])
+        row = {'id': 1, 'latitude': 54.0, 'longitude': 4.0, 'vessel_type': 'Cargo', 'status': 'underway'}
+        self.assertTrue(sub.matches(row))
+        self.assertFalse(sub.matches({**row, 'vessel_type': 'Tanker'}))
+        self.assertFalse(sub.matches({**row, 'longitude': 9.0}))
+
+        sub.push(row)
+        sub.push({**row, 'latitude': 54.5})
+        self.assertEqual(sub.drain(), [{**row, 'latitude': 54.5}])
+        self.assertFalse(sub.ready.is_set())
+
+
+class RowEncoderTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        Vessel.objects.create(
+            name='Nordlys Ærø', mmsi='257000001', imo_number='9000001', vessel_type='Tanker',
+            type='tanker', flag='NO', latitude=59.91234567, longitude=10.75, speed=12.3,
+            course=Decimal('271.5'), heading=270, status='underway', destination='OSLO',
+            last_position_update=now - timedelta(minutes=5), data_source='aisstream',
+        )
+        # Nulls everywhere allowed, plus a status outside STATUS_CHOICES
+        Vessel.objects.create(name='Unknown "quoted"', mmsi='257000002', status='aground', flag=None)
+        Vessel.objects.create(
+            name='Negative', mmsi='257000003', latitude=-33.5, longitude=-70.0, speed=0.0,
+            course=Decimal('0.00'), heading=0, status='Docked', last_position_update=now,
+        )
+
+    def assert_same_bytes(self, serializer_class):
+        fields, encode = row_encoder(serializer_class)
+        queryset = Vessel.objects.order_by('id')
+        expected = JSONRenderer().render(serializer_class(queryset, many=True).data)
+
+        encoded = encode(queryset.values_list(*fields))
+        self.assertEqual(JSONRenderer().render(encoded), expected)
+        streamed = b''.join(json_array_chunks(queryset.values_list(*fields), encode, batch_size=2))
+        self.assertEqual(streamed, expected)
+
+    def test_live_serializer_output_is_identical(self):
+        self.assert_same_bytes(VesselLiveSerializer)
+
+    def test_map_serializer_output_is_identical(self):
+        self.assert_same_bytes(VesselMapSerializer)
+
+    def test_active_timezone_is_applied(self):
+        with timezone.override('Asia/Kolkata'):
+            self.assert_same_bytes(VesselLiveSerializer)
+
+    def test_empty_stream_is_an_empty_array(self):
+        fields, encode = row_encoder(VesselLiveSerializer)
+        self.assertEqual(b''.join(json_array_chunks(iter(()), encode)), b'[]')
+
+
+@override_settings(VESSEL_STREAM_POLL_INTERVAL=0.05, VESSEL_STREAM_MAX_RATE=20.0)
+class VesselStreamTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('operator@example.com', 'pw', role='operator')
+        self.token = str(AccessToken.for_user(self.user))
+
+    def _communicator(self, query, headers=()):
+        return ApplicationCommunicator(application, {
+            'type': 'http',
+            'method': 'GET',
+            'path': STREAM_PATH,
+            'query_string': query.encode(),
+            'headers': list(headers),
+        })
+
+    def _start(self, query, headers=()):
+        async def run():
+            communicator = self._communicator(query, headers)
+            await communicator.send_input({'type': 'http.request'})
+            start = await communicator.receive_output(timeout=2)
+            await communicator.send_input({'type': 'http.disconnect'})
+            await communicator.wait(timeout=2)
+            return start
+
+        return asyncio.run(run())
+
+    def test_rejects_non_finite_max_rate(self):
+        for value in ('nan', 'inf', '-inf', 'abc'):
+            with self.subTest(max_rate=value):
+                self.assertEqual(self._start(f'token={self.token}&max_rate={value}')['status'], 400)
+
+    @override_settings(CORS_ALLOW_ALL_ORIGINS=False, CORS_ALLOWED_ORIGINS=['http://localhost:5173'])
+    def test_cors_follows_allowed_origins(self):
+        allowed = dict(self._start(f'token={self.token}', [(b'origin', b'http://localhost:5173')])['headers'])
+        self.assertEqual(allowed[b'access-control-allow-origin'], b'http://localhost:5173')
+
+        other = dict(self._start(f'token={self.token}', [(b'origin', b'http://evil.example')])['headers'])
+        self.assertNotIn(b'access-control-allow-origin', other)
+
+    def test_rejects_missing_token(self):
+        async def run():
+            communicator = self._communicator('bbox=0,50,8,58')
+            await communicator.send_input({'type': 'http.request'})
+            start = await communicator.receive_output(timeout=2)
+            self.assertEqual(start['status'], 401)
+
+        asyncio.run(run())
+
+    def test_pushes_changes_inside_viewport(self):
+        async def run():
+            communicator = self._communicator(f'token={self.token}&bbox=0,50,8,58')
+            await communicator.send_input({'type': 'http.request'})
+            start = await communicator.receive_output(timeout=2)
+            self.assertEqual(start['status'], 200)
+            await communicator.receive_output(timeout=2)  # ": connected"
+
+            now = timezone.now()
+            await sync_to_async(Vessel.objects.create)(
+                name='Outside', mmsi='100', latitude=10.0, longitude=10.0, last_position_update=now,
+            )
+            await sync_to_async(Vessel.objects.create)(
+                name='Inside', mmsi='200', latitude=54.0, longitude=4.0, last_position_update=now,
+            )
+
+            message = await communicator.receive_output(timeout=2)
+            event, data = message['body'].decode().strip().split('\n')
+            self.assertEqual(event, 'event: positions')
+            self.assertEqual([v['mmsi'] for v in json.loads(data[len('data: '):])], ['200'])
+
+            await communicator.send_input({'type': 'http.disconnect'})
+            await communicator.wait(timeout=2)
+
+        asyncio.run(run())
+
+
+class RouteParamTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('analyst@example.com', 'pw', role='analyst')
+        cls.vessel = Vessel.objects.create(name='Route', mmsi='257000010', latitude=1.0, longitude=1.0)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_rejects_non_finite_and_out_of_range_values(self):
+        url = f'/api/vessels/{self.vessel.pk}/route/'
+        for query in ('tolerance=nan', 'tolerance=inf', 'hours=1000000000', 'max_points=-1', 'bucket=1e9', 'hours=abc'):
+            with self.subTest(query=query):
+                self.assertEqual(self.client.get(f'{url}?{query}').status_code, 400)
+        self.assertEqual(self.client.get(f'{url}?hours=48&tolerance=50').status_code, 200)
+
+    def test_playback_rejects_unbounded_steps(self):
+        url = '/api/vessels/playback/?bbox=0,50,10,60'
+        for query in ('interval=nan', 'interval=1e300', 'max_gap=nan', 'max_gap=inf', 'max_gap=1e12'):
+            with self.subTest(query=query):
+                self.assertEqual(self.client.get(f'{url}&{query}').status_code, 400)
+        self.assertEqual(self.client.get(f'{url}&interval=120&max_gap=3600').status_code, 200)
+
+    def test_trails_caps_window_and_points(self):
+        url = f'/api/vessels/trails/?ids={self.vessel.pk}'
+        for query in ('hours=100000', 'hours=nan', 'max_points=1000000', 'max_points=0'):
+            with self.subTest(query=query):
+                self.assertEqual(self.client.get(f'{url}&{query}').status_code, 400)
+
+        VesselPosition.objects.create(vessel=self.vessel, latitude=1.0, longitude=1.0, timestamp=timezone.now())
+        response = self.client.get(f'{url}&hours=24&max_points=50')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['trails'][0]['total_positions'], 1)
+
+
+class ImportVesselsTests(TestCase):
+    HEADER = 'name,mmsi,latitude,longitude,timestamp\n'
+
+    def run_import(self, rows):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as file:
+            file.write(self.HEADER + rows)
+        self.addCleanup(os.remove, file.name)
+        call_command('import_vessels', file=file.name, stdout=open(os.devnull, 'w'))
+
+    def test_reimport_records_only_new_reports(self):
+        rows = 'A,257000020,54.0,4.0,2026-01-01T10:00:00Z\nB,257000021,55.0,5.0,\n'
+        self.run_import(rows)
+        self.run_import(rows)
+        self.assertEqual(VesselPosition.objects.count(), 2)
+        a = VesselPosition.objects.get(vessel__mmsi='257000020')
+        self.assertEqual(a.timestamp.isoformat(), '2026-01-01T10:00:00+00:00')
+
+        self.run_import('A,257000020,54.0,4.0,2026-01-01T11:00:00Z\nB,257000021,55.5,5.0,\n')
+        self.assertEqual(VesselPosition.objects.count(), 4)
+        self.assertEqual(Vessel.objects.get(mmsi='257000021').position_count, 2)
+
+
+@override_settings(VESSEL_STATS_CACHE_TTL=3600)
+class StatisticsCacheTests(TestCase):
+    URL = '/api/vessels/statistics/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('stats@example.com', 'pw', role='analyst')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get(self, etag=None):
+        return self.client.get(self.URL, HTTP_IF_NONE_MATCH=etag) if etag else self.client.get(self.URL)
+
+    def add_vessel(self, mmsi):
+        Vessel.objects.create(name=f'Stats {mmsi}', mmsi=mmsi, latitude=54.0, longitude=4.0)
+
+    def test_vessel_writes_invalidate_at_most_once_per_ttl(self):
+        self.add_vessel('211000001')
+        ChangeCounter.objects.filter(name=Vessel.CHANGE_COUNTER).update(
+            updated_at=timezone.now() - timedelta(hours=2)
+        )
+        first = self.get()
+        self.assertEqual(first.data['total_vessels'], 1)
+
+        # First write after a quiet spell: new version, fresh counts
+        etag = first['ETag']
+        self.add_vessel('211000002')
+        second = self.get(etag)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.data['total_vessels'], 2)
+
+        # Further writes in the same bucket keep the cached body and its ETag
+        self.add_vessel('211000003')
+        self.assertEqual(self.get(second['ETag']).status_code, 304)
+        self.assertEqual(self.get().data['total_vessels'], 2)
+
+    def test_port_writes_invalidate(self):
+        etag = self.get()['ETag']
+        ChangeCounter.next('ports')
+        self.assertEqual(self.get(etag).status_code, 200)
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('pager@example.com', 'pw', role='analyst')
+        base = timezone.now() - timedelta(hours=1)
+        cls.ids = []
+        for index in range(5):
+            vessel = Vessel.objects.create(name=f'Page {index}', mmsi=f'257000{index:03d}')
+            # Newest first: ids[0] is the most recently updated
+            Vessel.objects.filter(pk=vessel.pk).update(last_updated=base - timedelta(minutes=index))
+            cls.ids.append(vessel.pk)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def page(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.data, [row['id'] for row in response.data['results']]
+
+    def test_cursors_stable_while_rows_are_inserted(self):
+        first, ids = self.page('/api/vessels/?pagination=cursor&page_size=2')
+        self.assertEqual(ids, self.ids[:2])
+
+        # A newer vessel lands in front of the first page
+        Vessel.objects.create(name='Late', mmsi='257000099')
+
+        second, ids = self.page(first['next'])
+        self.assertEqual(ids, self.ids[2:4])
+        third, ids = self.page(second['next'])
+        self.assertEqual(ids, self.ids[4:])
+        self.assertIsNone(third['next'])
+
+        _, ids = self.page(second['previous'])
+        self.assertEqual(ids, self.ids[:2])
+
+    def test_invalid_cursor(self):
+        for cursor in ('not-base64!', 'eyJ2IjpbMV19', 'eyJkIjoibiIsInYiOlsieCIsInkiXX0='):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.client.get(f'/api/vessels/?cursor={cursor}').status_code, 404)
+
+
+class SparseFieldsetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('sparse@example.com', 'pw', role='analyst')
+        cls.vessel = Vessel.objects.create(name='Sparse', mmsi='257000090', destination='Hamburg')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_unknown_field_is_rejected(self):
+        for query in ('fields=id,bogus', 'omit=bogus'):
+            with self.subTest(query=query):
+                response = self.client.get(f'/api/vessels/?{query}')
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('bogus', str(response.data))
+
+    def test_fields_limit_selected_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/api/vessels/{self.vessel.pk}/?fields=id,name')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data), {'id', 'name'})
+        select = next(query['sql'] for query in queries if 'FROM "vessels_vessel"' in query['sql'])
+        self.assertIn('"vessels_vessel"."name"', select)
+        self.assertNotIn('"vessels_vessel"."destination"', select)
+
+    def test_omitted_method_field_is_not_called(self):
+        with mock.patch.object(VesselSerializer, 'get_latest_position') as get_latest_position:
+            response = self.client.get(f'/api/vessels/{self.vessel.pk}/?omit=latest_position')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('latest_position', response.data)
+        self.assertEqual(response.data['destination'], 'Hamburg')
+        get_latest_position.assert_not_called()
+
+
+class TrackLevelTests(TestCase):
+    def setUp(self):
+        self.vessel = Vessel.objects.create(name='Levels', mmsi='257000030')
+        self.day = timezone.now().replace(hour=12, minute=0, second=0, microsecond=0)
+
+    def add(self, pk, minutes):
+        VesselPosition.objects.create(
+            pk=pk, vessel=self.vessel, latitude=54.0 + minutes / 100, longitude=4.0,
+            timestamp=self.day + timedelta(minutes=minutes),
+        )
+
+    def test_late_commit_below_watermark_is_rebuilt(self):
+        self.add(1001, 0)
+        self.add(1010, 20)
+        self.assertEqual(track_levels.update_levels(), (2, 1))
+
+        # Committed after the run with an id below the watermark
+        self.add(1005, 10)
+        self.assertEqual(track_levels.update_levels(), (0, 1))
+        level = TrackLevel.objects.get(vessel=self.vessel, level=4)
+        self.assertEqual(level.source_count, 3)
+        self.assertEqual(track_levels.update_levels(), (0, 0))
+
+
+class VectorTileTests(TestCase):
+    def test_vessel_layer_skips_stale_vessels(self):
+        Vessel.objects.create(name='Fresh Ship', mmsi='257000040', latitude=54.0, longitude=4.0)
+        stale = Vessel.objects.create(name='Stale Ship', mmsi='257000041', latitude=55.0, longitude=5.0)
+        Vessel.objects.filter(pk=stale.pk).update(last_position_update=timezone.now() - timedelta(hours=3))
+
+        tile = build_tile(0, 0, 0)
+        self.assertIn(b'Fresh Ship', tile)
+        self.assertNotIn(b'Stale Ship', tile)
+        self.assertIn(b'Stale Ship', build_tile(0, 0, 0, hours=6))
+
+
+class VesselGridTests(TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        lats = np.concatenate([rng.uniform(-89.9, 89.9, 400), rng.uniform(85.0, 89.9, 50)])
+        lons = np.concatenate([rng.uniform(-180.0, 180.0, 400), rng.uniform(-180.0, 180.0, 50)])
+        self.points = list(zip(range(1, len(lats) + 1), lats.tolist(), lons.tolist()))
+        self.grid = VesselGrid(
+            [(vessel_id, lat, lon, 'Cargo', 'active', None) for vessel_id, lat, lon in self.points],
+            seq=0, cell_size=1.0,
+        )
+
+    def brute_force(self, lat, lon):
+        ids = [vessel_id for vessel_id, _, _ in self.points]
+        distances = distances_km(lat, lon, [p[1] for p in self.points], [p[2] for p in self.points])
+        return sorted(zip(distances.tolist(), ids))
+
+    def test_within_and_nearest_match_brute_force(self):
+        # Open sea, across the dateline and near the pole
+        for lat, lon in ((54.0, 4.0), (10.0, 179.5), (-20.0, -179.9), (88.0, 30.0)):
+            expected = self.brute_force(lat, lon)
+            for radius in (50.0, 800.0, 5000.0):
+                with self.subTest(lat=lat, lon=lon, radius=radius):
+                    self.assertEqual(
+                        [vessel_id for _, vessel_id in self.grid.within(lat, lon, radius)],
+                        [vessel_id for distance, vessel_id in expected if distance <= radius],
+                    )
+                    self.assertEqual(
+                        self.grid.count_within(lat, lon, radius),
+                        sum(1 for distance, _ in expected if distance <= radius),
+                    )
+            for k in (1, 7, 60):
+                with self.subTest(lat=lat, lon=lon, k=k):
+                    self.assertEqual(
+                        [vessel_id for _, vessel_id in self.grid.nearest(lat, lon, k)],
+                        [vessel_id for _, vessel_id in expected[:k]],
+                    )
+
+    def test_nearest_with_non_finite_radius(self):
+        everything = self.grid.nearest(0.0, 0.0, len(self.points) + 5, max_radius_km=math.inf)
+        self.assertEqual(len(everything), len(self.points))
+        self.assertEqual(len(self.grid.nearest(0.0, 0.0, 3, max_radius_km=math.nan)), 3)
+
+
+class NearbyParamTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('nearby@example.com', 'pw', role='analyst')
+        Vessel.objects.create(name='Near', mmsi='257000060', latitude=54.0, longitude=4.0)
+
+    def setUp(self):
+        reset_grid()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_rejects_bad_parameters(self):
+        for query in ('vessel=abc', 'lat=54&lon=4&radius_km=nan', 'lat=54&lon=4&radius_km=inf',
+                      'lat=54&lon=4&radius_km=100000', 'lat=54&lon=4&hours=nan', 'lat=nan&lon=4'):
+            with self.subTest(query=query):
+                self.assertEqual(self.client.get(f'/api/vessels/nearby/?{query}').status_code, 400)
+        self.assertEqual(self.client.get('/api/vessels/nearby/?vessel=999999').status_code, 404)
+
+        response = self.client.get('/api/vessels/nearby/?lat=54&lon=4.1&radius_km=50')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 1)
+
+
+@override_settings(VESSEL_SNAPSHOT_INTERVAL=3600, VESSEL_SNAPSHOT_LAG=0)
+class VesselSearchTests(TestCase):
+    def test_exact_identifier_then_prefix_then_similar_name(self):
+        rows = [
+            (1, 'Nordic Star', '257000123', 'IMO9000123', None),
+            (2, 'Baltic Star', '257000124', 'IMO9000124', None),
+            (3, 'Vessel 257000', '636000001', 'IMO9100001', None),
+        ]
+        # Filler sharing every digit trigram, so counting alone can't single out row 1
+        rows += [(10 + i, f'Filler {i}', f'2571{i:05d}', f'IMO93{i:05d}', None) for i in range(1000)]
+        index = SearchIndex(rows, 0)
+
+        self.assertEqual(index.search('257000123', 1), [(1, 1.0)])
+        self.assertEqual(index.search('IMO 9000123', 1), [(1, 1.0)])
+        ranked = index.search('25700012', 3)
+        self.assertEqual({vessel_id for vessel_id, _ in ranked[:2]}, {1, 2})
+        self.assertEqual(ranked[0][1], 0.85)
+        self.assertEqual(index.search('Nordc Star', 1)[0][0], 1)
+
+    def test_short_query_uses_identifier_table(self):
+        rows = [(i, f'Filler {i}', f'2570{i:05d}', f'IMO9{i:06d}', None) for i in range(1, 3000)]
+        index = SearchIndex(rows, 0)
+        results = index.search('9', 10)
+        self.assertEqual(len(results), 10)
+        self.assertTrue(all(value == 0.85 for _, value in results))
+
+    @override_settings(VESSEL_SEARCH_REFRESH_INTERVAL=0)
+    def test_rename_is_picked_up_incrementally(self):
+        user = User.objects.create_user('search@example.com', 'pw', role='analyst')
+        client = APIClient()
+        client.force_authenticate(user)
+        vessel = Vessel.objects.create(name='Nordic Star', mmsi='257000123')
+        Vessel.objects.create(name='Baltic Trader', mmsi='257000124')
+        reset_index()
+        self.addCleanup(reset_index)
+
+        def names(query):
+            response = client.get('/api/vessels/autocomplete/', {'q': query})
+            self.assertEqual(response.status_code, 200)
+            return [row['name'] for row in response.data['results'] if row['score'] >= 0.9]
+
+        self.assertEqual(names('nordic'), ['Nordic Star'])
+        vessel.name = 'Arctic Star'
+        vessel.save(update_fields=['name'])
+        self.assertEqual(names('arctic'), ['Arctic Star'])
+        self.assertEqual(names('nordic'), [])
+        self.assertEqual(names('baltic'), ['Baltic Trader'])
+
+
+class FleetSnapshotTests(TestCase):
+    def setUp(self):
+        snapshots.load.cache_clear()
+        rng = np.random.default_rng(11)
+        self.start = datetime(2026, 3, 1, tzinfo=dt_timezone.utc)
+        vessels = [
+            Vessel.objects.create(name=f'Snap {index}', mmsi=f'257100{index:03d}') for index in range(6)
+        ]
+        # Distinct (vessel, minute) slots; whole minutes, so reports of
+        # different vessels share timestamps
+        slots = rng.choice(len(vessels) * 6 * 60, size=300, replace=False)
+        VesselPosition.objects.bulk_create([
+            VesselPosition(
+                vessel=vessels[slot % len(vessels)],
+                latitude=float(rng.uniform(-60, 60)),
+                longitude=float(rng.uniform(-180, 180)),
+                timestamp=self.start + timedelta(minutes=slot // len(vessels)),
+            )
+            for slot in slots.tolist()
+        ])
+
+    def brute_force(self, at):
+        latest = {}
+        for position in VesselPosition.objects.filter(timestamp__lte=at).order_by('timestamp', 'id'):
+            latest[position.vessel_id] = position.pk
+        return latest
+
+    def test_fleet_at_matches_latest_position_per_vessel(self):
+        snapshots.update_snapshots(now=self.start + timedelta(hours=4, minutes=30))
+        self.assertEqual(FleetSnapshot.objects.count(), 1)
+        snapshots.update_snapshots(now=self.start + timedelta(hours=6))
+        self.assertGreater(FleetSnapshot.objects.count(), 1)
+
+        for minutes in (-5, 0, 59, 60, 61, 150, 245, 359, 400):
+            at = self.start + timedelta(minutes=minutes)
+            with self.subTest(at=at):
+                arrays, _ = snapshots.fleet_at(at)
+                self.assertEqual(
+                    dict(zip(arrays['vessel_id'].tolist(), arrays['position_id'].tolist())),
+                    self.brute_force(at),
+                )
+
+    def test_view_reads_vessels_in_id_batches(self):
+        user = User.objects.create_user('snapshot@example.com', 'pw', role='analyst')
+        client = APIClient()
+        client.force_authenticate(user)
+        at = self.start + timedelta(hours=6)
+
+        with mock.patch('vessels.views.SNAPSHOT_ID_BATCH', 2), CaptureQueriesContext(connection) as queries:
+            response = client.get('/api/vessels/snapshot/', {'at': at.isoformat()})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({row['id'] for row in response.data['vessels']}, set(self.brute_force(at)))
+
+        reads = [query['sql'] for query in queries if query['sql'].startswith('SELECT "vessels_vessel"."id"')]
+        self.assertEqual(len(reads), 3)
+        self.assertTrue(all(' IN (' in sql for sql in reads))
+
+
+class BulkPositionIngestTests(TestCase):
+    URL = '/api/vessels/positions/bulk/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('operator@example.com', 'pw', role='operator')
+        cls.vessel = Vessel.objects.create(name='Ingest', mmsi='257000070')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.now = timezone.now().replace(microsecond=0)
+
+    def post(self, reports):
+        return self.client.post(self.URL, {'positions': reports}, format='json')
+
+    def report(self, minutes_ago, latitude=54.0, **extra):
+        timestamp = (self.now - timedelta(minutes=minutes_ago)).isoformat()
+        return {'mmsi': '257000070', 'latitude': latitude, 'longitude': 4.0, 'timestamp': timestamp, **extra}
+
+    def test_mixed_batch_is_multi_status(self):
+        response = self.post([
+            self.report(5),
+            self.report(4, latitude=95.0),
+            {'mmsi': '999999999', 'latitude': 54.0, 'longitude': 4.0},
+        ])
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual((response.data['created'], response.data['failed']), (1, 2))
+        self.assertEqual(
+            [result['status'] for result in response.data['results']], ['created', 'error', 'error']
+        )
+        self.assertIn('latitude', response.data['results'][1]['errors'])
+
+    def test_duplicate_report_is_not_stored_twice(self):
+        self.assertEqual(self.post([self.report(5)]).status_code, 200)
+        response = self.post([self.report(5), self.report(5)])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['duplicates'], 2)
+        self.assertEqual(VesselPosition.objects.filter(vessel=self.vessel).count(), 1)
+        self.vessel.refresh_from_db()
+        self.assertEqual(self.vessel.position_count, 1)
+
+    def test_position_recorded_elsewhere_is_a_duplicate(self):
+        first = record_position(self.vessel, 54.0, 4.0, timestamp=self.now - timedelta(minutes=5))
+        self.assertEqual(record_position(self.vessel, 54.5, 4.5, timestamp=first.timestamp), first)
+
+        response = self.post([self.report(5)])
+        self.assertEqual(response.data['duplicates'], 1)
+        self.assertEqual(response.data['results'][0]['position'], first.pk)
+        self.vessel.refresh_from_db()
+        self.assertEqual(self.vessel.position_count, 1)
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            VesselPosition.objects.create(vessel=self.vessel, latitude=0.0, longitude=0.0, timestamp=first.timestamp)
+
+    def test_out_of_order_report_keeps_latest_position(self):
+        self.post([self.report(5, latitude=55.0)])
+        latest = VesselPosition.objects.get(vessel=self.vessel)
+
+        self.assertEqual(self.post([self.report(30, latitude=50.0)]).status_code, 200)
+        self.vessel.refresh_from_db()
+        self.assertEqual(self.vessel.latest_position_id, latest.pk)
+        self.assertEqual(self.vessel.latitude, 55.0)
+        self.assertEqual(self.vessel.position_count, 2)
+        self.assertEqual(self.vessel.first_seen, self.now - timedelta(minutes=30))
+
+    def test_future_timestamp_is_rejected(self):
+        response = self.post([self.report(-24 * 60)])
+        self.assertEqual(response.status_code, 207)
+        self.assertIn('timestamp', response.data['results'][0]['errors'])
+        self.assertFalse(VesselPosition.objects.exists())
+
+
+class PositionStatsSaveTests(TestCase):
+    def setUp(self):
+        self.vessel = Vessel.objects.create(name='Stats', mmsi='257000080')
+
+    def test_update_keeps_stats_recorded_meanwhile(self):
+        stale = Vessel.objects.get(pk=self.vessel.pk)
+        record_position(self.vessel, 54.0, 4.0)
+        serializer = VesselSerializer(stale, data={'destination': 'Rotterdam'}, partial=True)
+        self.assertTrue(serializer.is_valid())
+        serializer.save()
+        self.vessel.refresh_from_db()
+        self.assertEqual((self.vessel.destination, self.vessel.position_count), ('Rotterdam', 1))
+
+    def test_plain_save_keeps_django_semantics(self):
+        pk = self.vessel.pk
+        Vessel.objects.filter(pk=pk).delete()
+        self.vessel.save()
+        self.assertTrue(Vessel.objects.filter(pk=pk).exists())
+
+
+class ChangeCursorTests(TestCase):
+    URL = '/api/vessels/map-view/?bbox=0,50,8,58'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('delta@example.com', 'pw', role='analyst')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.inside = Vessel.objects.create(name='Inside', mmsi='257000080', latitude=54.0, longitude=4.0)
+        self.outside = Vessel.objects.create(name='Outside', mmsi='257000081', latitude=10.0, longitude=4.0)
+        self.cursor = self.client.get(self.URL).data['cursor']
+
+    def delta(self, cursor=None):
+        response = self.client.get(f'{self.URL}&since={cursor or self.cursor}')
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.data['vessels']], response.data['removed']
+
+    def move(self, vessel, latitude):
+        vessel.latitude = latitude
+        vessel.last_position_update = timezone.now()
+        vessel.save()
+
+    def test_changed_vessel_is_sent(self):
+        self.move(self.inside, 55.0)
+        self.assertEqual(self.delta(), ([self.inside.pk], []))
+
+    def test_vessel_leaving_the_viewport_is_removed(self):
+        self.move(self.inside, 20.0)
+        self.assertEqual(self.delta(), ([], [self.inside.pk]))
+
+    def test_changes_outside_the_viewport_are_not_reported(self):
+        self.move(self.outside, 11.0)
+        self.outside.delete()
+        self.assertEqual(self.delta(), ([], []))
+
+    def test_vessel_entering_and_leaving_after_the_cursor_is_not_removed(self):
+        self.move(self.outside, 54.0)
+        self.move(self.outside, 12.0)
+        self.assertEqual(self.delta(), ([], []))
+
+    def test_deleted_vessel_is_removed(self):
+        vessel_id = self.inside.pk
+        self.inside.delete()
+        self.assertEqual(self.delta(), ([], [vessel_id]))
+
+    def test_aged_out_vessel_is_removed(self):
+        seq = int(self.cursor.split('.')[0])
+        half_hour_ago = int(timezone.now().timestamp()) - 1800
+        Vessel.objects.filter(pk__in=[self.inside.pk, self.outside.pk]).update(
+            last_position_update=timezone.now() - timedelta(minutes=80)
+        )
+        already_stale = Vessel.objects.create(name='Stale', mmsi='257000082', latitude=54.0, longitude=5.0)
+        Vessel.objects.filter(pk=already_stale.pk).update(
+            last_position_update=timezone.now() - timedelta(hours=2), change_seq=seq
+        )
+        self.assertEqual(self.delta(f'{seq}.{half_hour_ago}'), ([], [self.inside.pk]))
+
+    def test_rejects_bad_hours(self):
+        for url in ('/api/vessels/map-view/', '/api/vessels/live-tracking/'):
+            for hours in ('abc', '0', 'nan', '100000000'):
+                with self.subTest(url=url, hours=hours):
+                    self.assertEqual(self.client.get(f'{url}?hours={hours}').status_code, 400)
+
+    def test_invalid_and_expired_cursors(self):
+        expired = f"{self.cursor.split('.')[0]}.{int(timezone.now().timestamp()) - 2 * 86400}"
+        for cursor in ('abc', '1.2.3', '99999999999999999999.1e9', expired):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(f'{self.URL}&since={cursor}')
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('since', response.data)
+
+
+@override_settings(FLEET_ETAG_TIME_BUCKET=3600)
+class ConditionalGetTests(TestCase):
+    URL = '/api/vessels/map-view/?bbox=0,50,8,58'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('etag@example.com', 'pw', role='analyst')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.inside = Vessel.objects.create(name='North Sea', mmsi='257000090', latitude=54.0, longitude=4.0)
+        self.outside = Vessel.objects.create(name='Gulf', mmsi='257000091', latitude=-10.0, longitude=100.0)
+
+    def test_not_modified_on_matching_validators(self):
+        response = self.client.get(self.URL)
+        self.assertEqual(response.status_code, 200)
+
+        cached = self.client.get(self.URL, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached['ETag'], response['ETag'])
+        self.assertEqual(self.client.get(self.URL, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304)
+        self.assertEqual(self.client.get(self.URL, HTTP_IF_NONE_MATCH='"stale"').status_code, 200)
+
+    def test_change_inside_region_changes_etag(self):
+        etag = self.client.get(self.URL)['ETag']
+        self.inside.speed = 12.0
+        self.inside.save()
+
+        response = self.client.get(self.URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_change_outside_region_keeps_etag(self):
+        etag = self.client.get(self.URL)['ETag']
+        self.outside.latitude = -11.0
+        self.outside.save()
+
+        response = self.client.get(self.URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+
+class MapViewClusterTests(TestCase):
+    URL = '/api/vessels/map-view/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('clusters@example.com', 'pw', role='analyst')
+        cls.inside = [
+            Vessel.objects.create(name='Cargo A', mmsi='257000101', latitude=54.0, longitude=4.0, vessel_type='Cargo'),
+            Vessel.objects.create(name='Cargo B', mmsi='257000102', latitude=54.2, longitude=4.2, vessel_type='Cargo'),
+            Vessel.objects.create(name='Tanker', mmsi='257000103', latitude=54.1, longitude=4.1, vessel_type='Tanker'),
+        ]
+        cls.outside = Vessel.objects.create(name='Gulf', mmsi='257000104', latitude=-10.0, longitude=100.0)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_small_viewport_returns_vessels(self):
+        response = self.client.get(self.URL, {'bbox': '0,50,8,58', 'zoom': 6})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['mode'], 'vessels')
+        self.assertEqual(response.data['clusters'], [])
+        self.assertEqual({row['id'] for row in response.data['vessels']}, {vessel.pk for vessel in self.inside})
+
+    @override_settings(VESSEL_MAP_CLUSTER_THRESHOLD=2)
+    def test_busy_viewport_returns_clusters(self):
+        response = self.client.get(self.URL, {'bbox': '0,50,8,58', 'zoom': 3})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['mode'], response.data['count']), ('clusters', 3))
+        self.assertEqual(response.data['vessels'], [])
+
+        [cluster] = response.data['clusters']
+        self.assertEqual((cluster['count'], cluster['vessel_type']), (3, 'Cargo'))
+        self.assertAlmostEqual(cluster['latitude'], 54.1)
+        self.assertAlmostEqual(cluster['longitude'], 4.1)
+        self.assertEqual(cluster['bounds'], [4.0, 54.0, 4.2, 54.2])
+
+    def test_zoom_must_be_an_integer(self):
+        self.assertEqual(self.client.get(self.URL, {'bbox': '0,50,8,58', 'zoom': 'far'}).status_code, 400)
+
+
+class ColumnarFormatTests(TestCase):
+    URL = '/api/vessels/live-tracking/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('columnar@example.com', 'pw', role='analyst')
+        now = timezone.now()
+        cls.cargo = Vessel.objects.create(
+            name='Cargo', mmsi='257000111', latitude=54.123456, longitude=-4.5, speed=12.34,
+            vessel_type='Cargo', last_position_update=now,
+        )
+        cls.tanker = Vessel.objects.create(
+            name='Tanker', mmsi='257000112', latitude=-33.9, longitude=18.4,
+            vessel_type='Tanker', last_position_update=now - timedelta(minutes=1),
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_columnar_json(self):
+        response = self.client.get(self.URL, {'format': 'columnar'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/vnd.vessels.columnar+json')
+        payload = json.loads(response.content)
+        self.assertEqual(payload['length'], 2)
+
+        columns = payload['columns']
+        self.assertEqual(columns['id'], [self.cargo.pk, self.tanker.pk])
+        self.assertEqual(columns['latitude'], [5412346, -3390000])
+        self.assertEqual(columns['speed'], [12.3, None])
+        types = payload['dictionaries']['vessel_type']
+        self.assertEqual([types[code] for code in columns['vessel_type']], ['Cargo', 'Tanker'])
+
+    def test_columnar_binary(self):
+        response = self.client.get(self.URL, HTTP_ACCEPT='application/vnd.vessels.columnar')
+        self.assertEqual(response.status_code, 200)
+        body = response.content
+        self.assertEqual(body[:4], b'VSL1')
+
+        header_length = int.from_bytes(body[4:8], 'little')
+        header = json.loads(body[8:8 + header_length])
+        data = body[8 + header_length:]
+        buffers = {buffer['name']: buffer for buffer in header['buffers']}
+
+        def column(name):
+            buffer = buffers[name]
+            return np.frombuffer(data, dtype=buffer['dtype'], count=header['length'], offset=buffer['offset'])
+
+        self.assertEqual(column('latitude').tolist(), [5412346, -3390000])
+        self.assertEqual(column('longitude').tolist(), [-450000, 1840000])
+        self.assertTrue(np.isnan(column('speed')[1]))
+        self.assertEqual(header['strings']['name'], ['Cargo', 'Tanker'])
+
+
+def decode_signed(text):
+    """Inverse of the zigzag/varint encoding used by encoded polylines."""
+    numbers, value, shift = [], 0, 0
+    for char in text:
+        chunk = ord(char) - 63
+        value |= (chunk & 0x1f) << shift
+        shift += 5
+        if chunk < 0x20:
+            numbers.append(~(value >> 1) if value & 1 else value >> 1)
+            value, shift = 0, 0
+    return numbers
+
+
+class RouteFormatTests(TestCase):
+    # Points of the encoded polyline example in Google's documentation
+    POINTS = [(38.5, -120.2), (40.7, -120.95), (43.252, -126.453)]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('routes@example.com', 'pw', role='analyst')
+        cls.vessel = Vessel.objects.create(name='Route', mmsi='257000121')
+        start = timezone.now().replace(microsecond=0) - timedelta(hours=3)
+        for index, (latitude, longitude) in enumerate(cls.POINTS):
+            record_position(cls.vessel, latitude, longitude, speed=10.0 + index,
+                            timestamp=start + timedelta(minutes=10 * index))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = f'/api/vessels/{self.vessel.pk}/route/'
+
+    def test_polyline(self):
+        response = self.client.get(self.url, {'format': 'polyline', 'extras': 'time,speed'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['polyline'], '_p~iF~ps|U_ulLnnqC_mqNvxq`@')
+        self.assertEqual(decode_signed(response.data['times']), [0, 600, 600])
+        self.assertEqual(decode_signed(response.data['speeds']), [100, 10, 10])   # deci-knots
+        self.assertEqual(response.data['returned_positions'], 3)
+
+    def test_geojson_is_streamed(self):
+        response = self.client.get(self.url, {'format': 'geojson'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        feature = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(feature['geometry']['type'], 'LineString')
+        self.assertEqual(feature['geometry']['coordinates'], [[lon, lat] for lat, lon in self.POINTS])
+        self.assertEqual(feature['properties']['vessel']['id'], self.vessel.pk)
+
+    def test_ndjson_is_streamed(self):
+        response = self.client.get(self.url, HTTP_ACCEPT='application/x-ndjson')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual([(row['latitude'], row['longitude']) for row in rows], self.POINTS)
+        self.assertEqual([row['speed'] for row in rows], [10.0, 11.0, 12.0])
+
+
+class DensityTests(TestCase):
+    URL = '/api/vessels/density/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('density@example.com', 'pw', role='analyst')
+        cls.now = timezone.now().replace(microsecond=0)
+        cls.cargo = Vessel.objects.create(name='Cargo', mmsi='257000131', vessel_type='Cargo')
+        tanker = Vessel.objects.create(name='Tanker', mmsi='257000132', vessel_type='Tanker')
+        for minutes, vessel, latitude, longitude in (
+            (120, cls.cargo, 54.5, 4.5),
+            (110, cls.cargo, 54.6, 4.4),
+            (100, tanker, 51.5, 1.5),
+            (90, tanker, 10.0, 10.0),
+        ):
+            record_position(vessel, latitude, longitude, timestamp=cls.now - timedelta(minutes=minutes))
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.params = {
+            'bbox': '0,50,8,58', 'resolution': 8,
+            'start': (self.now - timedelta(hours=3)).isoformat(), 'end': (self.now - timedelta(hours=1)).isoformat(),
+        }
+
+    def test_grid_counts_reports_per_cell(self):
+        response = self.client.get(self.URL, self.params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['width'], response.data['height']), (8, 8))
+        self.assertEqual((response.data['total'], response.data['max']), (3, 2))
+        grid = response.data['grid']
+        # Row 0 is the northern edge: 54-55N is row 3, 51-52N row 6
+        self.assertEqual((grid[3][4], grid[6][1]), (2, 1))
+
+        response = self.client.get(self.URL, {**self.params, 'vessel_type': 'Tanker'})
+        self.assertEqual(response.data['total'], 1)
+
+    def test_closed_range_is_cached(self):
+        self.assertEqual(self.client.get(self.URL, self.params).data['total'], 3)
+        record_position(self.cargo, 55.5, 5.5, timestamp=self.now - timedelta(minutes=150))
+        self.assertEqual(self.client.get(self.URL, self.params).data['total'], 3)
+
+        # A range still open is recomputed
+        open_range = {**self.params, 'end': self.now.isoformat()}
+        self.assertEqual(self.client.get(self.URL, open_range).data['total'], 4)
+
+    def test_png(self):
+        response = self.client.get(self.URL, {**self.params, 'format': 'png'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertEqual(response.content[:8], b'\x89PNG\r\n\x1a\n')
+
+    def test_bbox_is_required(self):
+        self.assertEqual(self.client.get(self.URL).status_code, 400)
+
+
+class PortDashboardTests(TestCase):
+    URL = '/api/ports/dashboard/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('dashboard@example.com', 'pw', role='analyst')
+        cls.port = Port.objects.create(name='Maasvlakte', latitude=51.95, longitude=4.0, country='Netherlands')
+        now = timezone.now()
+        for mmsi, latitude, longitude, reported in (
+            ('257000141', 51.96, 4.05, now),                        # ~4 km
+            ('257000142', 52.10, 4.20, now - timedelta(minutes=30)),  # ~22 km
+            ('257000143', 51.95, 4.01, now - timedelta(hours=3)),     # too old
+            ('257000144', 52.40, 4.50, now),                        # ~60 km
+        ):
+            Vessel.objects.create(
+                name=f'Vessel {mmsi}', mmsi=mmsi, latitude=latitude, longitude=longitude,
+                last_position_update=reported,
+            )
+
+    def setUp(self):
+        reset_grid()
+        self.addCleanup(reset_grid)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def vessels(self, **params):
+        response = self.client.get(self.URL, params)
+        self.assertEqual(response.status_code, 200)
+        [row] = [row for row in response.data['results'] if row['id'] == self.port.pk]
+        return row['vessels']
+
+    def test_counts_recent_vessels_within_radius(self):
+        self.assertEqual(self.vessels(), 2)
+        self.assertEqual(self.vessels(radius_km=100), 3)
+
+    def test_invalid_radius(self):
+        for radius in ('0', '-5', 'nan', 'far', '10000'):
+            with self.subTest(radius=radius):
+                self.assertEqual(self.client.get(self.URL, {'radius_km': radius}).status_code, 400)
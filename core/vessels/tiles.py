@@ -0,0 +1,132 @@
+"""
+Vector tiles of live vessels and recent tracks.
+
+Each tile has up to three layers:
+
+* ``vessels``: one point per vessel with its current position, limited
+  like live-tracking / map-view to vessels reported in the last ``hours``, or
+* ``density``: when the tile holds more than VESSEL_TILE_MAX_VESSELS, a
+  DENSITY_CELLS x DENSITY_CELLS grid of points carrying a ``count``;
+* ``tracks``: from zoom VESSEL_TILE_TRACK_MIN_ZOOM, the last
+  VESSEL_TILE_TRACK_HOURS of positions of vessels seen in the tile.
+
+Tiles are cached by the view under the conditional-GET ETag, which already
+embeds the region watermarks of the tile, so a cached tile is reused until
+a vessel in its regions changes (or the time bucket rolls over).
+"""
+from datetime import timedelta
+from itertools import groupby
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from .geo import bbox_q
+from .models import Vessel, VesselPosition
+from .mvt import (
+    EXTENT,
+    LINESTRING,
+    POINT,
+    Layer,
+    buffered_bounds,
+    clip_line,
+    encode_tile,
+    line_geometry,
+    point_geometry,
+    project,
+)
+from .serializers import status_color
+
+MAX_ZOOM = 22
+DENSITY_CELLS = 64
+
+VESSEL_FIELDS = (
+    'id', 'longitude', 'latitude', 'name', 'mmsi', 'status', 'vessel_type',
+    'speed', 'heading', 'last_position_update',
+)
+
+
+def valid_tile(z, x, y):
+    return 0 <= z <= MAX_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z
+
+
+def _inside(px, py):
+    return (px >= 0) & (px < EXTENT) & (py >= 0) & (py < EXTENT)
+
+
+def _vessel_layer(rows, z, x, y):
+    layer = Layer('vessels')
+    columns = list(zip(*rows))
+    px, py = project(columns[1], columns[2], z, x, y)
+    for row, tx, ty in zip(rows, np.rint(px).astype(int).tolist(), np.rint(py).astype(int).tolist()):
+        vessel_id, _, _, name, mmsi, status, vessel_type, speed, heading, updated = row
+        layer.add_feature(POINT, point_geometry([(tx, ty)]), {
+            'name': name,
+            'mmsi': mmsi,
+            'status': status,
+            'color': status_color(status),
+            'vessel_type': vessel_type,
+            'speed': None if speed is None else float(speed),
+            'heading': heading,
+            'updated': None if updated is None else int(updated.timestamp()),
+        }, feature_id=vessel_id)
+    return layer
+
+
+def _density_layer(coordinates, z, x, y):
+    layer = Layer('density')
+    lons, lats = zip(*coordinates)
+    px, py = project(lons, lats, z, x, y)
+    inside = _inside(px, py)
+    cell = EXTENT / DENSITY_CELLS
+    index = (py[inside] // cell).astype(np.int64) * DENSITY_CELLS + (px[inside] // cell).astype(np.int64)
+    counts = np.bincount(index, minlength=DENSITY_CELLS * DENSITY_CELLS)
+    for cell_index in np.flatnonzero(counts).tolist():
+        row, col = divmod(cell_index, DENSITY_CELLS)
+        center = (int((col + 0.5) * cell), int((row + 0.5) * cell))
+        layer.add_feature(POINT, point_geometry([center]), {'count': int(counts[cell_index])})
+    return layer
+
+
+def _track_layer(bbox, z, x, y):
+    layer = Layer('tracks')
+    since = timezone.now() - timedelta(hours=settings.VESSEL_TILE_TRACK_HOURS)
+    recent = VesselPosition.objects.filter(timestamp__gte=since)
+    in_tile = recent.filter(bbox_q(bbox)).values('vessel_id')
+    positions = (
+        recent.filter(vessel_id__in=in_tile)
+        .order_by('vessel_id', 'timestamp', 'id')
+        .values_list('vessel_id', 'longitude', 'latitude')
+    )
+    for vessel_id, group in groupby(positions, key=lambda row: row[0]):
+        _, lons, lats = zip(*group)
+        if len(lons) < 2:
+            continue
+        parts = clip_line(*project(lons, lats, z, x, y))
+        if parts:
+            layer.add_feature(LINESTRING, line_geometry(parts), feature_id=vessel_id)
+    return layer
+
+
+def build_tile(z, x, y, hours=1):
+    """Encode the vector tile z/x/y with vessels reported in the last ``hours``."""
+    bbox = buffered_bounds(z, x, y)
+    since = timezone.now() - timedelta(hours=hours)
+    located = Vessel.objects.filter(
+        latitude__isnull=False,
+        longitude__isnull=False,
+        last_position_update__gte=since,
+    ).filter(bbox_q(bbox))
+
+    layers = []
+    if located.count() > settings.VESSEL_TILE_MAX_VESSELS:
+        layers.append(_density_layer(list(located.values_list('longitude', 'latitude')), z, x, y))
+    else:
+        rows = list(located.values_list(*VESSEL_FIELDS))
+        if rows:
+            layers.append(_vessel_layer(rows, z, x, y))
+
+    if z >= settings.VESSEL_TILE_TRACK_MIN_ZOOM:
+        layers.append(_track_layer(bbox, z, x, y))
+
+    return encode_tile(layers)
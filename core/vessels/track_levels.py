@@ -0,0 +1,199 @@
+"""
+Multi-resolution track pyramid for zoom-dependent route fetches.
+
+Every (vessel, UTC day) with positions gets one TrackLevel per entry in
+LEVELS: the ids of the positions kept when that day's track is simplified
+at the level's tolerance. ``update_levels`` rebuilds only the days that
+received positions since the last run; the highest processed position id
+is kept as the TRACK_LEVELS_COUNTER watermark.
+
+Ids are handed out at INSERT but become visible at COMMIT, so a slow
+transaction can commit a position below the watermark after it moved on.
+Each run therefore also re-checks the TRACK_LEVELS_RESCAN_ROWS positions
+just below the watermark and rebuilds any of their days whose stored
+``source_count`` no longer matches the raw rows.
+
+``route_rows`` picks the level whose tolerance fits the requested zoom, so
+a world-zoom route over 30 days reads a few hundred stored points instead
+of the raw history. Positions in the re-check window or newer than the
+watermark (possibly not built yet) are read raw and merged in.
+"""
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+from .models import ChangeCounter, TrackLevel, VesselPosition
+from .simplify import simplify_track
+
+# Fields read for routes; also the VesselPosition kwargs rebuilt from them
+ROUTE_FIELDS = ('id', 'latitude', 'longitude', 'speed', 'course', 'heading', 'timestamp', 'data_source')
+
+# (level, tolerance in metres), coarsest first
+LEVELS = ((1, 20000.0), (2, 5000.0), (3, 1000.0), (4, 200.0))
+
+TRACK_LEVELS_COUNTER = 'track-levels'
+
+# Ids per IN (...) query, below SQLite's variable limit
+ID_CHUNK_SIZE = 500
+
+# Web-mercator ground resolution at the equator, zoom 0 (metres per pixel)
+METRES_PER_PIXEL_Z0 = 156543.03
+
+
+def level_for_zoom(zoom):
+    """(level, tolerance) for a map zoom, or None when raw points are needed."""
+    if zoom is None:
+        return None
+    resolution = METRES_PER_PIXEL_Z0 / 2 ** max(int(zoom), 0)
+    for level, tolerance in LEVELS:
+        if tolerance <= resolution:
+            return level, tolerance
+    return None
+
+
+def _day_bounds(day):
+    start = datetime.combine(day, time.min, tzinfo=dt_timezone.utc)
+    return start, start + timedelta(days=1)
+
+
+def build_day(vessel_id, day):
+    """(Re)build every level for one vessel and UTC day."""
+    start, end = _day_bounds(day)
+    rows = list(
+        VesselPosition.objects.filter(vessel_id=vessel_id, timestamp__gte=start, timestamp__lt=end)
+        .order_by('timestamp', 'id')
+        .values_list('id', 'latitude', 'longitude', 'timestamp', 'speed')
+    )
+
+    with transaction.atomic():
+        TrackLevel.objects.filter(vessel_id=vessel_id, day=day).delete()
+        if not rows:
+            return
+        ids, lats, lons, timestamps, speeds = zip(*rows)
+        seconds = [t.timestamp() for t in timestamps]
+        TrackLevel.objects.bulk_create([
+            TrackLevel(
+                vessel_id=vessel_id,
+                day=day,
+                level=level,
+                tolerance=tolerance,
+                position_ids=[ids[i] for i in simplify_track(lats, lons, seconds, speeds, tolerance=tolerance)],
+                source_count=len(rows),
+            )
+            for level, tolerance in LEVELS
+        ])
+
+
+def _chunks(ids):
+    for offset in range(0, len(ids), ID_CHUNK_SIZE):
+        yield ids[offset:offset + ID_CHUNK_SIZE]
+
+
+def _utc_day(timestamp):
+    return timestamp.astimezone(dt_timezone.utc).date()
+
+
+def stale_days(watermark):
+    """
+    (vessel_id, day) pairs of the re-check window whose levels miss rows.
+
+    Compares each day's raw position count with the ``source_count`` its
+    levels were built from; a day without levels counts as stale.
+    """
+    window = (
+        VesselPosition.objects.filter(pk__gt=watermark - settings.TRACK_LEVELS_RESCAN_ROWS, pk__lte=watermark)
+        .values_list('vessel_id', 'timestamp')
+    )
+    days = {(vessel_id, _utc_day(timestamp)) for vessel_id, timestamp in window}
+    if not days:
+        return set()
+
+    vessel_ids = sorted({vessel_id for vessel_id, _ in days})
+    first, last = min(day for _, day in days), max(day for _, day in days)
+    start, end = _day_bounds(first)[0], _day_bounds(last)[1]
+    counts, built = {}, {}
+    for chunk in _chunks(vessel_ids):
+        counts.update(
+            ((row['vessel_id'], row['day']), row['count'])
+            for row in VesselPosition.objects.filter(vessel_id__in=chunk, timestamp__gte=start, timestamp__lt=end)
+            .annotate(day=TruncDate('timestamp', tzinfo=dt_timezone.utc))
+            .values('vessel_id', 'day')
+            .annotate(count=Count('id'))
+        )
+        built.update(
+            ((vessel_id, day), source_count)
+            for vessel_id, day, source_count in TrackLevel.objects.filter(
+                vessel_id__in=chunk, day__gte=first, day__lte=last, level=LEVELS[0][0]
+            ).values_list('vessel_id', 'day', 'source_count')
+        )
+    return {key for key in days if built.get(key) != counts.get(key)}
+
+
+def update_levels(batch_size=10000):
+    """
+    Rebuild the days touched by positions added since the last run.
+
+    Processes at most ``batch_size`` new positions, plus the days of late
+    commits found below the watermark; returns the number of new positions
+    and vessel-days handled (0 positions means up to date).
+    """
+    watermark = ChangeCounter.current(TRACK_LEVELS_COUNTER)
+    new = list(
+        VesselPosition.objects.filter(pk__gt=watermark)
+        .order_by('pk')
+        .values_list('pk', 'vessel_id', 'timestamp')[:batch_size]
+    )
+
+    days = {(vessel_id, _utc_day(timestamp)) for _, vessel_id, timestamp in new}
+    days |= stale_days(watermark)
+    for vessel_id, day in sorted(days):
+        build_day(vessel_id, day)
+
+    if new:
+        ChangeCounter.mark([TRACK_LEVELS_COUNTER], new[-1][0])
+    return len(new), len(days)
+
+
+def route_rows(vessel, since, zoom=None):
+    """
+    Route rows (in ROUTE_FIELDS order, oldest first) since ``since``.
+
+    Returns ``(rows, tolerance)``; ``tolerance`` is the level's tolerance
+    when the pyramid was used (callers re-simplify the merged rows with
+    it) and None for raw history.
+    """
+    positions = VesselPosition.objects.filter(vessel=vessel, timestamp__gte=since)
+    match = level_for_zoom(zoom)
+    if match is None:
+        return list(positions.order_by('timestamp', 'id').values_list(*ROUTE_FIELDS)), None
+
+    level, tolerance = match
+    watermark = ChangeCounter.current(TRACK_LEVELS_COUNTER)
+    ids = sorted(
+        position_id
+        for stored in TrackLevel.objects.filter(
+            vessel=vessel, level=level, day__gte=_utc_day(since)
+        ).values_list('position_ids', flat=True)
+        for position_id in stored
+    )
+    rows = list(
+        positions.filter(pk__gt=watermark - settings.TRACK_LEVELS_RESCAN_ROWS).values_list(*ROUTE_FIELDS)
+    )
+    for chunk in _chunks(ids):
+        rows += positions.filter(pk__in=chunk).values_list(*ROUTE_FIELDS)
+    timestamp = ROUTE_FIELDS.index('timestamp')
+    rows = sorted(set(rows), key=lambda row: (row[timestamp], row[0]))
+    return rows, tolerance
+
+
+def iter_route_rows(vessel, since, chunk_size=2000):
+    """Raw route rows since ``since``, oldest first, fetched in chunks."""
+    return (
+        VesselPosition.objects.filter(vessel=vessel, timestamp__gte=since)
+        .order_by('timestamp', 'id')
+        .values_list(*ROUTE_FIELDS)
+        .iterator(chunk_size=chunk_size)
+    )
@@ -0,0 +1,100 @@
+"""
+Write helpers for vessel position history.
+
+Every code path that adds or removes VesselPosition rows should go through
+these helpers so the denormalized stats on Vessel (position_count,
+first_seen, latest_position) stay in sync without COUNT(*) queries on read.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, Exists, F, Min, OuterRef, Q, Subquery, Value, When
+from django.utils import timezone
+
+from .models import Vessel, VesselPosition
+
+
+def record_position(vessel, latitude, longitude, speed=None, course=None, heading=None,
+                    timestamp=None, data_source='aisstream'):
+    """
+    Append a position to the vessel history and update its stats incrementally.
+
+    A position already stored for the vessel at ``timestamp`` is returned
+    as is, without counting it again.
+    """
+    timestamp = timestamp or timezone.now()
+
+    with transaction.atomic():
+        # Same lock as vessels.ingest takes before its duplicate check
+        list(Vessel.objects.select_for_update().filter(pk=vessel.pk).values_list('pk'))
+        try:
+            with transaction.atomic():
+                position = VesselPosition.objects.create(
+                    vessel=vessel,
+                    latitude=latitude,
+                    longitude=longitude,
+                    speed=speed,
+                    course=course,
+                    heading=heading,
+                    timestamp=timestamp,
+                    data_source=data_source,
+                )
+        except IntegrityError:
+            stored = VesselPosition.objects.filter(vessel=vessel, timestamp=timestamp).first()
+            if stored is None:
+                raise
+            return stored
+
+        # Out-of-order reports must not replace a newer latest position
+        newer = VesselPosition.objects.filter(
+            pk=OuterRef('latest_position_id'),
+            timestamp__gt=timestamp,
+        )
+        Vessel.objects.filter(pk=vessel.pk).update(
+            position_count=F('position_count') + 1,
+            first_seen=Case(
+                When(Q(first_seen__isnull=True) | Q(first_seen__gt=timestamp), then=Value(timestamp)),
+                default=F('first_seen'),
+            ),
+            latest_position=Case(
+                When(Exists(newer), then=F('latest_position')),
+                default=Value(position.pk),
+            ),
+        )
+
+    return position
+
+
+def refresh_position_stats(vessel_ids):
+    """
+    Recompute position stats from history for the given vessels.
+
+    Used after deletes (retention, compaction) and by the repair command.
+    Returns the number of vessels updated.
+    """
+    vessel_ids = list(vessel_ids)
+    if not vessel_ids:
+        return 0
+
+    aggregates = {
+        row['vessel_id']: row
+        for row in VesselPosition.objects.filter(vessel_id__in=vessel_ids)
+        .order_by()
+        .values('vessel_id')
+        .annotate(count=Count('id'), first=Min('timestamp'))
+    }
+    latest = VesselPosition.objects.filter(
+        vessel=OuterRef('pk')
+    ).order_by('-timestamp', '-id').values('pk')[:1]
+
+    vessels = list(
+        Vessel.objects.filter(pk__in=vessel_ids)
+        .annotate(latest_id=Subquery(latest))
+        .only('id')
+    )
+    for vessel in vessels:
+        row = aggregates.get(vessel.pk)
+        vessel.position_count = row['count'] if row else 0
+        vessel.first_seen = row['first'] if row else None
+        vessel.latest_position_id = vessel.latest_id
+
+    Vessel.objects.bulk_update(vessels, Vessel.POSITION_STATS_FIELDS)
+    return len(vessels)
@@ -0,0 +1,40 @@
+"""
+Batch trail reads for many vessels at once.
+
+Vessels are processed in chunks; each chunk is one range query over the
+(vessel, timestamp) index, streamed with ``.iterator()``, grouped in Python
+and summarized per vessel with simplify_track, so only one vessel's raw
+positions are in memory at a time. The view caps the window with
+VESSEL_TRAILS_MAX_HOURS, which bounds that per-vessel history.
+"""
+from itertools import groupby
+
+from .models import VesselPosition
+from .simplify import simplify_track
+
+TRAIL_FIELDS = ('latitude', 'longitude', 'timestamp', 'speed')
+
+
+def iter_trails(vessel_ids, since, max_points, chunk_size=200, fetch_size=2000):
+    """
+    Yield ``(vessel_id, total_positions, rows)`` per vessel with positions.
+
+    ``rows`` are in TRAIL_FIELDS order, oldest first, capped at
+    ``max_points`` representative points.
+    """
+    vessel_ids = sorted(set(vessel_ids))
+    for offset in range(0, len(vessel_ids), chunk_size):
+        chunk = vessel_ids[offset:offset + chunk_size]
+        positions = (
+            VesselPosition.objects.filter(vessel_id__in=chunk, timestamp__gte=since)
+            .order_by('vessel_id', 'timestamp', 'id')
+            .values_list('vessel_id', *TRAIL_FIELDS)
+            .iterator(chunk_size=fetch_size)
+        )
+        for vessel_id, group in groupby(positions, key=lambda row: row[0]):
+            rows = [row[1:] for row in group]
+            lats, lons, timestamps, speeds = zip(*rows)
+            indices = simplify_track(
+                lats, lons, [t.timestamp() for t in timestamps], speeds, max_points=max_points
+            )
+            yield vessel_id, len(rows), [rows[i] for i in indices]
@@ -4,6 +4,8 @@ from .views import (
     VesselViewSet,
     LiveVesselView,
     UpdateVesselPositionView,
+    BulkVesselPositionView,
+    VectorTileView,
 )
 
 router = DefaultRouter()
@@ -17,6 +19,13 @@ urlpatterns = [
         UpdateVesselPositionView.as_view(),
         name="update-vessel-position",
     ),
+    path(
+        "vessels/positions/bulk/",
+        BulkVesselPositionView.as_view(),
+        name="bulk-vessel-positions",
+    ),
+    path("tiles/<int:z>/<int:x>/<int:y>", VectorTileView.as_view(), name="vessel-tile"),
+    path("tiles/<int:z>/<int:x>/<int:y>.mvt", VectorTileView.as_view(), name="vessel-tile-mvt"),
 ]
 
 # Router endpoints (includes new AIS endpoints)
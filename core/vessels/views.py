@@ -5,13 +5,57 @@ from rest_framework.response import Response
 from rest_framework.permissions import BasePermission, SAFE_METHODS, IsAuthenticated
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.views import APIView
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.parsers import JSONParser
+from rest_framework.settings import api_settings
+from django.conf import settings
+from django.core.cache import cache
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
-from datetime import timedelta
+from django.utils.dateparse import parse_datetime
+from datetime import datetime, timedelta, timezone as dt_timezone
+import math
+import numpy as np
 from drf_spectacular.utils import extend_schema
 
+from core.fieldsets import SparseQuerysetMixin, selected_fields
+from core.pagination import KeysetPagination
+
 from .models import Vessel, VesselPosition
-from ports.models import Port
+from .tracking import record_position
+from .changes import changes_since, current_cursor
+from .clustering import cluster_positions
+from .conditional import conditional_fleet, regions_for_bbox
+from .columnar import LIVE_COLUMNS, MAP_COLUMNS, SNAPSHOT_COLUMNS, column_names, encode_columns
+from .statistics import cache_version, fleet_statistics
+from .simplify import simplify_track
+from .track_levels import ROUTE_FIELDS, iter_route_rows, route_rows
+from .route_formats import geojson_chunks, ndjson_chunks, polyline_payload
+from .trails import TRAIL_FIELDS, iter_trails
+from .renderers import (
+    COLUMNAR_FORMATS,
+    STREAMING_ROUTE_FORMATS,
+    ColumnarBinaryRenderer,
+    ColumnarJSONRenderer,
+    GeoJSONRenderer,
+    NDJSONRenderer,
+    PNGRenderer,
+    PolylineRenderer,
+    VectorTileRenderer,
+)
+from .density import density_grid, density_png, grid_shape
+from .encoders import json_array_chunks, row_encoder
+from .search import search_index
+from .nearby import bearings, distances_km, nearby_grid
+from .snapshots import fleet_at
+from .playback import TooManyPositions, playback_chunks
+from .ingest import ingest_positions
+from .parsers import NDJSONParser
+from .mvt import buffered_bounds
+from .tiles import build_tile, valid_tile
+from .geo import bbox_q, parse_bbox
+from users.authentication import ClaimsJWTAuthentication
 from users.permissions import is_admin_email
 from .serializers import (
     VesselSerializer,
@@ -21,8 +65,63 @@ from .serializers import (
     VesselDetailSerializer,
     VesselPositionSerializer,
     VesselPositionUpdateSerializer,
+    VesselSearchSerializer,
+    status_color,
 )
 
+FLEET_RENDERERS = [*api_settings.DEFAULT_RENDERER_CLASSES, ColumnarJSONRenderer, ColumnarBinaryRenderer]
+ROUTE_RENDERERS = [*api_settings.DEFAULT_RENDERER_CLASSES, PolylineRenderer, GeoJSONRenderer, NDJSONRenderer]
+
+# Rows fetched per database round trip by streamed listings
+LIVE_STREAM_CHUNK = 2000
+
+# Vessel ids per IN list when a snapshot reads vessel names (SQLite caps parameters)
+SNAPSHOT_ID_BATCH = 1000
+
+# Any of these makes a streamed route summarized instead of the full raw window
+ROUTE_SIMPLIFY_PARAMS = ('max_points', 'limit', 'tolerance', 'bucket', 'zoom')
+
+# Largest Douglas-Peucker tolerance (metres) and time bucket (seconds) accepted
+ROUTE_MAX_TOLERANCE = 100000
+ROUTE_MAX_BUCKET = 86400
+
+
+def _number_param(params, name, cast, default, maximum=None):
+    """Parse a positive, finite numeric query parameter, or return ``default``."""
+    value = params.get(name)
+    if value in (None, ''):
+        return default
+    try:
+        number = cast(value)
+    except (OverflowError, ValueError):
+        raise ValidationError({name: f'Expected a number, got {value!r}.'})
+    if not math.isfinite(number):
+        raise ValidationError({name: f'Expected a finite number, got {value!r}.'})
+    if number <= 0:
+        raise ValidationError({name: 'Must be greater than zero.'})
+    if maximum is not None and number > maximum:
+        raise ValidationError({name: f'Must be at most {maximum:g}.'})
+    return number
+
+
+def _datetime_param(params, name, default):
+    """Parse an ISO datetime query parameter (naive values are UTC)."""
+    value = params.get(name)
+    if not value:
+        return default
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValidationError({name: 'Expected an ISO 8601 datetime.'})
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, dt_timezone.utc)
+    return parsed
+
+
+def map_watermarks(request):
+    """A viewport only changes when a vessel in one of its regions does"""
+    bbox = parse_bbox(request.query_params.get('bbox'))
+    return regions_for_bbox(bbox) if bbox else [Vessel.CHANGE_COUNTER]
+
 
 class VesselPermission(BasePermission):
     """Your existing permission class"""
@@ -44,14 +143,16 @@ class VesselPermission(BasePermission):
         return False
 
 
-class VesselViewSet(ModelViewSet):
+class VesselViewSet(SparseQuerysetMixin, ModelViewSet):
     """Enhanced VesselViewSet with your existing filtering + new AIS endpoints"""
     serializer_class = VesselSerializer
     permission_classes = [VesselPermission]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-last_updated', '-id')
 
     def get_queryset(self):
         """Your existing queryset filtering"""
-        queryset = Vessel.objects.all()
+        queryset = Vessel.objects.select_related('latest_position')
 
         vessel_type = self.request.query_params.get("vessel_type")
         status_param = self.request.query_params.get("status")
@@ -84,13 +185,59 @@ class VesselViewSet(ModelViewSet):
             return VesselRouteSerializer
         return VesselSerializer
 
+    def fleet_response(self, vessels, columns, envelope=None, cursor=None):
+        """
+        Respond with vessels serialized per row, or as columns when a columnar
+        format was negotiated. ``envelope`` wraps the list as ``vessels``; for
+        columnar payloads its keys are merged into the top level instead.
+        """
+        headers = {'X-Change-Cursor': cursor} if cursor else None
+
+        if self.request.accepted_renderer.format in COLUMNAR_FORMATS:
+            data = encode_columns(vessels.values_list(*column_names(columns)), columns)
+            data.update(envelope or {})
+            return Response(data, headers=headers)
+
+        # Read-only rows: encode values_list tuples instead of serializing models
+        serializer_class = self.get_serializer_class()
+        names = selected_fields(self.request, list(serializer_class().fields))
+        fields, encode = row_encoder(serializer_class, None if names is None else tuple(names))
+        data = encode(vessels.values_list(*fields))
+        if envelope is None:
+            return Response(data, headers=headers)
+        return Response({**envelope, 'vessels': data}, headers=headers)
+
     # ========== NEW ENDPOINTS FOR AIS STREAMING ==========
     
-    @action(detail=False, methods=['get'], url_path='live-tracking', permission_classes=[IsAuthenticated])
+    @action(detail=False, methods=['get'], url_path='live-tracking', permission_classes=[IsAuthenticated],
+            authentication_classes=[ClaimsJWTAuthentication], renderer_classes=FLEET_RENDERERS)
+    @conditional_fleet([Vessel.CHANGE_COUNTER])
     def live_tracking(self, request):
-        """Get live vessels with fallback"""
-        hours = int(request.query_params.get('hours', 1))
+        """
+        Get live vessels with fallback.
+
+        Every response carries a ``cursor``; passing it back as ``since=``
+        returns only vessels changed after it plus ``removed`` vessel ids.
+        ``?format=columnar`` / ``columnar-bin`` (or the matching Accept
+        types) return parallel arrays instead of one object per vessel.
+        """
+        hours = _number_param(request.query_params, 'hours', int, 1, maximum=settings.VESSEL_LIVE_MAX_HOURS)
         since = timezone.now() - timedelta(hours=hours)
+        cursor = current_cursor()
+
+        if request.query_params.get('since'):
+            vessels, removed = changes_since(
+                Vessel.objects.filter(latitude__isnull=False, longitude__isnull=False),
+                request.query_params['since'],
+                hours,
+            )
+            vessels = vessels.order_by('-last_position_update')
+            return self.fleet_response(vessels, LIVE_COLUMNS, {
+                'count': vessels.count(),
+                'last_updated': timezone.now(),
+                'removed': removed,
+                'cursor': cursor,
+            }, cursor)
 
         vessels = Vessel.objects.filter(
             last_position_update__gte=since,
@@ -105,109 +252,565 @@ class VesselViewSet(ModelViewSet):
                 longitude__isnull=False
             ).order_by('-last_position_update')[:2000]
 
-        serializer = self.get_serializer(vessels, many=True)
-
-        return Response({
+        return self.fleet_response(vessels, LIVE_COLUMNS, {
             'count': vessels.count(),
             'last_updated': timezone.now(),
-            'vessels': serializer.data
-        })
+            'cursor': cursor,
+        }, cursor)
 
-    @action(detail=False, methods=['get'], url_path='map-view', permission_classes=[IsAuthenticated])
+    @action(detail=False, methods=['get'], url_path='map-view', permission_classes=[IsAuthenticated],
+            authentication_classes=[ClaimsJWTAuthentication], renderer_classes=FLEET_RENDERERS)
+    @conditional_fleet(map_watermarks)
     def map_view(self, request):
-        """Optimized endpoint for map display (with fallback)"""
-        hours = int(request.query_params.get('hours', 1))
-        since = timezone.now() - timedelta(hours=hours)
+        """
+        Optimized endpoint for map display (with fallback).
 
-        # Try fresh vessels first
-        vessels = Vessel.objects.filter(
-            last_position_update__gte=since,
+        With ``bbox=west,south,east,north`` and/or ``zoom`` the response is
+        limited to the viewport and switches to grid clusters when it holds
+        more than VESSEL_MAP_CLUSTER_THRESHOLD vessels.
+
+        With ``since=<cursor>`` only vessels changed after the cursor are
+        returned, plus ``removed`` ids. The next cursor is sent in the
+        ``X-Change-Cursor`` header (and in the body of envelope responses).
+
+        Supports the same columnar formats as live-tracking.
+        """
+        hours = _number_param(request.query_params, 'hours', int, 1, maximum=settings.VESSEL_LIVE_MAX_HOURS)
+        since = timezone.now() - timedelta(hours=hours)
+        cursor = current_cursor()
+        bbox = parse_bbox(request.query_params.get('bbox'))
+        zoom = request.query_params.get('zoom')
+        try:
+            zoom = int(zoom) if zoom is not None else None
+        except ValueError:
+            raise ValidationError({'zoom': 'Expected an integer zoom level.'})
+
+        located = Vessel.objects.filter(
             latitude__isnull=False,
             longitude__isnull=False
         )
+        if bbox:
+            located = located.filter(bbox_q(bbox))
+
+        if request.query_params.get('since'):
+            vessels, removed = changes_since(located, request.query_params['since'], hours, bbox)
+            return self.fleet_response(vessels, MAP_COLUMNS, {
+                'mode': 'delta',
+                'count': vessels.count(),
+                'clusters': [],
+                'removed': removed,
+                'cursor': cursor,
+            }, cursor)
+
+        # Try fresh vessels first
+        vessels = located.filter(last_position_update__gte=since)
 
         # Fallback: if no fresh vessels, show latest known positions
         if not vessels.exists():
-            vessels = Vessel.objects.filter(
-                latitude__isnull=False,
-                longitude__isnull=False
-            ).order_by('-last_position_update')[:2000]
-
-        serializer = self.get_serializer(vessels, many=True)
-
-        return Response(serializer.data)
+            vessels = located.order_by('-last_position_update')[:2000]
+
+        if bbox is None and zoom is None:
+            return self.fleet_response(vessels, MAP_COLUMNS, cursor=cursor)
+
+        count = vessels.count()
+        if count <= settings.VESSEL_MAP_CLUSTER_THRESHOLD:
+            return self.fleet_response(vessels, MAP_COLUMNS, {
+                'mode': 'vessels',
+                'count': count,
+                'clusters': [],
+                'cursor': cursor,
+            }, cursor)
+
+        clusters = cluster_positions(
+            list(vessels.values_list('latitude', 'longitude', 'vessel_type', 'status')),
+            zoom or 0,
+        )
+        for cluster in clusters:
+            cluster['status_color'] = status_color(cluster['status'])
+
+        return self.fleet_response(Vessel.objects.none(), MAP_COLUMNS, {
+            'mode': 'clusters',
+            'count': count,
+            'clusters': clusters,
+            'cursor': cursor,
+        }, cursor)
     
-    @action(detail=True, methods=['get'], url_path='route', permission_classes=[IsAuthenticated])
+    @action(detail=True, methods=['get'], url_path='route', permission_classes=[IsAuthenticated],
+            renderer_classes=ROUTE_RENDERERS)
     def vessel_route(self, request, pk=None):
-        """Get vessel route (historical positions)"""
+        """
+        Get vessel route (historical positions), summarized.
+
+        The whole ``hours`` window is read and reduced to at most
+        ``max_points`` representative points (``limit`` is accepted as an
+        alias) that keep turns and stops. ``tolerance`` (metres) applies
+        Douglas-Peucker first and ``bucket`` (seconds) keeps one fix per
+        time bucket; see vessels/simplify.py.
+
+        With ``zoom`` (and no explicit tolerance/bucket) the route is read
+        from the precomputed track level for that zoom instead of the raw
+        history; see vessels/track_levels.py.
+
+        ``?format=polyline`` returns an encoded polyline (``extras=time,speed``
+        adds parallel encoded series). ``?format=geojson`` / ``ndjson`` stream
+        the route; unless a simplification parameter is given they stream
+        the full raw window. See vessels/route_formats.py.
+        """
         vessel = self.get_object()
-        hours = int(request.query_params.get('hours', 24))
-        limit = int(request.query_params.get('limit', 100))
+        params = request.query_params
+        output = request.accepted_renderer.format
+        hours = _number_param(params, 'hours', int, 24, settings.VESSEL_ROUTE_MAX_HOURS)
+        max_points = _number_param(
+            params, 'max_points', int,
+            _number_param(params, 'limit', int, settings.VESSEL_ROUTE_MAX_POINTS, settings.VESSEL_ROUTE_POINTS_LIMIT),
+            settings.VESSEL_ROUTE_POINTS_LIMIT,
+        )
+        tolerance = _number_param(params, 'tolerance', float, None, ROUTE_MAX_TOLERANCE)
+        bucket = _number_param(params, 'bucket', int, None, ROUTE_MAX_BUCKET)
+        zoom = params.get('zoom')
+        try:
+            zoom = int(zoom) if zoom is not None else None
+        except ValueError:
+            raise ValidationError({'zoom': 'Expected an integer zoom level.'})
         since = timezone.now() - timedelta(hours=hours)
-        
-        positions = VesselPosition.objects.filter(
-            vessel=vessel,
-            timestamp__gte=since
-        ).order_by('timestamp')[:limit]
-        
-        return Response({
-            'vessel': {
-                'id': vessel.id,
-                'name': vessel.name,
-                'mmsi': vessel.mmsi,
-                'imo_number': vessel.imo_number,
+
+        vessel_info = {
+            'id': vessel.id,
+            'name': vessel.name,
+            'mmsi': vessel.mmsi,
+            'imo_number': vessel.imo_number,
+        }
+
+        if output in STREAMING_ROUTE_FORMATS and not any(name in params for name in ROUTE_SIMPLIFY_PARAMS):
+            return self.route_stream(output, iter_route_rows(vessel, since), vessel_info)
+
+        use_levels = zoom is not None and tolerance is None and bucket is None
+        rows, level_tolerance = route_rows(vessel, since, zoom if use_levels else None)
+        tolerance = tolerance or level_tolerance
+
+        if rows:
+            columns = dict(zip(ROUTE_FIELDS, zip(*rows)))
+            indices = simplify_track(
+                columns['latitude'],
+                columns['longitude'],
+                [t.timestamp() for t in columns['timestamp']],
+                columns['speed'],
+                tolerance=tolerance,
+                bucket=bucket,
+                max_points=max_points,
+            )
+            selected = [rows[i] for i in indices]
+        else:
+            selected = []
+
+        if output in STREAMING_ROUTE_FORMATS:
+            return self.route_stream(output, selected, vessel_info)
+
+        data = {'vessel': vessel_info}
+        if output == PolylineRenderer.format:
+            extras = {extra.strip() for extra in params.get('extras', '').split(',')}
+            data.update(polyline_payload(selected, extras=extras))
+        else:
+            route = [VesselPosition(**dict(zip(ROUTE_FIELDS, row))) for row in selected]
+            data['route'] = VesselPositionSerializer(route, many=True).data
+
+        data.update({
+            'total_positions': len(rows),
+            'returned_positions': len(selected),
+            'simplification': {
+                'max_points': max_points,
+                'tolerance': tolerance,
+                'bucket': bucket,
+                'level': level_tolerance is not None,
             },
-            'route': VesselPositionSerializer(positions, many=True).data,
-            'total_positions': positions.count()
         })
-    
-    @action(detail=False, methods=['get'], url_path='statistics', permission_classes=[IsAuthenticated])
-    def statistics(self, request):
-        """Get overall vessel statistics"""
-        total = Vessel.objects.count()
-        active_1h = Vessel.objects.filter(
-            last_position_update__gte=timezone.now() - timedelta(hours=1)
-        ).count()
-        active_24h = Vessel.objects.filter(
-            last_position_update__gte=timezone.now() - timedelta(hours=24)
-        ).count()
-        
-        # Count by status
-        status_counts = {}
-        all_statuses = ['underway', 'anchored', 'moored', 'active', 'inactive', 'Moving', 'Anchored', 'Docked']
-        for vessel_status in all_statuses:
-            count = Vessel.objects.filter(status=vessel_status).count()
-            if count > 0:
-                status_counts[vessel_status] = count
-        
-        # Count by type
-        type_counts = {}
-        for vtype in ['Cargo', 'Tanker', 'Passenger', 'Fishing', 'Sailing', 'Tug', 'Other']:
-            count = Vessel.objects.filter(vessel_type=vtype).count()
-            if count > 0:
-                type_counts[vtype] = count
-        
+        return Response(data)
+
+    def route_stream(self, output, rows, vessel_info):
+        """Stream route rows as GeoJSON or NDJSON."""
+        if output == NDJSONRenderer.format:
+            chunks = ndjson_chunks(rows)
+        else:
+            chunks = geojson_chunks(rows, {'vessel': vessel_info})
+        return StreamingHttpResponse(chunks, content_type=self.request.accepted_renderer.media_type)
+
+    @action(detail=True, methods=['get'], url_path='positions', permission_classes=[IsAuthenticated])
+    def positions(self, request, pk=None):
+        """Paginated position history, newest first (supports ?pagination=cursor)"""
+        vessel = self.get_object()
+        self.keyset_ordering = ('-timestamp', '-id')
+        positions = VesselPosition.objects.filter(vessel=vessel).order_by(*self.keyset_ordering)
+
+        page = self.paginate_queryset(positions)
+        if page is not None:
+            return self.get_paginated_response(VesselPositionSerializer(page, many=True).data)
+        return Response(VesselPositionSerializer(positions, many=True).data)
+
+    @action(detail=False, methods=['get'], url_path='trails', permission_classes=[IsAuthenticated])
+    def trails(self, request):
+        """
+        Trails for many vessels in one response.
+
+        Select vessels with ``ids=1,2,3`` or ``bbox=west,south,east,north``
+        (current position), at most VESSEL_TRAILS_MAX_VESSELS. Each trail
+        covers the last ``hours`` (at most VESSEL_TRAILS_MAX_HOURS) and is
+        summarized to ``max_points`` (at most VESSEL_TRAILS_POINTS_LIMIT)
+        points, encoded as a polyline (``extras=time,speed`` as for routes).
+        """
+        params = request.query_params
+        hours = _number_param(params, 'hours', int, 6, maximum=settings.VESSEL_TRAILS_MAX_HOURS)
+        max_points = _number_param(
+            params, 'max_points', int, settings.VESSEL_TRAILS_MAX_POINTS,
+            maximum=settings.VESSEL_TRAILS_POINTS_LIMIT,
+        )
+        limit = settings.VESSEL_TRAILS_MAX_VESSELS
+        extras = {extra.strip() for extra in params.get('extras', '').split(',')}
+        bbox = parse_bbox(params.get('bbox'))
+
+        if params.get('ids'):
+            try:
+                vessel_ids = [int(value) for value in params['ids'].split(',') if value.strip()]
+            except ValueError:
+                raise ValidationError({'ids': 'Expected a comma-separated list of vessel ids.'})
+            if len(vessel_ids) > limit:
+                raise ValidationError({'ids': f'At most {limit} vessels per request.'})
+        elif bbox:
+            vessel_ids = list(
+                Vessel.objects.filter(bbox_q(bbox))
+                .order_by('-last_position_update')
+                .values_list('id', flat=True)[:limit]
+            )
+        else:
+            raise ValidationError({'ids': 'Provide ids or bbox.'})
+
+        since = timezone.now() - timedelta(hours=hours)
+        trails = []
+        for vessel_id, total, rows in iter_trails(vessel_ids, since, max_points):
+            trails.append({
+                'vessel_id': vessel_id,
+                'total_positions': total,
+                **polyline_payload(rows, extras=extras, fields=TRAIL_FIELDS),
+            })
+
+        return Response({
+            'count': len(trails),
+            'hours': hours,
+            'max_points': max_points,
+            'trails': trails,
+        })
+
+    @action(detail=False, methods=['get'], url_path='autocomplete', permission_classes=[IsAuthenticated])
+    def autocomplete(self, request):
+        """
+        Ranked vessel matches for ``q`` by name, MMSI, IMO or callsign.
+
+        Exact identifiers rank first, then prefixes, word prefixes,
+        substrings and finally close spellings (trigram similarity).
+        ``limit`` defaults to 10, at most VESSEL_SEARCH_MAX_RESULTS.
+        """
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            raise ValidationError({'q': 'This parameter is required.'})
+        limit = min(_number_param(request.query_params, 'limit', int, 10), settings.VESSEL_SEARCH_MAX_RESULTS)
+
+        with search_index() as index:
+            matches = index.search(query, limit)
+        vessels = Vessel.objects.in_bulk([vessel_id for vessel_id, _ in matches])
+        deleted = [vessel_id for vessel_id, _ in matches if vessel_id not in vessels]
+        if deleted:
+            # Deleted since the index last saw them
+            with search_index() as index:
+                index.remove(deleted)
+
+        results = [
+            {**VesselSearchSerializer(vessels[vessel_id]).data, 'score': score}
+            for vessel_id, score in matches if vessel_id in vessels
+        ]
+        return Response({'query': query, 'count': len(results), 'results': results})
+
+    @action(detail=False, methods=['get'], url_path='nearby', permission_classes=[IsAuthenticated])
+    def nearby(self, request):
+        """
+        Vessels near a point: the ``k`` nearest (default 10), or all within
+        ``radius_km`` (both: the k nearest inside the radius).
+
+        The point is ``lat`` / ``lon`` or the position of ``vessel`` (which
+        is then left out). Only vessels reported in the last ``hours``
+        (default 1, at most VESSEL_NEARBY_MAX_HOURS) count, and ``radius_km``
+        is at most VESSEL_NEARBY_MAX_RADIUS_KM. ``vessel_type`` / ``status``
+        take comma-separated values. Each result carries ``distance_km`` and
+        ``bearing`` (initial great-circle bearing from the point, degrees
+        clockwise from north).
+        """
+        params = request.query_params
+        origin_id = None
+        if params.get('vessel'):
+            try:
+                origin_pk = int(params['vessel'])
+            except ValueError:
+                raise ValidationError({'vessel': 'Expected a vessel id.'})
+            origin = get_object_or_404(Vessel, pk=origin_pk)
+            if origin.latitude is None or origin.longitude is None:
+                raise ValidationError({'vessel': 'This vessel has no known position.'})
+            origin_id, lat, lon = origin.pk, origin.latitude, origin.longitude
+        else:
+            try:
+                lat, lon = float(params['lat']), float(params['lon'])
+            except (KeyError, ValueError):
+                raise ValidationError({'lat': 'Provide lat and lon, or vessel.'})
+            if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+                raise ValidationError({'lat': 'Latitude must be within ±90 and longitude within ±180.'})
+
+        max_results = settings.VESSEL_NEARBY_MAX_RESULTS
+        radius = _number_param(params, 'radius_km', float, None, maximum=settings.VESSEL_NEARBY_MAX_RADIUS_KM)
+        k = min(_number_param(params, 'k', int, 10 if radius is None else max_results), max_results)
+        hours = _number_param(params, 'hours', float, 1, maximum=settings.VESSEL_NEARBY_MAX_HOURS)
+        since = timezone.now() - timedelta(hours=hours)
+        vessel_types = {value for value in params.get('vessel_type', '').split(',') if value}
+        statuses = {value for value in params.get('status', '').split(',') if value}
+
+        def accept(entry):
+            _, _, vessel_type, vessel_status, updated = entry
+            return (
+                updated is not None and updated >= since
+                and (not vessel_types or vessel_type in vessel_types)
+                and (not statuses or vessel_status in statuses)
+            )
+
+        # One extra in case the origin vessel is among the nearest
+        wanted = k + (origin_id is not None)
+        with nearby_grid() as grid:
+            if radius is None:
+                found = grid.nearest(lat, lon, wanted, accept)
+            else:
+                found = grid.nearest(lat, lon, wanted, accept, max_radius_km=radius)
+        ids = [vessel_id for _, vessel_id in found if vessel_id != origin_id][:k]
+
+        # Positions may have moved since the grid refresh: measure the rows loaded
+        fields, encode = row_encoder(VesselMapSerializer)
+        rows = {row['id']: row for row in encode(Vessel.objects.filter(pk__in=ids).values_list(*fields))}
+        deleted = [vessel_id for vessel_id in ids if vessel_id not in rows]
+        if deleted:
+            with nearby_grid() as grid:
+                grid.remove(deleted)
+        results = [rows[vessel_id] for vessel_id in ids if vessel_id in rows]
+        if results:
+            lats = [row['latitude'] for row in results]
+            lons = [row['longitude'] for row in results]
+            for row, distance, bearing in zip(
+                results, distances_km(lat, lon, lats, lons).tolist(), bearings(lat, lon, lats, lons).tolist()
+            ):
+                row['distance_km'] = round(distance, 3)
+                row['bearing'] = round(bearing, 1)
+            results.sort(key=lambda row: row['distance_km'])
+
+        return Response({
+            'origin': {'latitude': lat, 'longitude': lon, 'vessel': origin_id},
+            'radius_km': radius,
+            'count': len(results),
+            'results': results,
+        })
+
+    @action(detail=False, methods=['get'], url_path='snapshot', permission_classes=[IsAuthenticated],
+            renderer_classes=FLEET_RENDERERS)
+    def snapshot(self, request):
+        """
+        Last known position of every vessel at ``at`` (ISO datetime).
+
+        Optional filters: ``bbox``, ``vessel_type`` (comma-separated) and
+        ``max_age`` in hours (leave out vessels not heard from for longer
+        before ``at``). Supports the columnar formats of the fleet
+        endpoints.
+        """
+        params = request.query_params
+        at = _datetime_param(params, 'at', None)
+        if at is None:
+            raise ValidationError({'at': 'This parameter is required.'})
+        bbox = parse_bbox(params.get('bbox'))
+        max_age = _number_param(params, 'max_age', float, None)
+        vessel_types = {value for value in params.get('vessel_type', '').split(',') if value}
+
+        arrays, base = fleet_at(at)
+        keep = np.ones(len(arrays['vessel_id']), dtype=bool)
+        if bbox:
+            west, south, east, north = bbox
+            lats, lons = arrays['latitude'], arrays['longitude']
+            inside_lon = (lons >= west) & (lons <= east) if west <= east else (lons >= west) | (lons <= east)
+            keep &= (lats >= south) & (lats <= north) & inside_lon
+        if max_age is not None:
+            keep &= arrays['timestamp'] >= at.timestamp() - max_age * 3600
+        arrays = {name: values[keep] for name, values in arrays.items()}
+
+        vessels = Vessel.objects.all()
+        if vessel_types:
+            vessels = vessels.filter(vessel_type__in=vessel_types)
+        # Only the vessels in the snapshot, a batch of ids at a time
+        ids = np.unique(arrays['vessel_id']).tolist()
+        info = {}
+        for start in range(0, len(ids), SNAPSHOT_ID_BATCH):
+            batch = vessels.filter(pk__in=ids[start:start + SNAPSHOT_ID_BATCH])
+            info.update((vessel_id, rest) for vessel_id, *rest in batch.values_list('id', 'name', 'mmsi', 'vessel_type'))
+
+        def number(value, cast=float):
+            return None if np.isnan(value) else cast(value)
+
+        rows = [
+            (vessel_id, *info[vessel_id], lat, lon, number(speed), number(course), number(heading, int),
+             datetime.fromtimestamp(timestamp, tz=dt_timezone.utc))
+            for vessel_id, lat, lon, speed, course, heading, timestamp in zip(
+                arrays['vessel_id'].tolist(), arrays['latitude'].tolist(), arrays['longitude'].tolist(),
+                arrays['speed'].tolist(), arrays['course'].tolist(), arrays['heading'].tolist(),
+                arrays['timestamp'].tolist(),
+            )
+            if vessel_id in info
+        ]
+
+        envelope = {
+            'at': at,
+            'snapshot_at': base.taken_at if base else None,
+            'count': len(rows),
+        }
+        if request.accepted_renderer.format in COLUMNAR_FORMATS:
+            return Response({**encode_columns(rows, SNAPSHOT_COLUMNS), **envelope})
+        names = column_names(SNAPSHOT_COLUMNS)
+        return Response({**envelope, 'vessels': [dict(zip(names, row)) for row in rows]})
+
+    @action(detail=False, methods=['get'], url_path='playback', permission_classes=[IsAuthenticated])
+    def playback(self, request):
+        """
+        Stream interpolated vessel positions for animating traffic.
+
+        Vessels reporting inside ``bbox`` between ``start`` and ``end`` (ISO
+        datetimes; default: the last hour) are placed at every ``interval``
+        seconds (default 60, at most VESSEL_PLAYBACK_MAX_INTERVAL) along the
+        great circle between their reports. Reports more than ``max_gap``
+        seconds apart (at most VESSEL_PLAYBACK_GAP_LIMIT) are not bridged. The
+        response is NDJSON: a header line with the vessels, then one line
+        per frame (``t``, ``ids``, ``lat``, ``lon``).
+        """
+        params = request.query_params
+        bbox = parse_bbox(params.get('bbox'))
+        if not bbox:
+            raise ValidationError({'bbox': 'This parameter is required.'})
+        end = _datetime_param(params, 'end', timezone.now())
+        start = _datetime_param(params, 'start', end - timedelta(hours=1))
+        if start >= end:
+            raise ValidationError({'start': 'Must be before end.'})
+        interval = _number_param(params, 'interval', float, 60.0, maximum=settings.VESSEL_PLAYBACK_MAX_INTERVAL)
+        max_gap = _number_param(
+            params, 'max_gap', float, settings.VESSEL_PLAYBACK_MAX_GAP, maximum=settings.VESSEL_PLAYBACK_GAP_LIMIT
+        )
+
+        frames = int((end - start).total_seconds() // interval) + 1
+        if frames > settings.VESSEL_PLAYBACK_MAX_FRAMES:
+            raise ValidationError({
+                'interval': f'{frames} frames requested; at most {settings.VESSEL_PLAYBACK_MAX_FRAMES}.',
+            })
+
+        try:
+            chunks = playback_chunks(bbox, start, end, interval, max_gap, settings.VESSEL_PLAYBACK_MAX_POSITIONS)
+        except TooManyPositions as exc:
+            raise ValidationError({'bbox': f'More than {exc.args[0]} positions; narrow the bbox or time window.'})
+        return StreamingHttpResponse(chunks, content_type=NDJSONRenderer.media_type)
+
+    @action(detail=False, methods=['get'], url_path='density', permission_classes=[IsAuthenticated],
+            renderer_classes=[*api_settings.DEFAULT_RENDERER_CLASSES, PNGRenderer])
+    def density(self, request):
+        """
+        Traffic density of position reports in ``bbox`` between ``start``
+        and ``end`` (ISO datetimes; default: the last 24 hours).
+
+        ``resolution`` is the grid width in cells (height follows the bbox
+        aspect); ``vessel_type=Cargo,Tanker`` filters by type. Returns the
+        grid as JSON rows (north first) or, with ``?format=png``, a heatmap
+        image covering the bbox.
+        """
+        params = request.query_params
+        bbox = parse_bbox(params.get('bbox'))
+        if not bbox:
+            raise ValidationError({'bbox': 'This parameter is required.'})
+        width = min(
+            _number_param(params, 'resolution', int, 256),
+            settings.VESSEL_DENSITY_MAX_RESOLUTION,
+        )
+        end = _datetime_param(params, 'end', timezone.now())
+        start = _datetime_param(params, 'start', end - timedelta(hours=24))
+        if start >= end:
+            raise ValidationError({'start': 'Must be before end.'})
+        vessel_types = [t for t in params.get('vessel_type', '').split(',') if t]
+
+        width, height = grid_shape(bbox, width)
+        grid = density_grid(bbox, start, end, width, height, vessel_types)
+
+        if request.accepted_renderer.format == PNGRenderer.format:
+            return Response(density_png(grid))
         return Response({
-            'total_vessels': total,
-            'total_ports': Port.objects.count(),
-            'active_1h': active_1h,
-            'active_24h': active_24h,
-            'by_status': status_counts,
-            'by_type': type_counts,
-            'last_updated': timezone.now()
+            'bbox': bbox,
+            'start': start,
+            'end': end,
+            'width': width,
+            'height': height,
+            'total': int(grid.sum()),
+            'max': int(grid.max()),
+            'grid': grid.tolist(),
         })
 
+    @action(detail=False, methods=['get'], url_path='statistics', permission_classes=[IsAuthenticated])
+    @conditional_fleet(version=cache_version)
+    def statistics(self, request):
+        """Get overall vessel statistics (single aggregate query, cached)"""
+        return Response(fleet_statistics(self.fleet_version))
+
 
 # ========== YOUR EXISTING API VIEWS (PRESERVED) ==========
 
 class LiveVesselView(APIView):
-    """Your existing live vessel view"""
+    """
+    Your existing live vessel view.
+
+    Streams the JSON array from a chunked cursor, encoding ``values_list``
+    rows directly (same output as VesselLiveSerializer), so memory stays
+    flat however large the fleet is.
+    """
     permission_classes = [IsAuthenticated]
+    authentication_classes = [ClaimsJWTAuthentication]
 
     def get(self, request):
-        vessels = Vessel.objects.all()
-        serializer = VesselLiveSerializer(vessels, many=True)
-        return Response(serializer.data)
+        fields, encode = row_encoder(VesselLiveSerializer)
+        rows = Vessel.objects.values_list(*fields).iterator(chunk_size=LIVE_STREAM_CHUNK)
+        return StreamingHttpResponse(json_array_chunks(rows, encode), content_type='application/json')
+
+
+def tile_watermarks(request):
+    """Region watermarks under a tile (its buffered bounds)"""
+    z, x, y = (request.parser_context['kwargs'][key] for key in ('z', 'x', 'y'))
+    if not valid_tile(z, x, y):
+        raise NotFound('No such tile.')
+    return regions_for_bbox(buffered_bounds(z, x, y))
+
+
+class VectorTileView(APIView):
+    """
+    Mapbox Vector Tile of live vessels (or their density) and recent tracks.
+
+    Tiles are cached under their ETag, which changes with the region
+    watermarks of the tile, so panning back to a tile is a cache hit.
+    As on live-tracking and map-view, only vessels reported in the last
+    ``hours`` (default 1) are drawn.
+    """
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [ClaimsJWTAuthentication]
+    renderer_classes = [VectorTileRenderer, *api_settings.DEFAULT_RENDERER_CLASSES]
+
+    @conditional_fleet(tile_watermarks)
+    def get(self, request, z, x, y):
+        hours = _number_param(request.query_params, 'hours', int, 1, maximum=settings.VESSEL_TILE_MAX_HOURS)
+        key = f"vessel-tile:{self.fleet_etag}"
+        tile = cache.get(key)
+        if tile is None:
+            tile = build_tile(z, x, y, hours)
+            cache.set(key, tile, settings.VESSEL_TILE_CACHE_TTL)
+        return Response(tile)
 
 
 @extend_schema(
@@ -231,11 +834,13 @@ class UpdateVesselPositionView(APIView):
         vessel.status = serializer.validated_data["status"]
         vessel.last_position_update = timezone.now()
         vessel.data_source = 'manual'
-        vessel.save()
+        vessel.save(update_fields=[
+            'latitude', 'longitude', 'speed', 'status', 'last_position_update', 'data_source',
+        ])
         
         # Save position history
-        VesselPosition.objects.create(
-            vessel=vessel,
+        record_position(
+            vessel,
             latitude=vessel.latitude,
             longitude=vessel.longitude,
             speed=vessel.speed,
@@ -247,3 +852,49 @@ class UpdateVesselPositionView(APIView):
             {"message": "Vessel position updated successfully"},
             status=status.HTTP_200_OK,
         )
+
+
+@extend_schema(
+    request={'application/json': dict, 'application/x-ndjson': dict},
+    responses={200: dict, 207: dict},
+)
+class BulkVesselPositionView(APIView):
+    """
+    Ingest many position reports in one request.
+
+    The body is a JSON list of reports, ``{"positions": [...]}``, or NDJSON
+    with one report per line. A report names its vessel by ``mmsi`` or
+    ``imo`` and carries ``latitude``, ``longitude`` and optionally
+    ``timestamp`` (ISO 8601 or epoch seconds, default now), ``speed``,
+    ``course``, ``heading`` and ``status``.
+
+    Every report gets a result, in order. The response is 200 when all
+    were stored (or were already stored) and 207 when some failed.
+    """
+    permission_classes = [VesselPermission]
+    parser_classes = [JSONParser, NDJSONParser]
+
+    def post(self, request):
+        items = request.data
+        if isinstance(items, dict):
+            items = items.get('positions')
+        if not isinstance(items, list) or not items:
+            raise ValidationError({'positions': 'Expected a non-empty list of position reports.'})
+        if len(items) > settings.VESSEL_INGEST_MAX_ITEMS:
+            raise ValidationError({'positions': f'At most {settings.VESSEL_INGEST_MAX_ITEMS} reports per request.'})
+
+        results = ingest_positions(items)
+        counts = {'created': 0, 'duplicate': 0, 'error': 0}
+        for result in results:
+            counts[result['status']] += 1
+
+        return Response(
+            {
+                'received': len(results),
+                'created': counts['created'],
+                'duplicates': counts['duplicate'],
+                'failed': counts['error'],
+                'results': results,
+            },
+            status=status.HTTP_207_MULTI_STATUS if counts['error'] else status.HTTP_200_OK,
+        )
@@ -0,0 +1,21 @@
+# Generated by Django 6.0.1 on 2026-10-19 17:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ports", "0003_alter_port_options_remove_port_avg_wait_time_and_more"),
+        ("vessels", "0011_keyset_indexes"),
+        ("voyages", "0003_alter_voyage_id"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="voyage",
+            index=models.Index(
+                fields=["-departure_time", "-id"], name="voyages_voy_departu_a13429_idx"
+            ),
+        ),
+    ]
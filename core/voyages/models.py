@@ -24,5 +24,11 @@ class Voyage(models.Model):
         default='Planned'
     )
 
+    class Meta:
+        indexes = [
+            # Keyset pagination order (VoyageViewSet.keyset_ordering)
+            models.Index(fields=['-departure_time', '-id']),
+        ]
+
     def __str__(self):
         return f"{self.vessel} : {self.origin_port} → {self.destination_port}"
@@ -1,7 +1,9 @@
 from rest_framework import serializers
+
+from core.fieldsets import SparseFieldsetMixin
 from .models import Voyage
 
-class VoyageSerializer(serializers.ModelSerializer):
+class VoyageSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Voyage
         fields = '__all__'
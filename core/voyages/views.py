@@ -3,6 +3,8 @@ from rest_framework.permissions import BasePermission, SAFE_METHODS
 from .models import Voyage
 from .serializers import VoyageSerializer
 from users.permissions import is_admin_email
+from core.fieldsets import SparseQuerysetMixin
+from core.pagination import KeysetPagination
 
 
 class VoyagePermission(BasePermission):
@@ -24,7 +26,9 @@ class VoyagePermission(BasePermission):
         return False
 
 
-class VoyageViewSet(ModelViewSet):
+class VoyageViewSet(SparseQuerysetMixin, ModelViewSet):
     queryset = Voyage.objects.all()
     serializer_class = VoyageSerializer
     permission_classes = [VoyagePermission]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-departure_time', '-id')